@@ -0,0 +1,89 @@
+#! /usr/bin/env python3
+"""Microbenchmark encoding and decoding our tokens with every codec backend.
+
+Reports operations per second for access and refresh tokens, the refresh token
+carrying the `at_hash` of an access token like the ones `/login` hands out.
+
+    python3 scripts/bench_jwt.py --iterations 20000
+"""
+import argparse
+import os
+import sys
+import time
+from collections.abc import Callable
+
+os.environ.setdefault("ANIME_API_SECRET", "benchmark")
+
+
+def get_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser("bench_jwt")
+    parser.add_argument("--iterations", type=int, default=20_000)
+    parser.add_argument("--backends", nargs="+", default=["jose", "hmac"])
+    return parser.parse_args()
+
+
+def ops_per_second(operation: Callable[[], object], iterations: int) -> float:
+    # warm up caches and lazy imports before timing
+    for _ in range(min(100, iterations)):
+        operation()
+    start = time.perf_counter()
+    for _ in range(iterations):
+        operation()
+    return iterations / (time.perf_counter() - start)
+
+
+def main(args: argparse.Namespace) -> int:
+    from anime_rest_api.api.models.sessions import ApiAccessJwt
+    from anime_rest_api.api.models.sessions import ApiRefreshJwt
+    from anime_rest_api.api.models.sessions import JwtUserDetails
+    from anime_rest_api.api.models.sessions import epoch_now
+    from anime_rest_api.api.tokens import build_codec
+
+    now = epoch_now()
+    access_claims = ApiAccessJwt(
+        user=JwtUserDetails(username="benchmark", email="benchmark@example.com"),
+        sub="1",
+        iat=now,
+        exp=now + 900,
+        aud="anime_api",
+        iss="anime_api",
+        role="user",
+    ).model_dump(by_alias=True)
+    refresh_claims = ApiRefreshJwt(
+        sub="1",
+        iat=now,
+        exp=now + 900,
+        aud="anime_api",
+        iss="anime_api",
+        session_version=0,
+    ).model_dump(by_alias=True)
+    required = frozenset({"aud", "iat", "exp", "sub", "iss"})
+
+    print(f"{'backend':>8} {'operation':>16} {'ops/s':>10}")
+    for backend in args.backends:
+        codec = build_codec(
+            backend,
+            os.environ["ANIME_API_SECRET"],
+            audience="anime_api",
+            issuer="anime_api",
+        )
+        access = codec.encode(access_claims)
+        refresh = codec.encode(refresh_claims, access_token=access)
+        operations = {
+            "encode access": lambda: codec.encode(access_claims),
+            "encode refresh": lambda: codec.encode(refresh_claims, access_token=access),
+            "decode access": lambda: codec.decode(access, required=required),
+            "decode refresh": lambda: codec.decode(
+                refresh,
+                required=required | {"at_hash"},
+                access_token=access,
+            ),
+        }
+        for name, operation in operations.items():
+            rate = ops_per_second(operation, args.iterations)
+            print(f"{backend:>8} {name:>16} {rate:>10.0f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(get_args()))
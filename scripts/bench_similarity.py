@@ -0,0 +1,113 @@
+#! /usr/bin/env python3
+"""Benchmark precomputing similar shows, without a database.
+
+Generates random shows, then reports how long encoding them, a full recompute of
+their top `k` neighbours and an incremental recompute after a share of them
+changed take.
+
+    python3 scripts/bench_similarity.py --shows 200000 --changed 0.01
+"""
+import argparse
+import os
+import sys
+import time
+
+os.environ.setdefault("ANIME_API_SECRET", "benchmark")
+
+
+def get_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser("bench_similarity")
+    parser.add_argument("--shows", type=int, default=200_000)
+    parser.add_argument("--k", type=int, default=20)
+    parser.add_argument("--block-rows", type=int, default=512)
+    parser.add_argument(
+        "--changed",
+        type=float,
+        default=0.01,
+        help="share of shows changed before the incremental recompute",
+    )
+    return parser.parse_args()
+
+
+def random_rows(n_shows: int, rng) -> list[tuple]:
+    from anime_rest_api.db.models.content.show_details import ShowContentRating
+    from anime_rest_api.db.models.content.show_details import ShowStatus
+    from anime_rest_api.db.models.content.show_details import ShowType
+
+    types = rng.choice([str(v) for v in ShowType], n_shows)
+    statuses = rng.choice([str(v) for v in ShowStatus], n_shows)
+    ratings = rng.choice([str(v) for v in ShowContentRating], n_shows)
+    years = rng.integers(1960, 2026, n_shows)
+    reviews = rng.geometric(0.02, n_shows) - 1
+    averages = rng.uniform(1, 10, n_shows)
+    genres = rng.integers(1, 40, (n_shows, 3))
+    genre_counts = rng.integers(0, 4, n_shows)
+    return [
+        (
+            show_id,
+            types[show_id],
+            statuses[show_id],
+            ratings[show_id],
+            int(years[show_id]),
+            float(averages[show_id]) if reviews[show_id] else None,
+            int(reviews[show_id]),
+            genres[show_id, : genre_counts[show_id]].tolist(),
+        )
+        for show_id in range(n_shows)
+    ]
+
+
+def timed(name: str, call, *args):
+    begin = time.perf_counter()
+    result = call(*args)
+    print(f"{name:<28}{time.perf_counter() - begin:>10.2f}s")
+    return result
+
+
+def main(args: argparse.Namespace) -> int:
+    import numpy as np
+
+    from anime_rest_api.db import similarity
+
+    rng = np.random.default_rng(0)
+    rows = random_rows(args.shows, rng)
+    columns = similarity.FeatureColumns.from_rows(rows)
+    features = timed("encode", similarity.encode_features, columns)
+    timed("digest", similarity.feature_digests, features)
+    _, scores = timed(
+        f"full top {args.k}",
+        similarity.top_k_neighbours,
+        features,
+        np.arange(args.shows),
+        args.k,
+        args.block_rows,
+    )
+    changed = rng.choice(args.shows, int(args.shows * args.changed), replace=False)
+    for show_id in changed.tolist():
+        _, show_type, status, rating, year, *rest = rows[show_id]
+        rows[show_id] = (show_id, show_type, status, rating, year + 1, *rest)
+    features = similarity.encode_features(similarity.FeatureColumns.from_rows(rows))
+    begin = time.perf_counter()
+    beaten = similarity.beaten_lists(
+        features,
+        changed,
+        scores[:, -1],
+        args.block_rows,
+    )
+    beaten[changed] = True
+    similarity.top_k_neighbours(
+        features,
+        np.flatnonzero(beaten),
+        args.k,
+        args.block_rows,
+    )
+    print(
+        f"{'incremental':<28}{time.perf_counter() - begin:>10.2f}s "
+        f"({len(changed)} changed, {int(beaten.sum())} recomputed)",
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    args = get_args()
+    sys.exit(main(args))
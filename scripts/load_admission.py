@@ -0,0 +1,105 @@
+#! /usr/bin/env python3
+"""Load test admission control against a simulated slow database.
+
+`list_shows` is swapped for a stand-in that checks out one of `--pool` connections
+and holds it for `--db-latency` seconds, like a pool in front of a struggling
+Postgres. Many concurrent clients then hit `/shows` with admission control on and
+off, and the latency percentiles of both runs are compared. No database is needed.
+
+    python3 scripts/load_admission.py --clients 200 --duration 10
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+os.environ.setdefault("ANIME_API_SECRET", "load-test")
+os.environ.setdefault("ANIME_API_DATABASE_URL", "postgresql+asyncpg://unused/unused")
+
+
+def get_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser("load_admission")
+    parser.add_argument("--clients", type=int, default=200)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--pool", type=int, default=15, help="simulated pool size")
+    parser.add_argument("--db-latency", type=float, default=0.05)
+    return parser.parse_args()
+
+
+def build_app(admission: bool, pool: asyncio.Semaphore, db_latency: float):
+    os.environ["ANIME_API_ADMISSION_CONTROL"] = "true" if admission else "false"
+    from anime_rest_api.api import create_app
+    from anime_rest_api.api.routers import shows_routes
+    from anime_rest_api.api.timeouts import statement_timeout
+    from anime_rest_api.db.connection import Db
+
+    async def slow_list_shows(_session, _offset, _limit):
+        async with pool:
+            await asyncio.sleep(db_latency)
+        return []
+
+    async def no_session():
+        yield None
+
+    async def no_timeout():
+        return None
+
+    shows_routes.list_shows = slow_list_shows
+    app = create_app()
+    app.dependency_overrides[Db.session] = no_session
+    app.dependency_overrides[statement_timeout] = no_timeout
+    return app
+
+
+async def run(admission: bool, args: argparse.Namespace) -> None:
+    import httpx
+
+    pool = asyncio.Semaphore(args.pool)
+    app = build_app(admission, pool, args.db_latency)
+    latencies: list[float] = []
+    ok_latencies: list[float] = []
+    statuses: dict[int, int] = {}
+    deadline = time.perf_counter() + args.duration
+
+    async def client_loop(client: httpx.AsyncClient) -> None:
+        while time.perf_counter() < deadline:
+            begin = time.perf_counter()
+            response = await client.get("/shows")
+            latencies.append(time.perf_counter() - begin)
+            if response.status_code == 200:
+                ok_latencies.append(latencies[-1])
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+            if response.status_code == 503:
+                # well behaved clients back off, just not for the full Retry-After
+                await asyncio.sleep(0.1)
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(
+        transport=transport,
+        base_url="http://load",
+        timeout=None,
+    ) as client:
+        await asyncio.gather(*(client_loop(client) for _ in range(args.clients)))
+
+    quantiles = statistics.quantiles(latencies, n=100)
+    ok_quantiles = statistics.quantiles(ok_latencies, n=100)
+    print(
+        f"admission={'on ' if admission else 'off'} "
+        f"ok={statuses.get(200, 0):>6} rejected={statuses.get(503, 0):>6} "
+        f"all p50={quantiles[49] * 1000:>7.1f}ms p99={quantiles[98] * 1000:>7.1f}ms "
+        f"ok p99={ok_quantiles[98] * 1000:>7.1f}ms "
+        f"max={max(latencies) * 1000:>7.1f}ms",
+    )
+
+
+def main(args: argparse.Namespace) -> int:
+    for admission in (False, True):
+        asyncio.run(run(admission, args))
+    return 0
+
+
+if __name__ == "__main__":
+    args = get_args()
+    sys.exit(main(args))
@@ -0,0 +1,269 @@
+"""Admission control, shed load before requests queue on the database pool.
+
+Requests are split into route classes that each get their own concurrency limit.
+A request waits for a slot of its class for a bounded time behind a bounded queue,
+otherwise it is answered right away with `503` and a `Retry-After` header. Login and
+token refresh have their own class so a flood of reads or writes can't starve them.
+The calls of `POST /batch` are admitted one by one, in the class of each call.
+"""
+
+import asyncio
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+import logging
+import math
+import os
+from typing import Literal
+
+from pydantic import BaseModel
+from pydantic import Field
+from starlette.types import ASGIApp
+from starlette.types import Receive
+from starlette.types import Scope
+from starlette.types import Send
+
+from .metrics import REGISTRY
+from .metrics import Counter
+from .metrics import Gauge
+
+LOG = logging.getLogger(f"anime-api.{__name__}")
+
+type RouteClass = Literal["auth", "read", "write"]
+
+AUTH_PATHS = frozenset({"/login", "/refresh", "/logout"})
+EXEMPT_PATHS = {
+    "/docs",
+    "/docs/oauth2-redirect",
+    "/openapi.json",
+    "/metrics",
+    "/healthz",
+    "/readyz",
+    "/admin/profile/cpu",
+    "/admin/profile/memory",
+    # its calls take a slot each, see `admission_slot`
+    "/batch",
+}
+"""Paths that never touch the database, or admit their calls, never limited."""
+_READ_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+_SCOPE_KEY = "anime_api.admission"
+REJECTED_BODY = b'{"detail":"Server is overloaded, retry later"}'
+
+__all__ = [
+    "AUTH_PATHS",
+    "EXEMPT_PATHS",
+    "AdmissionControlMiddleware",
+    "AdmissionLimit",
+    "AdmissionLimiter",
+    "REJECTED_BODY",
+    "RouteClass",
+    "admission_slot",
+    "classify",
+    "limits_from_env",
+]
+
+ADMITTED = REGISTRY.register(
+    Counter(
+        "anime_api_admission_admitted_total",
+        "Requests admitted by admission control.",
+        ("route_class",),
+    ),
+)
+REJECTED = REGISTRY.register(
+    Counter(
+        "anime_api_admission_rejected_total",
+        "Requests rejected by admission control.",
+        ("route_class", "reason"),
+    ),
+)
+
+
+class AdmissionLimit(BaseModel):
+    """Limits of one route class."""
+
+    concurrency: int = Field(..., ge=1)
+    """Requests of the class running at once."""
+    max_queue: int = Field(..., ge=0)
+    """Requests of the class waiting for a slot, more are rejected right away."""
+    max_wait: float = Field(..., gt=0)
+    """Seconds a request waits for a slot before being rejected."""
+
+    @classmethod
+    def parse(cls, value: str) -> "AdmissionLimit":
+        """Parse a `concurrency,max_queue,max_wait` string.
+
+        >>> AdmissionLimit.parse("4, 16, 0.5")
+        AdmissionLimit(concurrency=4, max_queue=16, max_wait=0.5)
+        """
+        concurrency, max_queue, max_wait = (part.strip() for part in value.split(","))
+        return cls(
+            concurrency=int(concurrency),
+            max_queue=int(max_queue),
+            max_wait=float(max_wait),
+        )
+
+
+# defaults add up to the default SQLAlchemy pool of 5 connections + 10 overflow
+_DEFAULT_LIMITS: dict[RouteClass, AdmissionLimit] = {
+    "auth": AdmissionLimit(concurrency=2, max_queue=32, max_wait=2.0),
+    "read": AdmissionLimit(concurrency=10, max_queue=64, max_wait=0.5),
+    "write": AdmissionLimit(concurrency=3, max_queue=16, max_wait=1.0),
+}
+
+
+def limits_from_env() -> dict[RouteClass, AdmissionLimit]:
+    """Read the limit of each class from `ANIME_API_ADMISSION_<CLASS>`."""
+    limits = dict(_DEFAULT_LIMITS)
+    for route_class in limits:
+        value = os.getenv(f"ANIME_API_ADMISSION_{route_class.upper()}")
+        if value:
+            limits[route_class] = AdmissionLimit.parse(value)
+    return limits
+
+
+def classify(method: str, path: str) -> RouteClass | None:
+    """Return the route class of a request, None when it is exempt.
+
+    >>> classify("POST", "/login")
+    'auth'
+    >>> classify("GET", "/shows")
+    'read'
+    >>> classify("PATCH", "/shows/1")
+    'write'
+    """
+    if path in EXEMPT_PATHS:
+        return None
+    if path in AUTH_PATHS:
+        return "auth"
+    return "read" if method in _READ_METHODS else "write"
+
+
+class AdmissionLimiter:
+    """Concurrency slots with a bounded wait queue for one route class."""
+
+    def __init__(self, limit: AdmissionLimit) -> None:
+        """Initialize the limiter with all slots free."""
+        self.limit = limit
+        self._slots = asyncio.Semaphore(limit.concurrency)
+        self.running = 0
+        self.waiting = 0
+
+    async def acquire(self) -> Literal["queue_full", "wait_timeout"] | None:
+        """Take a slot, returning the reason when the request must be rejected."""
+        if self._slots.locked() and self.waiting >= self.limit.max_queue:
+            return "queue_full"
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(self._slots.acquire(), timeout=self.limit.max_wait)
+        except TimeoutError:
+            return "wait_timeout"
+        finally:
+            self.waiting -= 1
+        self.running += 1
+        return None
+
+    def release(self) -> None:
+        """Give back a slot taken by `acquire`."""
+        self.running -= 1
+        self._slots.release()
+
+
+class AdmissionControlMiddleware:
+    """ASGI middleware limiting concurrent requests per route class."""
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        limits: dict[RouteClass, AdmissionLimit] | None = None,
+    ) -> None:
+        """Wrap app, using `limits_from_env` when limits aren't given."""
+        self.app = app
+        self.limiters = {
+            route_class: AdmissionLimiter(limit)
+            for route_class, limit in (limits or limits_from_env()).items()
+        }
+        REGISTRY.register(
+            Gauge(
+                "anime_api_admission_in_flight",
+                "Requests holding or waiting for an admission slot.",
+                ("route_class", "state"),
+                collect=self._collect,
+            ),
+        )
+
+    def _collect(self) -> dict[tuple[str, ...], float]:
+        samples: dict[tuple[str, ...], float] = {}
+        for route_class, limiter in self.limiters.items():
+            samples[route_class, "running"] = limiter.running
+            samples[route_class, "waiting"] = limiter.waiting
+        return samples
+
+    @asynccontextmanager
+    async def slot(self, method: str, path: str) -> AsyncIterator[float | None]:
+        """Hold a slot of the class of a request for the duration of the block.
+
+        Yields:
+            float | None: None once admitted, otherwise the seconds the rejected
+                request should be retried after, it must not run then.
+        """
+        route_class = classify(method, path)
+        if route_class is None:
+            yield None
+            return
+        limiter = self.limiters[route_class]
+        rejection = await limiter.acquire()
+        if rejection is not None:
+            REJECTED.inc(route_class, rejection)
+            LOG.warning("Rejected %s request, %s", route_class, rejection)
+            yield limiter.limit.max_wait
+            return
+        ADMITTED.inc(route_class)
+        try:
+            yield None
+        finally:
+            limiter.release()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """Admit or reject an HTTP request, other scopes pass through."""
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        async with self.slot(scope["method"], scope["path"]) as retry_after:
+            if retry_after is not None:
+                await self._reject(send, retry_after)
+                return
+            # for requests running calls of their own, like `POST /batch`
+            scope[_SCOPE_KEY] = self
+            await self.app(scope, receive, send)
+
+    @staticmethod
+    async def _reject(send: Send, retry_after: float) -> None:
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 503,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(REJECTED_BODY)).encode()),
+                    (b"retry-after", str(max(1, math.ceil(retry_after))).encode()),
+                ],
+            },
+        )
+        await send({"type": "http.response.body", "body": REJECTED_BODY})
+
+
+@asynccontextmanager
+async def admission_slot(
+    scope: Scope,
+    method: str,
+    path: str,
+) -> AsyncIterator[float | None]:
+    """Admit a call made in-process by the request of scope, like `slot`.
+
+    Calls are always admitted when the request didn't pass admission control.
+    """
+    middleware: AdmissionControlMiddleware | None = scope.get(_SCOPE_KEY)
+    if middleware is None:
+        yield None
+        return
+    async with middleware.slot(method, path) as retry_after:
+        yield retry_after
@@ -1,17 +1,48 @@
+import asyncio
 from collections.abc import AsyncGenerator
+import contextlib
 from contextlib import asynccontextmanager
 import logging
 import logging.config
 
 from fastapi import FastAPI
+from sqlalchemy.exc import DBAPIError
 
 from anime_rest_api import __version__
+from anime_rest_api.api.admission import AdmissionControlMiddleware
+from anime_rest_api.api.health import HEALTH_PROBE
+from anime_rest_api.api.idempotency import IdempotencyMiddleware
 from anime_rest_api.api.log import LogConfig
+from anime_rest_api.api.loop_monitor import LOOP_MONITOR
+from anime_rest_api.api.loop_monitor import TaskRouteMiddleware
+from anime_rest_api.api.profiling import ProfilingMiddleware
+from anime_rest_api.api.rate_limit import RateLimitDependency
+from anime_rest_api.api.rate_limit import check_rate_limits
+from anime_rest_api.api.routers import ADMIN_ROUTER
+from anime_rest_api.api.routers import BATCH_ROUTER
+from anime_rest_api.api.routers import EPISODE_ROUTER
+from anime_rest_api.api.routers import HEALTH_ROUTER
+from anime_rest_api.api.routers import JOB_ROUTER
+from anime_rest_api.api.routers import METRICS_ROUTER
+from anime_rest_api.api.routers import PROFILING_ROUTER
+from anime_rest_api.api.routers import REVIEW_ROUTER
 from anime_rest_api.api.routers import SESSION_ROUTER
 from anime_rest_api.api.routers import SHOW_ROUTER
 from anime_rest_api.api.routers import USER_ROUTER
+from anime_rest_api.api.routers import WATCHLIST_ROUTER
+from anime_rest_api.api.timeouts import CancelOnDisconnectMiddleware
+from anime_rest_api.api.timeouts import StatementTimeoutDependency
+from anime_rest_api.api.timeouts import query_canceled_handler
+from anime_rest_api.config import env_flag
 from anime_rest_api.db import setup_db
 from anime_rest_api.db.connection import Db
+from anime_rest_api.db.invalidation import INVALIDATION_BUS
+from anime_rest_api.db.invalidation import asyncpg_dsn
+from anime_rest_api.db.popularity import TRENDING
+from anime_rest_api.db.show_stats import SHOW_STATS
+from anime_rest_api.db.warmup import WARM_UP
+from anime_rest_api.tracing import EXPORTER
+from anime_rest_api.tracing import TracingMiddleware
 
 
 @asynccontextmanager
@@ -22,7 +53,55 @@ async def lifespan(_app: FastAPI) -> AsyncGenerator[None]:
     )
     async with Db.instance().engine.begin() as conn:
         await setup_db(conn)
+    background = []
+    if env_flag("WARMUP", default=True):
+        # serves right away, readiness waits for the warm-up to finish
+        background.append(
+            asyncio.create_task(WARM_UP.run(Db.instance().engine), name="warm-up"),
+        )
+    else:
+        WARM_UP.done.set()
+    background.append(
+        asyncio.create_task(
+            HEALTH_PROBE.run(asyncpg_dsn(Db.instance().engine.url)),
+            name="health-probe",
+        ),
+    )
+    if env_flag("CACHE_INVALIDATION", default=True):
+        background.append(
+            asyncio.create_task(
+                INVALIDATION_BUS.listen(asyncpg_dsn(Db.instance().engine.url)),
+                name="cache-invalidation-listener",
+            ),
+        )
+    if env_flag("LOOP_MONITOR", default=True):
+        background.append(
+            asyncio.create_task(LOOP_MONITOR.run(), name="event-loop-monitor"),
+        )
+    if env_flag("TRENDING", default=True):
+        background.append(
+            asyncio.create_task(
+                TRENDING.run(Db.instance().engine),
+                name="trending-shows",
+            ),
+        )
+    if env_flag("SHOW_STATS", default=True):
+        background.append(
+            asyncio.create_task(
+                SHOW_STATS.run(Db.instance().engine),
+                name="show-stats",
+            ),
+        )
+    if EXPORTER is not None:
+        background.append(
+            asyncio.create_task(EXPORTER.run(), name="span-exporter"),
+        )
     yield
+    for task in background:
+        task.cancel()
+    for task in background:
+        with contextlib.suppress(asyncio.CancelledError):
+            await task
 
 
 def create_app() -> FastAPI:
@@ -34,8 +113,44 @@ def create_app() -> FastAPI:
         # disable redoc
         redoc_url=None,
         lifespan=lifespan,
+        # rate limits run before the routes touch the database, on every route
+        # so a policy can be set for any of them
+        dependencies=[RateLimitDependency]
+        if env_flag("RATE_LIMITING", default=True)
+        else None,
     )
-    app.include_router(SHOW_ROUTER)
-    app.include_router(USER_ROUTER)
-    app.include_router(SESSION_ROUTER)
+    # every router using the database gets a statement timeout for its routes
+    for router in (
+        SHOW_ROUTER,
+        REVIEW_ROUTER,
+        EPISODE_ROUTER,
+        WATCHLIST_ROUTER,
+        USER_ROUTER,
+        SESSION_ROUTER,
+        JOB_ROUTER,
+    ):
+        app.include_router(router, dependencies=[StatementTimeoutDependency])
+    app.include_router(METRICS_ROUTER)
+    app.include_router(HEALTH_ROUTER)
+    app.include_router(ADMIN_ROUTER)
+    # its calls get the statement timeout of their own routes
+    app.include_router(BATCH_ROUTER)
+    app.add_exception_handler(DBAPIError, query_canceled_handler)
+    if env_flag("LOOP_MONITOR", default=True):
+        app.add_middleware(TaskRouteMiddleware)
+    # off by default, so a worker not being profiled doesn't pay anything for it
+    if env_flag("PROFILING"):
+        app.include_router(PROFILING_ROUTER)
+        app.add_middleware(ProfilingMiddleware)
+    if env_flag("ADMISSION_CONTROL", default=True):
+        app.add_middleware(AdmissionControlMiddleware)
+    if env_flag("IDEMPOTENCY", default=True):
+        # replays don't take an admission slot, they never reach the database
+        app.add_middleware(IdempotencyMiddleware)
+    # outermost, so requests still waiting for admission are cancelled as well
+    app.add_middleware(CancelOnDisconnectMiddleware)
+    if EXPORTER is not None:
+        # the root span covers the admission wait and cancellation as well
+        app.add_middleware(TracingMiddleware)
+    check_rate_limits(app.routes)
     return app
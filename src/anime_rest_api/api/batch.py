@@ -0,0 +1,194 @@
+"""Run the calls of `POST /batch` in-process through the application's router.
+
+Calls skip the middleware, the batch request itself already went through it, but
+each takes an admission slot of its own route class. They run with the
+`Authorization` of the batch. Its user is resolved once and shared
+by every call. Consecutive reads run concurrently, up to a limit, while a write
+waits for the calls before it and runs alone, so a batch reads its own writes.
+"""
+
+import asyncio
+from collections.abc import Sequence
+from contextlib import AsyncExitStack
+import json
+import logging
+import math
+import os
+from urllib.parse import unquote
+from urllib.parse import urlsplit
+
+from fastapi import HTTPException
+from fastapi import Request
+from starlette.middleware.exceptions import ExceptionMiddleware
+from starlette.types import Message
+from starlette.types import Scope
+
+from anime_rest_api.tracing import span
+
+from .admission import REJECTED_BODY
+from .admission import admission_slot
+from .common_query import SHARED_USER_STATE
+from .common_query import jwt_user_from_token
+from .models.batch import BatchOperation
+
+LOG = logging.getLogger(f"anime-api.{__name__}")
+
+BATCH_CONCURRENCY = int(os.getenv("ANIME_API_BATCH_CONCURRENCY", "4"))
+"""Reads of a batch running at once, each can hold a pooled connection."""
+_FORWARDED_HEADERS = frozenset({b"authorization", b"host", b"user-agent"})
+_READ_METHODS = frozenset({"GET"})
+# scope entries of the batch route that the router sets again for each call
+_ROUTE_SCOPE_KEYS = frozenset({"route", "endpoint", "path_params"})
+
+__all__ = ["BATCH_CONCURRENCY", "render_result", "run_batch"]
+
+
+def render_result(status: int, headers: dict[str, str], body: bytes) -> bytes:
+    """Render the response of a call as JSON, embedding JSON bodies as they are.
+
+    >>> render_result(200, {"content-type": "application/json"}, b'{"a":1}')
+    b'{"status":200,"headers":{"content-type":"application/json"},"body":{"a":1}}'
+    >>> render_result(204, {}, b"")
+    b'{"status":204,"headers":{},"body":null}'
+    """
+    if not body:
+        rendered = b"null"
+    elif headers.get("content-type", "").startswith("application/json"):
+        rendered = body
+    else:
+        rendered = json.dumps(body.decode(errors="replace")).encode()
+    return b'{"status":%d,"headers":%s,"body":%s}' % (
+        status,
+        json.dumps(headers, separators=(",", ":")).encode(),
+        rendered,
+    )
+
+
+def _call_scope(parent: Scope, operation: BatchOperation) -> Scope:
+    parts = urlsplit(operation.path)
+    headers = [
+        (name, value) for name, value in parent["headers"] if name in _FORWARDED_HEADERS
+    ]
+    if operation.body is not None:
+        headers.append((b"content-type", b"application/json"))
+    scope = {
+        key: value
+        for key, value in parent.items()
+        # dependency exit stacks too, a call's session closes when the call ends
+        if key not in _ROUTE_SCOPE_KEYS and not key.startswith("fastapi_")
+    }
+    scope.update(
+        method=operation.method,
+        path=unquote(parts.path),
+        raw_path=parts.path.encode(),
+        query_string=parts.query.encode(),
+        headers=headers,
+        # each call gets its own state, starting from the batch's
+        state=dict(parent.get("state", {})),
+    )
+    return scope
+
+
+async def _dispatch(request: Request, operation: BatchOperation) -> bytes:
+    """Run one call through the router, returning its rendered response."""
+    scope = _call_scope(request.scope, operation)
+    body = b"" if operation.body is None else json.dumps(operation.body).encode()
+    body_sent = False
+    start: Message = {}
+    chunks: list[bytes] = []
+
+    async def receive() -> Message:
+        nonlocal body_sent
+        if body_sent:
+            # a call can't outlive the batch, so it never sees a disconnect
+            await asyncio.Event().wait()
+        body_sent = True
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    async def send(message: Message) -> None:
+        if message["type"] == "http.response.start":
+            start.update(message)
+        elif message["type"] == "http.response.body":
+            chunks.append(message.get("body", b""))
+
+    # the parts of the application's middleware that routes rely on
+    router = ExceptionMiddleware(
+        request.app.router,
+        handlers=request.app.exception_handlers,
+    )
+    with span("batch.call", method=operation.method, path=scope["path"]):
+        try:
+            async with (
+                admission_slot(
+                    request.scope,
+                    operation.method,
+                    scope["path"],
+                ) as retry_after,
+                AsyncExitStack() as stack,
+            ):
+                if retry_after is not None:
+                    return render_result(
+                        503,
+                        {
+                            "content-type": "application/json",
+                            "retry-after": str(max(1, math.ceil(retry_after))),
+                        },
+                        REJECTED_BODY,
+                    )
+                scope["fastapi_middleware_astack"] = stack
+                await router(scope, receive, send)
+        except Exception:
+            LOG.exception("Batched %s %s failed", operation.method, operation.path)
+            return render_result(500, {}, b"Internal Server Error")
+    headers = {
+        name.decode("latin-1"): value.decode("latin-1")
+        for name, value in start.get("headers", [])
+        if name != b"content-length"
+    }
+    return render_result(start.get("status", 500), headers, b"".join(chunks))
+
+
+async def run_batch(
+    request: Request,
+    operations: Sequence[BatchOperation],
+    *,
+    concurrency: int = BATCH_CONCURRENCY,
+) -> bytes:
+    """Run the calls of a batch, returning the `BatchResponse` body.
+
+    Args:
+        request (Request): The `POST /batch` request, calls are run with its
+            application and `Authorization`.
+        operations (Sequence[BatchOperation]): Calls to run.
+        concurrency (int, optional): Reads running at once. Defaults to
+            `ANIME_API_BATCH_CONCURRENCY`, or 4.
+
+    Returns:
+        bytes: JSON body with the response of every call, in order.
+    """
+    scheme, _, token = request.headers.get("authorization", "").partition(" ")
+    if scheme.lower() == "bearer":
+        try:
+            user = jwt_user_from_token(token)
+        except HTTPException:
+            # every call needing a user answers 401 on its own
+            pass
+        else:
+            setattr(request.state, SHARED_USER_STATE, user)
+    limiter = asyncio.Semaphore(concurrency)
+    results = [b""] * len(operations)
+
+    async def run(index: int, operation: BatchOperation) -> None:
+        async with limiter:
+            results[index] = await _dispatch(request, operation)
+
+    reads: list[asyncio.Task] = []
+    for index, operation in enumerate(operations):
+        if operation.method in _READ_METHODS:
+            reads.append(asyncio.create_task(run(index, operation)))
+            continue
+        await asyncio.gather(*reads)
+        reads.clear()
+        await run(index, operation)
+    await asyncio.gather(*reads)
+    return b'{"responses":[' + b",".join(results) + b"]}"
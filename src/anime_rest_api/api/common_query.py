@@ -1,18 +1,28 @@
+from collections.abc import Callable
+from collections.abc import Collection
 from typing import Annotated
+from typing import Literal
 
 from fastapi import Depends
 from fastapi import HTTPException
 from fastapi import Query
+from fastapi import Request
 from fastapi import status
 from fastapi.security import HTTPAuthorizationCredentials
 from fastapi.security import HTTPBearer
 import jose
+from pydantic import BaseModel
 
 from anime_rest_api.api.models.sessions import JwtUser
 from anime_rest_api.api.models.sessions import decode_access_token
+from anime_rest_api.db.crud.count_operations import CountMode
+from anime_rest_api.tracing import span
 
 security = HTTPBearer()
 
+SHARED_USER_STATE = "jwt_user"
+"""Request state holding a user already resolved from the request's token."""
+
 
 def limit_and_offset_query(
     limit: int = Query(default=10, ge=1, le=100),
@@ -22,7 +32,86 @@ def limit_and_offset_query(
     return limit, offset
 
 
+def include_total_query(
+    include_total: Literal["exact", "estimate"] | None = Query(
+        None,
+        description=(
+            "Also return the total number of entries. `estimate` reads planner "
+            "statistics, `exact` runs a briefly cached count."
+        ),
+    ),
+) -> CountMode | None:
+    """Opt-in query for the total count of a paginated listing."""
+    return include_total
+
+
+def fields_query(
+    model: type[BaseModel],
+    *,
+    exclude: Collection[str] = (),
+) -> Callable[[str | None], tuple[str, ...] | None]:
+    """Build a `fields` query dependency validated against the fields of model.
+
+    Args:
+        model (type[BaseModel]): Response model the fields are picked from.
+        exclude (Collection[str], optional): Fields of model that can't be
+            requested. Defaults to ().
+
+    Returns:
+        Callable[[str | None], tuple[str, ...] | None]: Dependency returning the
+            requested field names in order, or None when all fields are wanted.
+    """
+    allowed = [name for name in model.model_fields if name not in exclude]
+
+    def dependency(
+        fields: str | None = Query(
+            None,
+            description=f"Comma separated subset of: {', '.join(allowed)}.",
+        ),
+    ) -> tuple[str, ...] | None:
+        if fields is None:
+            return None
+        # dict keeps the order of the request while dropping repeats
+        requested = tuple(
+            dict.fromkeys(name.strip() for name in fields.split(",") if name.strip()),
+        )
+        unknown = [name for name in requested if name not in allowed]
+        if unknown or not requested:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail=f"Unknown fields {unknown}, choose from {allowed}",
+            )
+        return requested
+
+    return dependency
+
+
+def jwt_user_from_token(token: str) -> JwtUser:
+    """Resolve the user of a bearer access token.
+
+    Raises:
+        HTTPException: 401 when the token is invalid or expired.
+    """
+    with span("requesting_user_header"):
+        try:
+            contents = decode_access_token(token)
+        except jose.JWTError as e:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Unauthorized",
+            ) from e
+    return JwtUser(
+        user_id=int(contents.user_id),
+        username=contents.user.username,
+        email=contents.user.email,
+        role=contents.role,
+        iat=contents.issued_at,
+        exp=contents.expires_at,
+    )
+
+
 async def requesting_user_header(
+    request: Request,
     user_credentials: Annotated[HTTPAuthorizationCredentials, Depends(security)],
 ) -> JwtUser:
     """Requesting user header."""
@@ -31,19 +120,20 @@ async def requesting_user_header(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Invalid authentication schema",
         )
+    # the calls of `POST /batch` share the user resolved once for the batch
+    shared = getattr(request.state, SHARED_USER_STATE, None)
+    if shared is not None:
+        return shared
+    return jwt_user_from_token(user_credentials.credentials)
+
 
-    try:
-        contents = decode_access_token(user_credentials.credentials)
-    except jose.JWTError as e:
+async def requesting_admin_header(
+    user: Annotated[JwtUser, Depends(requesting_user_header)],
+) -> JwtUser:
+    """Requesting user header, only accepting users with the `admin` role."""
+    if user.role != "admin":
         raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Unauthorized",
-        ) from e
-    return JwtUser(
-        user_id=int(contents.user_id),
-        username=contents.user.username,
-        email=contents.user.email,
-        role=contents.role,
-        iat=contents.issued_at,
-        exp=contents.expires_at,
-    )
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin role required",
+        )
+    return user
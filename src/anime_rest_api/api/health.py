@@ -0,0 +1,216 @@
+"""Liveness and readiness of a worker.
+
+Readiness is never checked while answering a probe. A background task pings the
+database on its own connection, outside the pool, at a fixed interval and caches
+the result, so probing as often as the orchestrator likes costs one dictionary read
+and never takes a connection from the requests.
+"""
+
+import asyncio
+from collections.abc import Iterable
+from datetime import UTC
+from datetime import datetime
+import logging
+import os
+import time
+
+import asyncpg  # type: ignore[import-untyped]
+from pydantic import BaseModel
+from pydantic import computed_field
+from sqlalchemy import MetaData
+from sqlalchemy.pool import Pool
+
+from anime_rest_api.db import AUTH_METADATA
+from anime_rest_api.db import CONTENT_METADATA
+
+LOG = logging.getLogger(f"anime-api.{__name__}")
+
+__all__ = [
+    "HEALTH_PROBE",
+    "HealthProbe",
+    "PoolStatus",
+    "Readiness",
+    "SchemaStatus",
+    "pool_status",
+]
+
+
+class PoolStatus(BaseModel):
+    """Connections of the pool, counted without checking one out."""
+
+    size: int
+    """Connections the pool keeps open."""
+    checked_out: int
+    """Connections used by requests right now."""
+    overflow: int
+    """Connections opened past size, negative while the pool isn't full yet."""
+    capacity: int
+    """Most connections the pool hands out at once."""
+
+    @computed_field  # type: ignore[prop-decorator]
+    @property
+    def saturation(self) -> float:
+        """Share of the capacity checked out."""
+        return self.checked_out / self.capacity if self.capacity else 0.0
+
+
+class SchemaStatus(BaseModel):
+    """Tables of our models compared with the tables in the database."""
+
+    expected_tables: int
+    missing_tables: list[str]
+
+    @computed_field  # type: ignore[prop-decorator]
+    @property
+    def up_to_date(self) -> bool:
+        """Whether every table of our models exists."""
+        return not self.missing_tables
+
+
+class Readiness(BaseModel):
+    """Whether a worker should get traffic, and why."""
+
+    ready: bool
+    warmed_up: bool
+    """Whether the warm-up of the worker finished."""
+    database: bool
+    """Whether the latest ping succeeded, and is recent enough."""
+    checked_at: datetime | None
+    """When the database was last pinged, None before the first ping."""
+    ping_ms: float | None
+    error: str | None
+    pool: PoolStatus
+    schema_state: SchemaStatus | None
+    """None until the database answered once."""
+
+
+def pool_status(pool: Pool) -> PoolStatus:
+    """Count the connections of pool, as `QueuePool` reports them."""
+    size = getattr(pool, "size", lambda: 0)()
+    max_overflow = getattr(pool, "_max_overflow", 0)
+    return PoolStatus(
+        size=size,
+        checked_out=getattr(pool, "checkedout", lambda: 0)(),
+        overflow=getattr(pool, "overflow", lambda: 0)(),
+        # a negative max overflow means the pool is unbounded
+        capacity=size + max(max_overflow, 0),
+    )
+
+
+class HealthProbe:
+    """Database health, refreshed in the background on a dedicated connection."""
+
+    def __init__(
+        self,
+        *,
+        interval: float = 5.0,
+        stale_after: float | None = None,
+        metadata: Iterable[MetaData] = (CONTENT_METADATA, AUTH_METADATA),
+    ) -> None:
+        """Initialize a probe, started by awaiting `run`.
+
+        Args:
+            interval (float, optional): Seconds between pings, and the timeout of
+                each. Defaults to 5.
+            stale_after (float | None, optional): Seconds after which the latest
+                ping no longer counts. Defaults to None, three intervals.
+            metadata (Iterable[MetaData], optional): Models whose tables have to
+                exist. Defaults to the content and auth models.
+        """
+        self.interval = interval
+        self.stale_after = stale_after if stale_after is not None else 3 * interval
+        self.expected_tables = sorted(
+            table.fullname for meta in metadata for table in meta.tables.values()
+        )
+        self.checked_at: datetime | None = None
+        self.ping_ms: float | None = None
+        self.error: str | None = None
+        self.schema_state: SchemaStatus | None = None
+        self._checked_monotonic: float | None = None
+
+    async def run(self, dsn: str) -> None:
+        """Ping the database at dsn every interval until cancelled.
+
+        Args:
+            dsn (str): asyncpg connection string, see `asyncpg_dsn`.
+        """
+        conn: asyncpg.Connection | None = None
+        try:
+            while True:
+                try:
+                    if conn is None or conn.is_closed():
+                        conn = await asyncpg.connect(dsn, timeout=self.interval)
+                    await self.check(conn)
+                except (OSError, TimeoutError, asyncpg.PostgresError) as e:
+                    self._record_failure(e)
+                    if conn is not None:
+                        conn.terminate()
+                        conn = None
+                await asyncio.sleep(self.interval)
+        finally:
+            if conn is not None:
+                conn.terminate()
+
+    async def check(self, conn: asyncpg.Connection) -> None:
+        """Ping the database on conn and compare its tables with our models."""
+        started = time.perf_counter()
+        await conn.fetchval("SELECT 1", timeout=self.interval)
+        ping_ms = (time.perf_counter() - started) * 1000
+        existing = await conn.fetch(
+            "SELECT schemaname || '.' || tablename AS name FROM pg_catalog.pg_tables"
+            " WHERE schemaname = ANY($1::text[])",
+            sorted({name.partition(".")[0] for name in self.expected_tables}),
+            timeout=self.interval,
+        )
+        existing_names = {row["name"] for row in existing}
+        self.schema_state = SchemaStatus(
+            expected_tables=len(self.expected_tables),
+            missing_tables=[
+                name for name in self.expected_tables if name not in existing_names
+            ],
+        )
+        self.ping_ms = ping_ms
+        self.error = None
+        self._checked(time.monotonic())
+
+    def _record_failure(self, error: BaseException) -> None:
+        if self.error is None:
+            LOG.warning("Database health check failed: %r", error)
+        self.ping_ms = None
+        self.error = repr(error)
+        self._checked(time.monotonic())
+
+    def _checked(self, monotonic: float) -> None:
+        self.checked_at = datetime.now(tz=UTC)
+        self._checked_monotonic = monotonic
+
+    def report(self, pool: Pool, *, warmed_up: bool) -> Readiness:
+        """Readiness from the latest ping, without touching the database.
+
+        Args:
+            pool (Pool): Pool of the engine requests use, for its saturation.
+            warmed_up (bool): Whether the warm-up of the worker finished.
+        """
+        error = self.error
+        if self._checked_monotonic is None:
+            error = "Database not checked yet"
+        elif time.monotonic() - self._checked_monotonic > self.stale_after:
+            error = error or "Latest database check is stale"
+        database = error is None
+        schema_ok = self.schema_state is not None and self.schema_state.up_to_date
+        return Readiness(
+            ready=warmed_up and database and schema_ok,
+            warmed_up=warmed_up,
+            database=database,
+            checked_at=self.checked_at,
+            ping_ms=self.ping_ms,
+            error=error,
+            pool=pool_status(pool),
+            schema_state=self.schema_state,
+        )
+
+
+HEALTH_PROBE = HealthProbe(
+    interval=float(os.getenv("ANIME_API_HEALTH_INTERVAL", "5")),
+)
+"""Database health of this worker, refreshed from the app lifespan."""
@@ -0,0 +1,256 @@
+"""Idempotency keys, so clients can safely retry `POST` and `PATCH` requests.
+
+The first response to a request with an `Idempotency-Key` header is stored for a
+while, and a retry with the same key is answered with it without running the route
+again. A retry arriving while the first request still runs waits for its response
+instead of racing it. Keys are scoped to the method, path and `Authorization`
+header, and a key reused with a different body is rejected with `422`.
+
+Responses are stored in memory, so a retry only replays when it reaches the worker
+that answered the first request.
+"""
+
+import asyncio
+import hashlib
+from http import HTTPStatus
+import logging
+import os
+from typing import NamedTuple
+
+from starlette.types import ASGIApp
+from starlette.types import Message
+from starlette.types import Receive
+from starlette.types import Scope
+from starlette.types import Send
+
+from anime_rest_api.db.cache import TtlCache
+
+from .metrics import REGISTRY
+from .metrics import Counter
+
+LOG = logging.getLogger(f"anime-api.{__name__}")
+
+IDEMPOTENCY_KEY_HEADER = b"idempotency-key"
+REPLAYED_HEADER = b"idempotent-replayed"
+MAX_KEY_LENGTH = 255
+_METHODS = frozenset({"POST", "PATCH"})
+
+__all__ = [
+    "IDEMPOTENCY_KEY_HEADER",
+    "MAX_KEY_LENGTH",
+    "REPLAYED_HEADER",
+    "IdempotencyMiddleware",
+    "StoredResponse",
+]
+
+IDEMPOTENT_REQUESTS = REGISTRY.register(
+    Counter(
+        "anime_api_idempotent_requests_total",
+        "Requests with an Idempotency-Key that didn't run their route.",
+        ("outcome",),
+    ),
+)
+
+type _ScopeKey = tuple[str, str, str, str]
+
+
+class StoredResponse(NamedTuple):
+    """Response to the first request with an idempotency key."""
+
+    fingerprint: bytes
+    """Hash of the request body it answered."""
+    status: int
+    headers: list[tuple[bytes, bytes]]
+    body: bytes
+
+
+def _sha256(*parts: bytes) -> bytes:
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(len(part).to_bytes(8, "big"))
+        digest.update(part)
+    return digest.digest()
+
+
+async def _send_json(send: Send, status: int, body: bytes) -> None:
+    await send(
+        {
+            "type": "http.response.start",
+            "status": status,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+            ],
+        },
+    )
+    await send({"type": "http.response.body", "body": body})
+
+
+class IdempotencyMiddleware:
+    """ASGI middleware answering repeated idempotency keys with the stored response."""
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        *,
+        ttl: float | None = None,
+        max_size: int | None = None,
+        max_body: int | None = None,
+    ) -> None:
+        """Wrap app, reading limits not given from `ANIME_API_IDEMPOTENCY_*`.
+
+        Args:
+            app (ASGIApp): Application to wrap.
+            ttl (float | None, optional): Seconds a response is replayed for.
+                Defaults to `ANIME_API_IDEMPOTENCY_TTL`, or 3600.
+            max_size (int | None, optional): Responses stored, the oldest is
+                dropped first. Defaults to `ANIME_API_IDEMPOTENCY_MAX_KEYS`, or 10000.
+            max_body (int | None, optional): Largest response body stored in bytes,
+                larger responses aren't replayed. Defaults to 65536.
+        """
+        self.app = app
+        self.responses: TtlCache[_ScopeKey, StoredResponse] = TtlCache(
+            ttl=ttl or float(os.getenv("ANIME_API_IDEMPOTENCY_TTL", "3600")),
+            max_size=max_size
+            or int(os.getenv("ANIME_API_IDEMPOTENCY_MAX_KEYS", "10000")),
+        )
+        self.max_body = max_body or 65536
+        self._in_flight: dict[_ScopeKey, asyncio.Event] = {}
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """Run, replay or reject a request with an idempotency key."""
+        if scope["type"] != "http" or scope["method"] not in _METHODS:
+            await self.app(scope, receive, send)
+            return
+        headers = dict(scope["headers"])
+        idempotency_key = headers.get(IDEMPOTENCY_KEY_HEADER)
+        if idempotency_key is None:
+            await self.app(scope, receive, send)
+            return
+        if not idempotency_key or len(idempotency_key) > MAX_KEY_LENGTH:
+            await _send_json(
+                send,
+                400,
+                b'{"detail":"Idempotency-Key must be 1 to 255 characters"}',
+            )
+            return
+        body = await self._read_body(receive)
+        if body is None:
+            # the client went away before sending the whole request
+            return
+        key: _ScopeKey = (
+            scope["method"],
+            scope["path"],
+            idempotency_key.decode("latin-1"),
+            # tokens aren't kept around, only their hash
+            _sha256(headers.get(b"authorization", b"")).hex(),
+        )
+        fingerprint = _sha256(headers.get(b"content-type", b""), body)
+        waited = False
+        while (stored := self.responses.get(key)) is None:
+            in_flight = self._in_flight.get(key)
+            if in_flight is None:
+                break
+            waited = True
+            await in_flight.wait()
+        if stored is not None:
+            await self._replay(stored, fingerprint, send, waited=waited)
+            return
+        done = self._in_flight[key] = asyncio.Event()
+        try:
+            response = await self._run(scope, body, receive, send, fingerprint)
+            if response is not None:
+                self.responses.set(key, response)
+        finally:
+            # waiters replay the stored response, or run themselves when none was
+            del self._in_flight[key]
+            done.set()
+
+    @staticmethod
+    async def _read_body(receive: Receive) -> bytes | None:
+        chunks = []
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                return None
+            chunks.append(message.get("body", b""))
+            if not message.get("more_body", False):
+                return b"".join(chunks)
+
+    async def _replay(
+        self,
+        stored: StoredResponse,
+        fingerprint: bytes,
+        send: Send,
+        *,
+        waited: bool,
+    ) -> None:
+        if stored.fingerprint != fingerprint:
+            IDEMPOTENT_REQUESTS.inc("mismatch")
+            await _send_json(
+                send,
+                422,
+                b'{"detail":"Idempotency-Key was already used for another request"}',
+            )
+            return
+        IDEMPOTENT_REQUESTS.inc("waited" if waited else "replayed")
+        await send(
+            {
+                "type": "http.response.start",
+                "status": stored.status,
+                "headers": [*stored.headers, (REPLAYED_HEADER, b"true")],
+            },
+        )
+        await send({"type": "http.response.body", "body": stored.body})
+
+    async def _run(
+        self,
+        scope: Scope,
+        body: bytes,
+        receive: Receive,
+        send: Send,
+        fingerprint: bytes,
+    ) -> StoredResponse | None:
+        """Run the request, returning its response when it should be replayed."""
+        body_sent = False
+        start: Message = {}
+        chunks: list[bytes] = []
+        size = 0
+        complete = False
+
+        async def replay_receive() -> Message:
+            nonlocal body_sent
+            if body_sent:
+                return await receive()
+            body_sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+
+        async def capture_send(message: Message) -> None:
+            nonlocal size, complete
+            if message["type"] == "http.response.start":
+                start.update(message)
+            elif message["type"] == "http.response.body":
+                chunk = message.get("body", b"")
+                size += len(chunk)
+                if size <= self.max_body:
+                    chunks.append(chunk)
+                complete = not message.get("more_body", False)
+            await send(message)
+
+        await self.app(scope, replay_receive, capture_send)
+        status = start.get("status", 500)
+        # server errors and rate limits are worth retrying for real
+        if (
+            not complete
+            or size > self.max_body
+            or status >= HTTPStatus.INTERNAL_SERVER_ERROR
+            or status == HTTPStatus.TOO_MANY_REQUESTS
+        ):
+            LOG.debug("Not storing the %d response of an idempotent request", status)
+            return None
+        return StoredResponse(
+            fingerprint,
+            status,
+            list(start.get("headers", [])),
+            b"".join(chunks),
+        )
@@ -0,0 +1,221 @@
+"""Measure event loop lag and catch callbacks blocking the loop.
+
+A heartbeat coroutine sleeps at a fixed interval and records how late it wakes up,
+the lag percentiles are exported on `/metrics`. A watchdog thread notices when the
+heartbeat stops beating, and records the stack of the loop thread and the route of
+the running request while the loop is still blocked.
+"""
+
+import asyncio
+from collections import deque
+from datetime import UTC
+from datetime import datetime
+import logging
+import os
+import sys
+import threading
+import time
+
+from pydantic import BaseModel
+from starlette.routing import Match
+from starlette.types import ASGIApp
+from starlette.types import Receive
+from starlette.types import Scope
+from starlette.types import Send
+
+from .metrics import REGISTRY
+from .metrics import Counter
+from .metrics import Gauge
+
+LOG = logging.getLogger(f"anime-api.{__name__}")
+
+LAG_QUANTILES = (0.5, 0.9, 0.99, 1.0)
+UNMATCHED = "unmatched"
+"""Route of requests to paths no route matches, which aren't named by their path."""
+
+__all__ = [
+    "LAG_QUANTILES",
+    "LOOP_MONITOR",
+    "BlockedCall",
+    "LoopMonitor",
+    "UNMATCHED",
+    "TaskRouteMiddleware",
+    "quantile",
+]
+
+BLOCKED = REGISTRY.register(
+    Counter(
+        "anime_api_event_loop_blocked_total",
+        "Times the event loop was blocked longer than the threshold.",
+        ("route",),
+    ),
+)
+
+
+def quantile(values: list[float], q: float) -> float:
+    """Nearest rank quantile of already sorted values, 0 when empty.
+
+    >>> quantile([1.0, 2.0, 3.0, 4.0], 0.5)
+    2.0
+    >>> quantile([1.0, 2.0, 3.0, 4.0], 1.0)
+    4.0
+    """
+    if not values:
+        return 0.0
+    return values[max(0, round(q * len(values)) - 1)]
+
+
+class BlockedCall(BaseModel):
+    """A callback that kept the event loop from running anything else."""
+
+    route: str | None
+    """Name of the task blocking the loop, `METHOD /route/{param}` for requests."""
+    blocked_ms: float
+    """How long the loop was blocked, updated once it runs again."""
+    stack: list[str]
+    """Frames of the loop thread while blocked, outermost first."""
+    detected_at: datetime
+
+
+class TaskRouteMiddleware:
+    """Name the task of each request after its route, for the watchdog to read.
+
+    Named by the path template of the route, like `/shows/{show_id}`, since the
+    name is a label of `anime_api_event_loop_blocked_total`.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        """Wrap app."""
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """Name the current task, then run the request."""
+        if scope["type"] == "http":
+            task = asyncio.current_task()
+            if task is not None:
+                task.set_name(f"{scope['method']} {self._route(scope)}")
+        await self.app(scope, receive, send)
+
+    @staticmethod
+    def _route(scope: Scope) -> str:
+        # routing only runs inside the app, so match the routes ahead of it
+        for route in getattr(scope.get("app"), "routes", ()):
+            if route.matches(scope)[0] != Match.NONE:
+                return getattr(route, "path", UNMATCHED)
+        return UNMATCHED
+
+
+class LoopMonitor:
+    """Heartbeat of an event loop and the watchdog thread checking it."""
+
+    def __init__(
+        self,
+        *,
+        interval: float = 0.1,
+        block_threshold: float = 0.25,
+        window: int = 600,
+        max_reports: int = 50,
+    ) -> None:
+        """Initialize a monitor, started by awaiting `run` on the loop to watch.
+
+        Args:
+            interval (float, optional): Seconds between heartbeats. Defaults to 0.1.
+            block_threshold (float, optional): Seconds without a heartbeat, past the
+                interval, before the loop is reported as blocked. Defaults to 0.25.
+            window (int, optional): Latest lag measurements the percentiles are
+                computed from. Defaults to 600, one minute of heartbeats.
+            max_reports (int, optional): Latest blocked calls kept. Defaults to 50.
+        """
+        self.interval = interval
+        self.block_threshold = block_threshold
+        self.lags: deque[float] = deque(maxlen=window)
+        self.blocked_calls: deque[BlockedCall] = deque(maxlen=max_reports)
+        self._last_beat = time.monotonic()
+        self._pending: BlockedCall | None = None
+        self._stopped = threading.Event()
+        REGISTRY.register(
+            Gauge(
+                "anime_api_event_loop_lag_seconds",
+                "Lag of the event loop heartbeat over the latest measurements.",
+                ("quantile",),
+                collect=self._collect,
+            ),
+        )
+
+    def _collect(self) -> dict[tuple[str, ...], float]:
+        lags = sorted(self.lags)
+        return {(str(q),): quantile(lags, q) for q in LAG_QUANTILES}
+
+    async def run(self) -> None:
+        """Beat until cancelled, watching the loop from a thread meanwhile."""
+        loop = asyncio.get_running_loop()
+        watchdog = threading.Thread(
+            target=self._watch,
+            args=(loop, threading.get_ident()),
+            name="event-loop-watchdog",
+            daemon=True,
+        )
+        self._stopped.clear()
+        self._last_beat = time.monotonic()
+        watchdog.start()
+        try:
+            while True:
+                expected = loop.time() + self.interval
+                await asyncio.sleep(self.interval)
+                lag = max(0.0, loop.time() - expected)
+                self.lags.append(lag)
+                self._last_beat = time.monotonic()
+                pending, self._pending = self._pending, None
+                if pending is not None:
+                    pending.blocked_ms = (lag + self.interval) * 1000
+                    LOG.warning(
+                        "Event loop blocked %.0fms by %s at:\n%s",
+                        pending.blocked_ms,
+                        pending.route or "<no request>",
+                        "\n".join(pending.stack[-15:]),
+                    )
+        finally:
+            self._stopped.set()
+            await asyncio.to_thread(watchdog.join)
+
+    def _watch(self, loop: asyncio.AbstractEventLoop, thread_id: int) -> None:
+        """Watchdog thread, report the loop once per missed heartbeat."""
+        reported_beat = None
+        limit = self.interval + self.block_threshold
+        while not self._stopped.wait(self.block_threshold / 2):
+            last_beat = self._last_beat
+            blocked_for = time.monotonic() - last_beat
+            if blocked_for < limit or reported_beat == last_beat:
+                continue
+            reported_beat = last_beat
+            self._report(loop, thread_id, blocked_for)
+
+    def _report(
+        self,
+        loop: asyncio.AbstractEventLoop,
+        thread_id: int,
+        blocked_for: float,
+    ) -> None:
+        frame = sys._current_frames().get(thread_id)  # noqa: SLF001
+        stack = []
+        while frame is not None:
+            code = frame.f_code
+            stack.append(f"{code.co_filename}:{frame.f_lineno} in {code.co_qualname}")
+            frame = frame.f_back
+        task = asyncio.current_task(loop)
+        route = task.get_name() if task is not None else None
+        report = BlockedCall(
+            route=route,
+            blocked_ms=blocked_for * 1000,
+            stack=stack[::-1],
+            detected_at=datetime.now(tz=UTC),
+        )
+        self.blocked_calls.append(report)
+        self._pending = report
+        BLOCKED.inc(route or "background")
+
+
+LOOP_MONITOR = LoopMonitor(
+    block_threshold=float(os.getenv("ANIME_API_LOOP_BLOCK_MS", "250")) / 1000,
+)
+"""Monitor of the worker's loop, run from the app lifespan."""
@@ -0,0 +1,107 @@
+"""Minimal in-process metrics rendered in the Prometheus text format."""
+
+from collections.abc import Callable
+from collections.abc import Iterator
+
+__all__ = ["REGISTRY", "Counter", "Gauge", "MetricsRegistry"]
+
+type Labels = tuple[str, ...]
+
+
+def _format_labels(names: Labels, values: Labels) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(
+        f'{name}="{value}"' for name, value in zip(names, values, strict=True)
+    )
+    return f"{{{pairs}}}"
+
+
+class Counter:
+    """Monotonically increasing value, one per combination of label values.
+
+    >>> rejected = Counter("rejected_total", "Rejected requests.", ("route_class",))
+    >>> rejected.inc("read")
+    >>> rejected.value("read")
+    1.0
+    """
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Labels = ()) -> None:
+        """Initialize a metric without any samples."""
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._values: dict[Labels, float] = {}
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        """Add amount to the sample with the given label values."""
+        self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def value(self, *labels: str) -> float:
+        """Current value of the sample with the given label values."""
+        return self._values.get(labels, 0.0)
+
+    def samples(self) -> Iterator[tuple[str, float]]:
+        """Yield the rendered name with labels and the value of every sample."""
+        for labels, value in self._values.items():
+            yield f"{self.name}{_format_labels(self.labelnames, labels)}", value
+
+
+class Gauge(Counter):
+    """Value that can go up and down, or is read from a callback on scrape."""
+
+    kind = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Labels = (),
+        *,
+        collect: Callable[[], dict[Labels, float]] | None = None,
+    ) -> None:
+        """Initialize a gauge, optionally reading every sample from collect."""
+        super().__init__(name, documentation, labelnames)
+        self._collect = collect
+
+    def set(self, *labels: str, value: float) -> None:
+        """Set the sample with the given label values."""
+        self._values[labels] = value
+
+    def samples(self) -> Iterator[tuple[str, float]]:
+        """Yield the rendered name with labels and the value of every sample."""
+        if self._collect is not None:
+            self._values = self._collect()
+        yield from super().samples()
+
+
+class MetricsRegistry:
+    """Collection of metrics rendered together for a scrape."""
+
+    def __init__(self) -> None:
+        """Initialize an empty registry."""
+        self._metrics: dict[str, Counter] = {}
+
+    def register[M: Counter](self, metric: M) -> M:
+        """Add metric to the registry and return it.
+
+        A metric with the same name is replaced, as happens when an app and its
+        middleware are built again.
+        """
+        self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        """Render every metric in the Prometheus text exposition format."""
+        lines = []
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(f"{sample} {value}" for sample, value in metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+"""Process wide registry served from `/metrics`."""
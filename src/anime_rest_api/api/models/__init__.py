@@ -1,13 +1,43 @@
+from .batch import BatchRequest
+from .batch import BatchResponse
+from .episodes import EpisodeIngestRequest
+from .episodes import EpisodeIngestResponse
+from .episodes import EpisodeResponseList
+from .jobs import JobResponseList
+from .reviews import ReviewResponseList
 from .sessions import LoginRequest
 from .sessions import LoginResponse
 from .sessions import RefreshRequest
 from .sessions import RefreshResponse
+from .shows import PartialShowResponseList
 from .shows import ShowResponseList
+from .shows import SimilarShowResponseList
+from .shows import TrendingShowResponseList
+from .users import PartialUserResponseList
 from .users import UserResponseList
+from .watchlist import WatchlistRemoveRequest
+from .watchlist import WatchlistResponseList
+from .watchlist import WatchlistUpsertRequest
+from .watchlist import WatchlistWriteResponse
 
 __all__ = [
+    "BatchRequest",
+    "BatchResponse",
+    "EpisodeIngestRequest",
+    "EpisodeIngestResponse",
+    "EpisodeResponseList",
+    "JobResponseList",
+    "PartialShowResponseList",
+    "PartialUserResponseList",
+    "ReviewResponseList",
     "ShowResponseList",
+    "SimilarShowResponseList",
+    "TrendingShowResponseList",
     "UserResponseList",
+    "WatchlistRemoveRequest",
+    "WatchlistResponseList",
+    "WatchlistUpsertRequest",
+    "WatchlistWriteResponse",
     "LoginRequest",
     "LoginResponse",
     "RefreshRequest",
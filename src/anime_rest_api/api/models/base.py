@@ -1,5 +1,8 @@
+from typing import Annotated
+
 from pydantic import BaseModel
 from pydantic import ConfigDict
+from pydantic import Field
 from pydantic.alias_generators import to_camel
 
 
@@ -7,3 +10,17 @@ class Base(BaseModel):
     """Basic model for inheriting Pydantic Config for all API models."""
 
     model_config = ConfigDict(alias_generator=to_camel, populate_by_name=True)
+
+
+class ResponseListBase(Base):
+    """Pagination fields shared by every listing response."""
+
+    has_more: bool
+    total: Annotated[
+        int | None,
+        Field(
+            None,
+            description="Total entries, only set when requested with `include_total`.",
+        ),
+    ]
+    """Total entries, only set when requested with `include_total`."""
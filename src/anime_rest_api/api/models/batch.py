@@ -0,0 +1,63 @@
+from typing import Annotated
+from typing import Any
+from typing import Literal
+from urllib.parse import unquote
+from urllib.parse import urlsplit
+
+from pydantic import Field
+from pydantic import field_validator
+
+from .base import Base
+
+MAX_BATCH_SIZE = 20
+"""Most calls in one `POST /batch`."""
+
+
+class BatchOperation(Base):
+    """One API call of a batch."""
+
+    method: Literal["GET", "POST", "PUT", "PATCH", "DELETE"] = "GET"
+    path: Annotated[
+        str,
+        Field(
+            ...,
+            pattern=r"^/",
+            max_length=2048,
+            description="Path with its query string, e.g. `/shows?limit=5`.",
+        ),
+    ]
+    body: Any = None
+    """JSON body of the call."""
+
+    @field_validator("path")
+    @classmethod
+    def not_nested(cls, path: str) -> str:
+        """Reject batches inside of a batch."""
+        if unquote(urlsplit(path).path).rstrip("/") == "/batch":
+            msg = "Batches can't be nested"
+            raise ValueError(msg)
+        return path
+
+
+class BatchRequest(Base):
+    """API calls to run in one request."""
+
+    requests: Annotated[
+        list[BatchOperation],
+        Field(..., min_length=1, max_length=MAX_BATCH_SIZE),
+    ]
+
+
+class BatchResult(Base):
+    """Response of one API call of a batch."""
+
+    status: int
+    headers: dict[str, str]
+    body: Any = None
+    """JSON body of the response, or its text when it isn't JSON."""
+
+
+class BatchResponse(Base):
+    """Responses of the calls of a batch, in the order they were given."""
+
+    responses: list[BatchResult]
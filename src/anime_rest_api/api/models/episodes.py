@@ -0,0 +1,36 @@
+from typing import Annotated
+
+from pydantic import Field
+from pydantic import computed_field
+
+from anime_rest_api.db.crud.episode_operations import MAX_BATCH
+from anime_rest_api.db.models.content import EpisodeRead
+from anime_rest_api.db.models.content import EpisodeWrite
+
+from .base import Base
+from .base import ResponseListBase
+
+
+class EpisodeResponseList(ResponseListBase):
+    """Response model for a page of the episodes of a show, by number."""
+
+    episodes: list[EpisodeRead]
+    next_after: int | None = None
+    """Value of `after` for the next page, None on the last page."""
+
+    @computed_field
+    def count(self) -> int:
+        """Count the number of episodes in the list."""
+        return len(self.episodes)
+
+
+class EpisodeIngestRequest(Base):
+    """Episodes to add to a show, replacing the episodes with the same number."""
+
+    episodes: Annotated[list[EpisodeWrite], Field(..., max_length=MAX_BATCH)]
+
+
+class EpisodeIngestResponse(Base):
+    """Number of episodes an ingest wrote."""
+
+    written: int
@@ -0,0 +1,18 @@
+from pydantic import computed_field
+
+from anime_rest_api.db.models.content import JobRead
+
+from .base import ResponseListBase
+
+
+class JobResponseList(ResponseListBase):
+    """Response model for a page of jobs, newest first."""
+
+    jobs: list[JobRead]
+    next_before: int | None = None
+    """Value of `before` for the next page, None on the last page."""
+
+    @computed_field
+    def count(self) -> int:
+        """Count the number of jobs in the list."""
+        return len(self.jobs)
@@ -0,0 +1,18 @@
+from pydantic import computed_field
+
+from anime_rest_api.db.models.content import ReviewRead
+
+from .base import ResponseListBase
+
+
+class ReviewResponseList(ResponseListBase):
+    """Response model for a page of the reviews of a show, newest first."""
+
+    reviews: list[ReviewRead]
+    next_before: int | None = None
+    """Value of `before` for the next page, None on the last page."""
+
+    @computed_field
+    def count(self) -> int:
+        """Count the number of reviews in the list."""
+        return len(self.reviews)
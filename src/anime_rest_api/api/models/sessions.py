@@ -6,11 +6,12 @@ import os
 from typing import Annotated
 from typing import Literal
 
-from jose import jwt
 from jose.exceptions import JWTError
 from pydantic import Field
 
+from anime_rest_api.api.tokens import build_codec
 from anime_rest_api.db.models.auth.user import UserRead
+from anime_rest_api.tracing import span
 
 from .base import Base
 
@@ -23,6 +24,16 @@ _ACCESS_TOKEN_LIFETIME = timedelta(minutes=15)
 _REFRESH_TOKEN_LIFETIME = timedelta(days=14)
 _JWT_ISS = "anime_api"
 _JWT_AUD = "anime_api"  # want this to be the API URL
+_ACCESS_REQUIRED = frozenset({"aud", "iat", "exp", "sub", "iss"})
+_REFRESH_REQUIRED = _ACCESS_REQUIRED | {"at_hash"}
+
+TOKEN_CODEC = build_codec(
+    os.getenv("ANIME_API_JWT_BACKEND", "hmac"),
+    _SECRET,
+    audience=_JWT_AUD,
+    issuer=_JWT_ISS,
+)
+"""Codec of our tokens, its key is loaded once at import."""
 
 __all__ = [
     "LoginRequest",
@@ -131,22 +142,15 @@ def refresh_token_claims_from_user(user: UserRead) -> "ApiRefreshJwt":
 
 def build_access_token(claims: dict) -> str:
     """Build a JWT access token for the user."""
-    return jwt.encode(
-        claims,
-        _SECRET,
-        algorithm="HS256",
-    )
+    with span("jwt.encode", scope="access"):
+        return TOKEN_CODEC.encode(claims)
 
 
 def build_refresh_token(claims: dict, access_token: str) -> str:
     """Build a refresh token for the user."""
     LOG.debug("Building refresh token with claims %s", claims)
-    return jwt.encode(
-        claims,
-        _SECRET,
-        algorithm="HS256",
-        access_token=access_token,
-    )
+    with span("jwt.encode", scope="refresh"):
+        return TOKEN_CODEC.encode(claims, access_token=access_token)
 
 
 def decode_access_token(tok: str, *, verify_exp: bool = True) -> "ApiAccessJwt":
@@ -166,32 +170,25 @@ def decode_access_token(tok: str, *, verify_exp: bool = True) -> "ApiAccessJwt":
     Returns:
         ApiAccessJwt: Decoded token
     """
-    return ApiAccessJwt.model_validate(
-        jwt.decode(
-            tok,
-            _SECRET,
-            algorithms=["HS256"],
-            audience=_JWT_AUD,
-            issuer=_JWT_ISS,
-            options={
-                "require_aud": True,
-                "require_iat": True,
-                "require_exp": verify_exp,
-                "require_sub": True,
-                "require_iss": True,
-            },
-        ),
-    )
+    required = _ACCESS_REQUIRED if verify_exp else _ACCESS_REQUIRED - {"exp"}
+    with span("jwt.decode", scope="access"):
+        return ApiAccessJwt.model_validate(
+            TOKEN_CODEC.decode(tok, required=required),
+        )
 
 
-def decode_refresh_token(refresh_tok: str) -> "ApiRefreshJwt":
+def decode_refresh_token(
+    refresh_tok: str,
+    access_tok: str | None = None,
+) -> "ApiRefreshJwt":
     """Parse a JWT refresh token for the user.
 
     If the token does not match our specifications, it will raise an error.
 
     Args:
         refresh_tok (str): JWT token to decode
-        access_tok (str): JWT access token to use for verification
+        access_tok (str | None): JWT access token the `at_hash` of the refresh
+            token must match. Defaults to None, only requiring an `at_hash`.
 
     Raises:
         jwt.exceptions.ExpiredSignatureError: If the token is expired.
@@ -201,23 +198,14 @@ def decode_refresh_token(refresh_tok: str) -> "ApiRefreshJwt":
     Returns:
         ApiRefreshJwt: Decoded token
     """
-    return ApiRefreshJwt.model_validate(
-        jwt.decode(
-            refresh_tok,
-            _SECRET,
-            algorithms=["HS256"],
-            audience=_JWT_AUD,
-            issuer=_JWT_ISS,
-            options={
-                "require_aud": True,
-                "require_iat": True,
-                "require_exp": True,
-                "require_sub": True,
-                "require_iss": True,
-                "require_at_hash": True,
-            },
-        ),
-    )
+    with span("jwt.decode", scope="refresh"):
+        return ApiRefreshJwt.model_validate(
+            TOKEN_CODEC.decode(
+                refresh_tok,
+                required=_REFRESH_REQUIRED,
+                access_token=access_tok,
+            ),
+        )
 
 
 class JwtUserDetails(Base):
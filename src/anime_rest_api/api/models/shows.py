@@ -1,8 +1,14 @@
+import datetime as dt
+from typing import Any
+
 from pydantic import computed_field
 
 from anime_rest_api.db.models.content import ShowRead
+from anime_rest_api.db.models.content import SimilarShowRead
+from anime_rest_api.db.models.content import TrendingShowRead
 
 from .base import Base
+from .base import ResponseListBase
 
 
 class ShowBaseIo(Base):
@@ -13,11 +19,48 @@ class ShowResponseBase(Base):
     """Response model for a show."""
 
 
-class ShowResponseList(Base):
+class ShowResponseList(ResponseListBase):
     """Response model for a list of shows."""
 
     shows: list[ShowRead]
-    has_more: bool
+
+    @computed_field
+    def count(self) -> int:
+        """Count the number of shows in the list."""
+        return len(self.shows)
+
+
+class PartialShowResponseList(ResponseListBase):
+    """Response model for a list of shows narrowed down with `fields`.
+
+    Each show only holds the requested subset of `ShowRead` fields.
+    """
+
+    shows: list[dict[str, Any]]
+
+    @computed_field
+    def count(self) -> int:
+        """Count the number of shows in the list."""
+        return len(self.shows)
+
+
+class SimilarShowResponseList(Base):
+    """Response model for the shows most similar to a show."""
+
+    shows: list[SimilarShowRead]
+
+    @computed_field
+    def count(self) -> int:
+        """Count the number of shows in the list."""
+        return len(self.shows)
+
+
+class TrendingShowResponseList(Base):
+    """Response model for the most trending shows."""
+
+    shows: list[TrendingShowRead]
+    refreshed_at: dt.datetime | None
+    """When the leaderboard was last read, None before the first read."""
 
     @computed_field
     def count(self) -> int:
@@ -1,17 +1,32 @@
+from typing import Any
+
 from pydantic import computed_field
 
 from anime_rest_api.db.models.auth import UserPublic
 
-from .base import Base
+from .base import ResponseListBase
 
 
-class UserResponseList(Base):
+class UserResponseList(ResponseListBase):
     """Response model for a list of shows."""
 
     users: list[UserPublic]
-    has_more: bool
 
     @computed_field
     def count(self) -> int:
         """Count the number of shows in the list."""
         return len(self.users)
+
+
+class PartialUserResponseList(ResponseListBase):
+    """Response model for a list of users narrowed down with `fields`.
+
+    Each user only holds the requested subset of `UserPublic` fields.
+    """
+
+    users: list[dict[str, Any]]
+
+    @computed_field
+    def count(self) -> int:
+        """Count the number of users in the list."""
+        return len(self.users)
@@ -0,0 +1,42 @@
+from typing import Annotated
+
+from pydantic import Field
+from pydantic import computed_field
+
+from anime_rest_api.db.crud.watchlist_operations import MAX_BATCH
+from anime_rest_api.db.models.content import WatchlistEntryRead
+from anime_rest_api.db.models.content import WatchlistEntryWrite
+
+from .base import Base
+from .base import ResponseListBase
+
+
+class WatchlistResponseList(ResponseListBase):
+    """Response model for a page of a watchlist, most recently updated first."""
+
+    entries: list[WatchlistEntryRead]
+    next_after: str | None = None
+    """Value of `after` for the next page, None on the last page."""
+
+    @computed_field
+    def count(self) -> int:
+        """Count the number of entries in the list."""
+        return len(self.entries)
+
+
+class WatchlistUpsertRequest(Base):
+    """Entries to add to a watchlist, replacing the entries of the same shows."""
+
+    entries: Annotated[list[WatchlistEntryWrite], Field(..., max_length=MAX_BATCH)]
+
+
+class WatchlistRemoveRequest(Base):
+    """Shows to remove from a watchlist."""
+
+    show_ids: Annotated[list[int], Field(..., max_length=MAX_BATCH)]
+
+
+class WatchlistWriteResponse(Base):
+    """Number of entries a bulk write changed."""
+
+    changed: int
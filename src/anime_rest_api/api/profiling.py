@@ -0,0 +1,204 @@
+"""On demand CPU and memory profiles of a running worker.
+
+Nothing here runs until an admin asks for a profile, and the routes and middleware
+are only added to the app when `ANIME_API_PROFILING` is enabled. A profile covers
+the next seconds or the next requests of this worker, one profile at a time.
+"""
+
+import asyncio
+import cProfile
+from collections import Counter
+import io
+import pstats
+import signal
+import tracemalloc
+from types import FrameType
+from typing import Literal
+
+from starlette.types import ASGIApp
+from starlette.types import Receive
+from starlette.types import Scope
+from starlette.types import Send
+
+type CpuProfileFormat = Literal["pstats", "collapsed"]
+
+__all__ = [
+    "PROFILE_LOCK",
+    "CpuProfileFormat",
+    "ProfilingMiddleware",
+    "RequestWindow",
+    "StackSampler",
+    "profile_cpu",
+    "profile_memory",
+]
+
+PROFILE_LOCK = asyncio.Lock()
+"""Held while a profile runs, profilers of the same kind can't nest."""
+
+
+class RequestWindow:
+    """Countdown of the requests a profile still has to cover."""
+
+    current: "RequestWindow | None" = None
+    """Window being counted by `ProfilingMiddleware`, None when not profiling."""
+
+    def __init__(self, requests: int) -> None:
+        """Initialize a window of requests not started yet."""
+        self.remaining = requests
+        self.done = asyncio.Event()
+
+    def finished_one(self) -> None:
+        """Count a finished request."""
+        self.remaining -= 1
+        if self.remaining <= 0:
+            self.done.set()
+
+
+class ProfilingMiddleware:
+    """Count the requests finished while a request window is open."""
+
+    def __init__(self, app: ASGIApp) -> None:
+        """Wrap app."""
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """Run a request, counting it when a window is open."""
+        window = RequestWindow.current
+        if window is None or scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            window.finished_one()
+
+
+async def _wait_window(seconds: float, requests: int | None) -> None:
+    """Wait seconds, or up to seconds for the next requests to finish."""
+    if requests is None:
+        await asyncio.sleep(seconds)
+        return
+    window = RequestWindow.current = RequestWindow(requests)
+    try:
+        await asyncio.wait_for(window.done.wait(), timeout=seconds)
+    except TimeoutError:
+        pass
+    finally:
+        RequestWindow.current = None
+
+
+class StackSampler:
+    """Sample the stack of the main thread every interval of CPU time.
+
+    Samples are taken by a `SIGPROF` handler running in the sampled thread itself,
+    a sampling thread would only ever get the GIL while the loop waits on `select`.
+    """
+
+    def __init__(self, interval: float = 0.005) -> None:
+        """Initialize a sampler, started with `start`."""
+        self.interval = interval
+        self.stacks: Counter[str] = Counter()
+        self._previous_handler = signal.getsignal(signal.SIGPROF)
+
+    def start(self) -> None:
+        """Start sampling, only possible from the main thread."""
+        self._previous_handler = signal.signal(signal.SIGPROF, self._sample)
+        signal.setitimer(signal.ITIMER_PROF, self.interval, self.interval)
+
+    def stop(self) -> None:
+        """Stop sampling and restore the previous `SIGPROF` handler."""
+        signal.setitimer(signal.ITIMER_PROF, 0)
+        signal.signal(signal.SIGPROF, self._previous_handler)
+
+    def _sample(self, _signum: int, frame: FrameType | None) -> None:
+        names = []
+        while frame is not None:
+            module = frame.f_globals.get("__name__", "?")
+            names.append(f"{module}:{frame.f_code.co_qualname}")
+            frame = frame.f_back
+        if names:
+            self.stacks[";".join(reversed(names))] += 1
+
+    def collapsed(self) -> str:
+        """Samples in the collapsed stack format of flame graph tools."""
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.items())
+
+
+async def profile_cpu(
+    seconds: float,
+    *,
+    requests: int | None = None,
+    output: CpuProfileFormat = "pstats",
+    limit: int = 50,
+) -> str:
+    """Profile the event loop thread of this worker.
+
+    Args:
+        seconds (float): Length of the profile, or the longest wait for requests.
+        requests (int | None, optional): Stop once this many requests finished.
+            Defaults to None, profiling for seconds.
+        output (CpuProfileFormat, optional): `pstats` runs cProfile and returns its
+            statistics, `collapsed` samples stacks and returns them collapsed,
+            which needs the loop to run in the main thread.
+            Defaults to `pstats`.
+        limit (int, optional): Functions listed in the `pstats` output.
+            Defaults to 50.
+
+    Returns:
+        str: The profile as text.
+    """
+    if output == "collapsed":
+        sampler = StackSampler()
+        sampler.start()
+        try:
+            await _wait_window(seconds, requests)
+        finally:
+            sampler.stop()
+        return sampler.collapsed()
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        await _wait_window(seconds, requests)
+    finally:
+        profiler.disable()
+    stream = io.StringIO()
+    pstats.Stats(profiler, stream=stream).sort_stats("cumulative").print_stats(limit)
+    return stream.getvalue()
+
+
+async def profile_memory(
+    seconds: float,
+    *,
+    requests: int | None = None,
+    limit: int = 25,
+) -> str:
+    """Diff two tracemalloc snapshots taken around a window of this worker.
+
+    Args:
+        seconds (float): Length of the window, or the longest wait for requests.
+        requests (int | None, optional): Stop once this many requests finished.
+            Defaults to None, waiting for seconds.
+        limit (int, optional): Source lines listed. Defaults to 25.
+
+    Returns:
+        str: Source lines that allocated the most memory during the window.
+    """
+    started_tracing = not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start()
+    try:
+        before = tracemalloc.take_snapshot()
+        await _wait_window(seconds, requests)
+        after = tracemalloc.take_snapshot()
+    finally:
+        if started_tracing:
+            tracemalloc.stop()
+    # leave out what taking the snapshots allocated
+    ignore = [
+        tracemalloc.Filter(inclusive=False, filename_pattern=tracemalloc.__file__),
+    ]
+    diffs = after.filter_traces(ignore).compare_to(
+        before.filter_traces(ignore),
+        "lineno",
+    )
+    return "".join(f"{diff}\n" for diff in diffs[:limit])
@@ -0,0 +1,269 @@
+"""Rate limiting with token buckets keyed by client IP, username and user id.
+
+Each route has a list of policies, every policy takes a token from the bucket of
+its key, and the request is answered with `429` and `Retry-After` when one of them
+is empty. Limits are checked by a dependency that runs before anything queries the
+database, so rejected login attempts never check out a pooled connection.
+
+Buckets live in a `RateLimitBackend`. The default keeps them in memory, sharded
+so each shard evicts its least recently used buckets on its own. A store shared by
+every worker, like Redis, can implement the same interface.
+"""
+
+from collections.abc import Callable
+from collections.abc import Iterable
+import logging
+import math
+import os
+import time
+from typing import Literal
+from typing import Protocol
+
+from fastapi import Depends
+from fastapi import HTTPException
+from fastapi import Request
+from fastapi import status
+from jose.exceptions import JWTError
+from pydantic import BaseModel
+from pydantic import Field
+from starlette.routing import BaseRoute
+
+from anime_rest_api.api.models.sessions import decode_access_token
+
+from .metrics import REGISTRY
+from .metrics import Counter
+
+LOG = logging.getLogger(f"anime-api.{__name__}")
+
+type KeyKind = Literal["ip", "username", "user"]
+
+__all__ = [
+    "RATE_LIMITS",
+    "RATE_LIMIT_BACKEND",
+    "InMemoryRateLimitBackend",
+    "KeyKind",
+    "RateLimitBackend",
+    "RateLimitDependency",
+    "RateLimitPolicy",
+    "check_rate_limits",
+    "parse_rate_limits",
+    "rate_limit",
+]
+
+LIMITED = REGISTRY.register(
+    Counter(
+        "anime_api_rate_limited_total",
+        "Requests rejected by a rate limit.",
+        ("route", "key"),
+    ),
+)
+
+
+class RateLimitPolicy(BaseModel):
+    """Bucket of limit tokens, refilled over period seconds."""
+
+    limit: int = Field(..., ge=1)
+    """Requests allowed in a burst, and over each period."""
+    period: float = Field(..., gt=0)
+    """Seconds to refill an empty bucket."""
+
+    @property
+    def rate(self) -> float:
+        """Tokens refilled per second."""
+        return self.limit / self.period
+
+    @classmethod
+    def parse(cls, value: str) -> "RateLimitPolicy":
+        """Parse a `limit/period_seconds` string.
+
+        >>> RateLimitPolicy.parse("5/60")
+        RateLimitPolicy(limit=5, period=60.0)
+        """
+        limit, period = value.split("/")
+        return cls(limit=int(limit), period=float(period))
+
+
+class RateLimitBackend(Protocol):
+    """Store of token buckets."""
+
+    async def take(self, key: str, policy: RateLimitPolicy) -> float | None:
+        """Take a token from the bucket of key.
+
+        Returns:
+            float | None: None when a token was taken, otherwise the seconds until
+                the bucket has one again.
+        """
+        ...
+
+
+class _Bucket:
+    __slots__ = ("tokens", "updated_at")
+
+    def __init__(self, tokens: float, updated_at: float) -> None:
+        self.tokens = tokens
+        self.updated_at = updated_at
+
+
+class InMemoryRateLimitBackend:
+    """Token buckets of this worker, in shards of bounded size."""
+
+    def __init__(
+        self,
+        *,
+        shards: int = 16,
+        max_keys_per_shard: int = 4096,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """Initialize empty shards.
+
+        Args:
+            shards (int, optional): Number of shards keys are spread over.
+                Defaults to 16.
+            max_keys_per_shard (int, optional): Buckets kept per shard, the least
+                recently used is dropped first. Defaults to 4096.
+            clock (Callable[[], float], optional): Source of the current time in
+                seconds. Defaults to `time.monotonic`.
+        """
+        self._shards: list[dict[str, _Bucket]] = [{} for _ in range(shards)]
+        self._max_keys = max_keys_per_shard
+        self._clock = clock
+
+    def __len__(self) -> int:
+        """Number of buckets held."""
+        return sum(len(shard) for shard in self._shards)
+
+    async def take(self, key: str, policy: RateLimitPolicy) -> float | None:
+        """Take a token from the bucket of key."""
+        shard = self._shards[hash(key) % len(self._shards)]
+        now = self._clock()
+        # re-inserting keeps each shard in least recently used order
+        bucket = shard.pop(key, None)
+        if bucket is None:
+            bucket = _Bucket(policy.limit, now)
+            if len(shard) >= self._max_keys:
+                del shard[next(iter(shard))]
+        shard[key] = bucket
+        tokens = min(
+            policy.limit,
+            bucket.tokens + (now - bucket.updated_at) * policy.rate,
+        )
+        bucket.updated_at = now
+        if tokens >= 1:
+            bucket.tokens = tokens - 1
+            return None
+        bucket.tokens = tokens
+        return (1 - tokens) / policy.rate
+
+
+def parse_rate_limits(value: str) -> dict[str, dict[KeyKind, RateLimitPolicy]]:
+    """Parse `METHOD /path=kind:limit/period,...` routes separated by `;`.
+
+    >>> parse_rate_limits("POST /login=ip:20/60,username:5/60")
+    {'POST /login': {'ip': RateLimitPolicy(limit=20, period=60.0), \
+'username': RateLimitPolicy(limit=5, period=60.0)}}
+    """
+    limits: dict[str, dict[KeyKind, RateLimitPolicy]] = {}
+    for route_limits in value.split(";"):
+        if not route_limits.strip():
+            continue
+        route, _, policies = route_limits.rpartition("=")
+        limits[route.strip()] = {}
+        for policy in policies.split(","):
+            kind, _, limit = policy.strip().partition(":")
+            if kind not in ("ip", "username", "user"):
+                msg = f"Unknown rate limit key {kind!r}"
+                raise ValueError(msg)
+            limits[route.strip()][kind] = RateLimitPolicy.parse(limit)  # type: ignore[index]
+    return limits
+
+
+RATE_LIMITS: dict[str, dict[KeyKind, RateLimitPolicy]] = {
+    # every attempt hashes the password with bcrypt in the database
+    "POST /login": {
+        "ip": RateLimitPolicy(limit=20, period=60),
+        "username": RateLimitPolicy(limit=5, period=60),
+    },
+    "POST /refresh": {"ip": RateLimitPolicy(limit=30, period=60)},
+    "POST /logout": {
+        "ip": RateLimitPolicy(limit=30, period=60),
+        "user": RateLimitPolicy(limit=10, period=60),
+    },
+    **parse_rate_limits(os.getenv("ANIME_API_RATE_LIMITS", "")),
+}
+"""Policies keyed by `METHOD /route/path`, routes without an entry aren't limited."""
+
+RATE_LIMIT_BACKEND: RateLimitBackend = InMemoryRateLimitBackend()
+"""Buckets checked by `rate_limit`."""
+
+
+async def _key_value(request: Request, kind: KeyKind) -> str | None:
+    """Value of the key kind of request, None when the request has none."""
+    if kind == "ip":
+        return request.client.host if request.client else None
+    if kind == "username":
+        try:
+            body = await request.json()
+        except ValueError:
+            return None
+        username = body.get("username") if isinstance(body, dict) else None
+        return username.lower() if isinstance(username, str) else None
+    scheme, _, token = request.headers.get("authorization", "").partition(" ")
+    if scheme.lower() != "bearer":
+        return None
+    try:
+        # invalid tokens are rejected by the route itself
+        return decode_access_token(token).user_id
+    except (JWTError, ValueError):
+        return None
+
+
+async def rate_limit(request: Request) -> None:
+    """Take a token for every policy of the requested route.
+
+    Raises:
+        HTTPException: 429 with `Retry-After` when a bucket is empty.
+    """
+    route = getattr(request.scope.get("route"), "path", request.url.path)
+    route_key = f"{request.method} {route}"
+    for kind, policy in RATE_LIMITS.get(route_key, {}).items():
+        value = await _key_value(request, kind)
+        if value is None:
+            continue
+        retry_after = await RATE_LIMIT_BACKEND.take(
+            f"{route_key}|{kind}:{value}",
+            policy,
+        )
+        if retry_after is not None:
+            LIMITED.inc(route_key, kind)
+            LOG.warning("Rate limited %s by %s %s", route_key, kind, value)
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many requests, retry later",
+                headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+            )
+
+
+RateLimitDependency = Depends(rate_limit)
+
+
+def check_rate_limits(routes: Iterable[BaseRoute]) -> list[str]:
+    """Log the routes of `RATE_LIMITS` none of `routes` answers.
+
+    Their policies are never checked, most likely the route is misspelled.
+
+    Args:
+        routes (Iterable[BaseRoute]): Routes of the application.
+
+    Returns:
+        list[str]: The `METHOD /route/path` keys without a route.
+    """
+    answered = {
+        f"{method} {path}"
+        for route in routes
+        if isinstance(path := getattr(route, "path", None), str)
+        for method in getattr(route, "methods", None) or ()
+    }
+    uncovered = sorted(set(RATE_LIMITS).difference(answered))
+    for route_key in uncovered:
+        LOG.warning("Rate limits of %s match no route, they are ignored", route_key)
+    return uncovered
@@ -0,0 +1,43 @@
+"""Helpers for returning pre-serialized JSON bodies from routes."""
+
+from collections.abc import Mapping
+from typing import Any
+
+from fastapi import Response
+from fastapi import status
+from pydantic import BaseModel
+from pydantic import TypeAdapter
+
+from anime_rest_api.tracing import span
+
+__all__ = ["json_response"]
+
+_ANY_ADAPTER: TypeAdapter[Any] = TypeAdapter(Any)
+
+
+def json_response(
+    content: BaseModel | Mapping[str, Any] | str | bytes,
+    status_code: int = status.HTTP_200_OK,
+) -> Response:
+    """Serialize content straight to JSON bytes and wrap them in a response.
+
+    Skips the validation FastAPI runs against the route `response_model`, so only
+    use it for content that was already validated or comes from the database.
+
+    Args:
+        content (BaseModel | Mapping[str, Any] | str | bytes): Body to send, models
+            are dumped by alias like FastAPI does, text is sent as is.
+        status_code (int, optional): HTTP status of the response. Defaults to 200.
+
+    Returns:
+        Response: Response with an `application/json` body.
+    """
+    body: str | bytes
+    with span("serialize_response"):
+        if isinstance(content, str | bytes):
+            body = content
+        elif isinstance(content, BaseModel):
+            body = content.model_dump_json(by_alias=True)
+        else:
+            body = _ANY_ADAPTER.dump_json(content)
+    return Response(body, status_code=status_code, media_type="application/json")
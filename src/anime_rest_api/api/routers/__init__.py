@@ -1,5 +1,27 @@
+from .admin_routes import ROUTER as ADMIN_ROUTER
+from .batch_routes import ROUTER as BATCH_ROUTER
+from .episode_routes import ROUTER as EPISODE_ROUTER
+from .health_routes import ROUTER as HEALTH_ROUTER
+from .job_routes import ROUTER as JOB_ROUTER
+from .metrics_routes import ROUTER as METRICS_ROUTER
+from .profiling_routes import ROUTER as PROFILING_ROUTER
+from .review_routes import ROUTER as REVIEW_ROUTER
 from .session_routes import ROUTER as SESSION_ROUTER
 from .shows_routes import ROUTER as SHOW_ROUTER
 from .user_routes import ROUTER as USER_ROUTER
+from .watchlist_routes import ROUTER as WATCHLIST_ROUTER
 
-__all__ = ["SHOW_ROUTER", "USER_ROUTER", "SESSION_ROUTER"]
+__all__ = [
+    "SHOW_ROUTER",
+    "USER_ROUTER",
+    "REVIEW_ROUTER",
+    "EPISODE_ROUTER",
+    "WATCHLIST_ROUTER",
+    "SESSION_ROUTER",
+    "METRICS_ROUTER",
+    "ADMIN_ROUTER",
+    "JOB_ROUTER",
+    "BATCH_ROUTER",
+    "PROFILING_ROUTER",
+    "HEALTH_ROUTER",
+]
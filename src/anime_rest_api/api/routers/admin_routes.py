@@ -0,0 +1,55 @@
+"""Routes for operators, only usable with the `admin` role."""
+
+from typing import Annotated
+
+from fastapi import APIRouter
+from fastapi import Depends
+from fastapi import Query
+from fastapi import status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from anime_rest_api.api.common_query import requesting_admin_header
+from anime_rest_api.api.dependencies import DbDependency
+from anime_rest_api.api.loop_monitor import LOOP_MONITOR
+from anime_rest_api.api.loop_monitor import BlockedCall
+from anime_rest_api.api.responses import json_response
+from anime_rest_api.db.instrumentation import SLOW_QUERY_LOG
+from anime_rest_api.db.instrumentation import SlowQueryStat
+from anime_rest_api.db.models.content import ShowStats
+from anime_rest_api.db.show_stats import SHOW_STATS
+from anime_rest_api.db.show_stats import refresh_view
+
+ROUTER = APIRouter(
+    prefix="/admin",
+    tags=["ops"],
+    dependencies=[Depends(requesting_admin_header)],
+)
+
+
+@ROUTER.get("/slow-queries", response_model=list[SlowQueryStat])
+async def read_slow_queries_route(limit: int = Query(20, ge=1, le=500)):
+    """Slowest statement fingerprints of this worker, most total time first."""
+    return SLOW_QUERY_LOG.top(limit)
+
+
+@ROUTER.delete("/slow-queries", status_code=status.HTTP_204_NO_CONTENT)
+async def reset_slow_queries_route():
+    """Forget the slow statements recorded by this worker."""
+    SLOW_QUERY_LOG.reset()
+
+
+@ROUTER.get("/blocked-calls", response_model=list[BlockedCall])
+async def read_blocked_calls_route():
+    """Latest callbacks that blocked the event loop of this worker, newest first."""
+    return list(reversed(LOOP_MONITOR.blocked_calls))
+
+
+@ROUTER.post("/show-stats/refresh", response_model=ShowStats)
+async def refresh_show_stats_route(session: Annotated[AsyncSession, DbDependency]):
+    """Refresh the show stats now, for example after a bulk import of shows.
+
+    This worker serves the new counts right away, the others at their next refresh.
+    """
+    await refresh_view(await session.connection())
+    await session.commit()
+    return json_response(await SHOW_STATS.load(await session.connection()))
@@ -0,0 +1,19 @@
+from fastapi import APIRouter
+from fastapi import Request
+
+from anime_rest_api.api.batch import run_batch
+from anime_rest_api.api.models import BatchRequest
+from anime_rest_api.api.models import BatchResponse
+from anime_rest_api.api.responses import json_response
+
+ROUTER = APIRouter(tags=["batch"])
+
+
+@ROUTER.post("/batch", response_model=BatchResponse)
+async def batch_route(batch: BatchRequest, request: Request):
+    """Run several API calls in one round trip, answering them in order.
+
+    Calls run with the `Authorization` of the batch. Consecutive reads run
+    concurrently, a write runs once the calls before it finished.
+    """
+    return json_response(await run_batch(request, batch.requests))
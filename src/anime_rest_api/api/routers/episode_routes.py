@@ -0,0 +1,73 @@
+"""Episodes of shows, listed by number and ingested in bulk."""
+
+from typing import Annotated
+
+from fastapi import APIRouter
+from fastapi import Depends
+from fastapi import HTTPException
+from fastapi import Query
+from fastapi import status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from anime_rest_api.api.common_query import requesting_admin_header
+from anime_rest_api.api.dependencies import DbDependency
+from anime_rest_api.api.models import EpisodeIngestRequest
+from anime_rest_api.api.models import EpisodeIngestResponse
+from anime_rest_api.api.models import EpisodeResponseList
+from anime_rest_api.api.models.sessions import JwtUser
+from anime_rest_api.db.crud.episode_operations import ingest_episodes
+from anime_rest_api.db.crud.episode_operations import list_episodes
+from anime_rest_api.db.crud.errors import EntryNotFoundError
+
+ROUTER = APIRouter(prefix="/shows/{show_id}/episodes", tags=["episodes"])
+
+
+def _not_found() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_404_NOT_FOUND,
+        detail="Show not found",
+    )
+
+
+@ROUTER.get("", response_model=EpisodeResponseList)
+async def read_episodes_route(
+    show_id: int,
+    limit: Annotated[int, Query(ge=1, le=100)] = 25,
+    after: Annotated[
+        int | None,
+        Query(description="`nextAfter` of the previous page."),
+    ] = None,
+    *,
+    session: Annotated[AsyncSession, DbDependency],
+):
+    """Get the episodes of a show, by number."""
+    try:
+        episodes = list(await list_episodes(session, show_id, limit + 1, after))
+    except EntryNotFoundError as e:
+        raise _not_found() from e
+    has_more = len(episodes) > limit
+    episodes = episodes[:limit]
+    return EpisodeResponseList(
+        episodes=episodes,  # type: ignore[arg-type]
+        has_more=has_more,
+        total=None,
+        next_after=episodes[-1].number if has_more else None,
+    )
+
+
+@ROUTER.put("", response_model=EpisodeIngestResponse)
+async def ingest_episodes_route(
+    show_id: int,
+    body: EpisodeIngestRequest,
+    session: Annotated[AsyncSession, DbDependency],
+    _admin: Annotated[JwtUser, Depends(requesting_admin_header)],
+) -> EpisodeIngestResponse:
+    """Add episodes to a show, replacing the episodes with the same number.
+
+    `written` counts the episodes written, unchanged episodes aren't.
+    """
+    try:
+        written = await ingest_episodes(session, show_id, body.episodes)
+    except EntryNotFoundError as e:
+        raise _not_found() from e
+    return EpisodeIngestResponse(written=written)
@@ -0,0 +1,34 @@
+"""Probes of the orchestrator, answered without querying the database."""
+
+from fastapi import APIRouter
+from fastapi import Response
+from fastapi import status
+
+from anime_rest_api.api.health import HEALTH_PROBE
+from anime_rest_api.api.health import Readiness
+from anime_rest_api.db.connection import Db
+from anime_rest_api.db.warmup import WARM_UP
+
+ROUTER = APIRouter(tags=["ops"])
+
+
+@ROUTER.get("/healthz")
+async def liveness_route() -> dict[str, str]:
+    """Answer as long as the worker's event loop runs."""
+    return {"status": "ok"}
+
+
+@ROUTER.get(
+    "/readyz",
+    response_model=Readiness,
+    responses={status.HTTP_503_SERVICE_UNAVAILABLE: {"model": Readiness}},
+)
+async def readiness_route(response: Response):
+    """Whether this worker should get traffic, from the latest background check."""
+    report = HEALTH_PROBE.report(
+        Db.instance().engine.pool,
+        warmed_up=WARM_UP.done.is_set(),
+    )
+    if not report.ready:
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    return report
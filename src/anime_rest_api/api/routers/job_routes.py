@@ -0,0 +1,101 @@
+"""Background jobs, queued here and run by `anime_rest_api.worker`."""
+
+from typing import Annotated
+
+from fastapi import APIRouter
+from fastapi import Depends
+from fastapi import HTTPException
+from fastapi import Query
+from fastapi import status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from anime_rest_api.api.common_query import requesting_admin_header
+from anime_rest_api.api.dependencies import DbDependency
+from anime_rest_api.api.models import JobResponseList
+from anime_rest_api.db.crud.errors import EntryNotFoundError
+from anime_rest_api.db.crud.job_operations import enqueue_job
+from anime_rest_api.db.crud.job_operations import get_job
+from anime_rest_api.db.crud.job_operations import list_jobs
+from anime_rest_api.db.models.content import JobCreate
+from anime_rest_api.db.models.content import JobProgress
+from anime_rest_api.db.models.content import JobRead
+from anime_rest_api.db.models.content import JobStatus
+from anime_rest_api.db.models.content import JobType
+
+ROUTER = APIRouter(
+    prefix="/jobs",
+    tags=["jobs"],
+    dependencies=[Depends(requesting_admin_header)],
+)
+
+
+def _not_found() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_404_NOT_FOUND,
+        detail="Job not found",
+    )
+
+
+@ROUTER.get("", response_model=JobResponseList)
+async def read_jobs_route(
+    *,
+    limit: Annotated[int, Query(ge=1, le=100)] = 20,
+    before: Annotated[
+        int | None,
+        Query(description="`nextBefore` of the previous page."),
+    ] = None,
+    status_filter: Annotated[JobStatus | None, Query(alias="status")] = None,
+    job_type: Annotated[JobType | None, Query(alias="jobType")] = None,
+    session: Annotated[AsyncSession, DbDependency],
+):
+    """Get jobs, newest first."""
+    jobs = list(
+        await list_jobs(
+            session,
+            limit + 1,
+            status=status_filter,
+            job_type=job_type,
+            before=before,
+        ),
+    )
+    has_more = len(jobs) > limit
+    jobs = jobs[:limit]
+    return JobResponseList(
+        jobs=jobs,  # type: ignore[arg-type]
+        has_more=has_more,
+        total=None,
+        next_before=jobs[-1].job_id if has_more else None,
+    )
+
+
+@ROUTER.post("", response_model=JobRead, status_code=status.HTTP_201_CREATED)
+async def create_job_route(
+    job_body: JobCreate,
+    session: Annotated[AsyncSession, DbDependency],
+):
+    """Queue a job, a worker runs it as soon as it has room for its type."""
+    return await enqueue_job(session, job_body)
+
+
+@ROUTER.get("/{job_id}", response_model=JobRead)
+async def read_job_route(
+    job_id: int,
+    session: Annotated[AsyncSession, DbDependency],
+):
+    """Get a job, with its result once it succeeded or its last error."""
+    try:
+        return await get_job(session, job_id)
+    except EntryNotFoundError as e:
+        raise _not_found() from e
+
+
+@ROUTER.get("/{job_id}/progress", response_model=JobProgress)
+async def read_job_progress_route(
+    job_id: int,
+    session: Annotated[AsyncSession, DbDependency],
+):
+    """Get only the status and progress of a job, for polling it."""
+    try:
+        return await get_job(session, job_id)
+    except EntryNotFoundError as e:
+        raise _not_found() from e
@@ -0,0 +1,17 @@
+"""Routes exposing runtime metrics of this worker."""
+
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from anime_rest_api.api.metrics import REGISTRY
+
+ROUTER = APIRouter(tags=["ops"])
+
+
+@ROUTER.get("/metrics", response_class=PlainTextResponse)
+async def metrics_route():
+    """Metrics of this worker in the Prometheus text format."""
+    return PlainTextResponse(
+        REGISTRY.render(),
+        media_type="text/plain; version=0.0.4",
+    )
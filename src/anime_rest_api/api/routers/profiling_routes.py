@@ -0,0 +1,74 @@
+"""Routes profiling this worker, only added when `ANIME_API_PROFILING` is set."""
+
+from typing import Annotated
+
+from fastapi import APIRouter
+from fastapi import Depends
+from fastapi import HTTPException
+from fastapi import Query
+from fastapi import status
+from fastapi.responses import PlainTextResponse
+
+from anime_rest_api.api.common_query import requesting_admin_header
+from anime_rest_api.api.profiling import PROFILE_LOCK
+from anime_rest_api.api.profiling import CpuProfileFormat
+from anime_rest_api.api.profiling import profile_cpu
+from anime_rest_api.api.profiling import profile_memory
+
+ROUTER = APIRouter(
+    prefix="/admin/profile",
+    tags=["ops"],
+    dependencies=[Depends(requesting_admin_header)],
+)
+
+
+def profile_window_query(
+    seconds: float = Query(
+        5,
+        gt=0,
+        le=60,
+        description="Length of the profile, or the longest wait for `requests`.",
+    ),
+    requests: int | None = Query(
+        None,
+        ge=1,
+        le=10_000,
+        description="Stop once this many other requests finished.",
+    ),
+) -> tuple[float, int | None]:
+    """Window covered by a profile."""
+    if PROFILE_LOCK.locked():
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="A profile is already running",
+        )
+    return seconds, requests
+
+
+@ROUTER.post("/cpu", response_class=PlainTextResponse)
+async def profile_cpu_route(
+    window: Annotated[tuple[float, int | None], Depends(profile_window_query)],
+    output: Annotated[
+        CpuProfileFormat,
+        Query(
+            description="`pstats` of cProfile or `collapsed` sampled stacks.",
+        ),
+    ] = "pstats",
+):
+    """Profile the CPU time of this worker over the requested window."""
+    seconds, requests = window
+    async with PROFILE_LOCK:
+        profile = await profile_cpu(seconds, requests=requests, output=output)
+    return PlainTextResponse(profile)
+
+
+@ROUTER.post("/memory", response_class=PlainTextResponse)
+async def profile_memory_route(
+    window: Annotated[tuple[float, int | None], Depends(profile_window_query)],
+    limit: int = Query(25, ge=1, le=500),
+):
+    """Source lines of this worker that allocated the most over the window."""
+    seconds, requests = window
+    async with PROFILE_LOCK:
+        profile = await profile_memory(seconds, requests=requests, limit=limit)
+    return PlainTextResponse(profile)
@@ -0,0 +1,173 @@
+"""Reviews of shows, and the ratings aggregated from them."""
+
+from typing import Annotated
+
+from fastapi import APIRouter
+from fastapi import Depends
+from fastapi import HTTPException
+from fastapi import Query
+from fastapi import status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from anime_rest_api.api.common_query import include_total_query
+from anime_rest_api.api.common_query import requesting_user_header
+from anime_rest_api.api.dependencies import DbDependency
+from anime_rest_api.api.models import ReviewResponseList
+from anime_rest_api.api.models.sessions import JwtUser
+from anime_rest_api.db.crud.count_operations import CountMode
+from anime_rest_api.db.crud.errors import EntryExistsError
+from anime_rest_api.db.crud.errors import EntryNotFoundError
+from anime_rest_api.db.crud.errors import InvalidPermissionsError
+from anime_rest_api.db.crud.review_operations import create_review
+from anime_rest_api.db.crud.review_operations import delete_review
+from anime_rest_api.db.crud.review_operations import get_review
+from anime_rest_api.db.crud.review_operations import get_show_rating
+from anime_rest_api.db.crud.review_operations import list_show_reviews
+from anime_rest_api.db.crud.review_operations import update_review
+from anime_rest_api.db.models.content import ReviewCreate
+from anime_rest_api.db.models.content import ReviewRead
+from anime_rest_api.db.models.content import ReviewUpdate
+from anime_rest_api.db.models.content import ShowRatingRead
+
+ROUTER = APIRouter(tags=["reviews"])
+_NOT_FOUND_DETAILS = {"shows": "Show not found", "reviews": "Review not found"}
+
+
+def _not_found(e: EntryNotFoundError) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_404_NOT_FOUND,
+        detail=_NOT_FOUND_DETAILS.get(e.table, "Not found"),
+    )
+
+
+def _forbidden() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_403_FORBIDDEN,
+        detail="Only the author can change a review",
+    )
+
+
+@ROUTER.get("/shows/{show_id}/reviews", response_model=ReviewResponseList)
+async def read_show_reviews_route(
+    *,
+    show_id: int,
+    limit: Annotated[int, Query(ge=1, le=100)] = 10,
+    before: Annotated[
+        int | None,
+        Query(description="`nextBefore` of the previous page."),
+    ] = None,
+    include_total: Annotated[CountMode | None, Depends(include_total_query)],
+    session: Annotated[AsyncSession, DbDependency],
+):
+    """Get the reviews of a show, newest first.
+
+    The total comes from the rating of the show, so it is exact in either mode.
+    """
+    reviews = list(await list_show_reviews(session, show_id, limit + 1, before))
+    has_more = len(reviews) > limit
+    reviews = reviews[:limit]
+    total = None
+    if include_total is not None:
+        try:
+            total = (await get_show_rating(session, show_id)).review_count
+        except EntryNotFoundError as e:
+            raise _not_found(e) from e
+    return ReviewResponseList(
+        reviews=reviews,  # type: ignore[arg-type]
+        has_more=has_more,
+        total=total,
+        next_before=reviews[-1].review_id if has_more else None,
+    )
+
+
+@ROUTER.get("/shows/{show_id}/rating", response_model=ShowRatingRead)
+async def read_show_rating_route(
+    show_id: int,
+    session: Annotated[AsyncSession, DbDependency],
+):
+    """Get the review count, average score and score histogram of a show."""
+    try:
+        return await get_show_rating(session, show_id)
+    except EntryNotFoundError as e:
+        raise _not_found(e) from e
+
+
+@ROUTER.post(
+    "/shows/{show_id}/reviews",
+    response_model=ReviewRead,
+    status_code=status.HTTP_201_CREATED,
+)
+async def create_review_route(
+    show_id: int,
+    review_body: ReviewCreate,
+    session: Annotated[AsyncSession, DbDependency],
+    requesting_user: Annotated[JwtUser, Depends(requesting_user_header)],
+) -> ReviewRead:
+    """Review a show as the requesting user, once per show."""
+    try:
+        return await create_review(
+            session,
+            show_id,
+            requesting_user.user_id,
+            review_body,
+        )
+    except EntryNotFoundError as e:
+        raise _not_found(e) from e
+    except EntryExistsError as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Show already reviewed, update the review instead",
+        ) from e
+
+
+@ROUTER.get("/reviews/{review_id}", response_model=ReviewRead)
+async def read_review_route(
+    review_id: int,
+    session: Annotated[AsyncSession, DbDependency],
+):
+    """Get a review by its ID."""
+    try:
+        return await get_review(session, review_id)
+    except EntryNotFoundError as e:
+        raise _not_found(e) from e
+
+
+@ROUTER.patch("/reviews/{review_id}", response_model=ReviewRead)
+async def update_review_route(
+    review_id: int,
+    review_body: ReviewUpdate,
+    session: Annotated[AsyncSession, DbDependency],
+    requesting_user: Annotated[JwtUser, Depends(requesting_user_header)],
+) -> ReviewRead:
+    """Update a review of the requesting user."""
+    try:
+        return await update_review(
+            session,
+            review_id,
+            review_body,
+            requesting_user.user_id,
+        )
+    except EntryNotFoundError as e:
+        raise _not_found(e) from e
+    except InvalidPermissionsError as e:
+        raise _forbidden() from e
+
+
+@ROUTER.delete("/reviews/{review_id}", response_model=ReviewRead)
+async def delete_review_route(
+    review_id: int,
+    session: Annotated[AsyncSession, DbDependency],
+    requesting_user: Annotated[JwtUser, Depends(requesting_user_header)],
+) -> ReviewRead:
+    """Delete a review of the requesting user, admins can delete any review."""
+    try:
+        return await delete_review(
+            session,
+            review_id,
+            requesting_user.user_id,
+            is_admin=requesting_user.role == "admin",
+        )
+    except EntryNotFoundError as e:
+        raise _not_found(e) from e
+    except InvalidPermissionsError as e:
+        raise _forbidden() from e
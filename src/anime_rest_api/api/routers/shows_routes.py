@@ -2,34 +2,101 @@ from typing import Annotated
 
 from fastapi import APIRouter
 from fastapi import Depends
+from fastapi import HTTPException
+from fastapi import Query
+from fastapi import status
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from anime_rest_api.api.common_query import fields_query
+from anime_rest_api.api.common_query import include_total_query
 from anime_rest_api.api.common_query import limit_and_offset_query
 from anime_rest_api.api.dependencies import DbDependency
+from anime_rest_api.api.models import PartialShowResponseList
 from anime_rest_api.api.models import ShowResponseList
+from anime_rest_api.api.models import SimilarShowResponseList
+from anime_rest_api.api.models import TrendingShowResponseList
+from anime_rest_api.api.responses import json_response
+from anime_rest_api.config import env_flag
+from anime_rest_api.db.crud.count_operations import CountMode
+from anime_rest_api.db.crud.errors import EntryNotFoundError
+from anime_rest_api.db.crud.show_operations import count_shows
 from anime_rest_api.db.crud.show_operations import create_show
 from anime_rest_api.db.crud.show_operations import delete_show
-from anime_rest_api.db.crud.show_operations import get_show
+from anime_rest_api.db.crud.show_operations import get_show_cached
+from anime_rest_api.db.crud.show_operations import get_show_fields
+from anime_rest_api.db.crud.show_operations import list_show_fields
 from anime_rest_api.db.crud.show_operations import list_shows
+from anime_rest_api.db.crud.show_operations import render_show_page_json
 from anime_rest_api.db.crud.show_operations import update_show
+from anime_rest_api.db.crud.similarity_operations import SIMILAR_SHOWS_K
+from anime_rest_api.db.crud.similarity_operations import list_similar_shows
 from anime_rest_api.db.models.content import ShowCreate
 from anime_rest_api.db.models.content import ShowRead
+from anime_rest_api.db.models.content import ShowStats
 from anime_rest_api.db.models.content import ShowUpdate
+from anime_rest_api.db.popularity import TRENDING
+from anime_rest_api.db.show_stats import SHOW_STATS
 
 ROUTER = APIRouter(prefix="/shows", tags=["shows"])
+show_fields_query = fields_query(ShowRead)
+LEAN_LISTINGS = env_flag("LEAN_LISTINGS")
+"""Serve full listings from plain rows instead of ORM instances and models."""
+PG_JSON_LISTINGS = env_flag("PG_JSON_LISTINGS")
+"""Have Postgres render listing bodies, takes priority over `LEAN_LISTINGS`."""
+_ALL_SHOW_FIELDS = tuple(ShowRead.model_fields)
 
 
 @ROUTER.get("", response_model=ShowResponseList)
 async def read_shows_route(
     *,
     limit_and_offset: tuple[int, int] = Depends(limit_and_offset_query),
+    include_total: Annotated[CountMode | None, Depends(include_total_query)],
+    fields: Annotated[tuple[str, ...] | None, Depends(show_fields_query)],
+    genre: Annotated[
+        str | None,
+        Query(description="Only shows with this genre."),
+    ] = None,
     session: Annotated[AsyncSession, DbDependency],
-) -> ShowResponseList:
-    """Get all shows."""
+):
+    """Get all shows, or only those with a genre.
+
+    With `fields` set, each show only holds those fields.
+    """
     limit, offset = limit_and_offset
-    shows = list(await list_shows(session, offset, limit + 1))
+    total = None
+    if include_total is not None:
+        total = await count_shows(session, include_total, genre=genre)
+    if PG_JSON_LISTINGS:
+        body = await render_show_page_json(
+            session,
+            fields or _ALL_SHOW_FIELDS,
+            offset,
+            limit,
+            total,
+            genre=genre,
+        )
+        return json_response(body)
+    if fields is None and LEAN_LISTINGS:
+        fields = _ALL_SHOW_FIELDS
+    if fields is not None:
+        # rows straight from the database, skip the ORM and response validation
+        rows = await list_show_fields(
+            session,
+            fields,
+            offset,
+            limit + 1,
+            genre=genre,
+        )
+        return json_response(
+            PartialShowResponseList.model_construct(
+                shows=[dict(row) for row in rows[:limit]],
+                has_more=len(rows) > limit,
+                total=total,
+            ),
+        )
+    shows = list(await list_shows(session, offset, limit + 1, genre=genre))
     has_more = len(shows) > limit
-    return ShowResponseList(shows=shows[:limit], has_more=has_more)  # type: ignore[arg-type]
+    return ShowResponseList(shows=shows[:limit], has_more=has_more, total=total)  # type: ignore[arg-type]
 
 
 @ROUTER.post("", response_model=ShowRead)
@@ -41,15 +108,79 @@ async def create_show_route(
     return await create_show(session, show_body)  # type: ignore[return-value]
 
 
+@ROUTER.get("/trending", response_model=TrendingShowResponseList)
+async def read_trending_shows_route(
+    limit: Annotated[int, Query(ge=1, le=TRENDING.size)] = 10,
+):
+    """Get the shows with the most recent views, most trending first.
+
+    Served from a leaderboard refreshed every few seconds from the views counted by
+    every worker, views of the last few seconds are not in it yet.
+    """
+    return TrendingShowResponseList(
+        shows=TRENDING.leaderboard[:limit],
+        refreshed_at=TRENDING.refreshed_at,
+    )
+
+
+@ROUTER.get("/stats", response_model=ShowStats)
+async def read_show_stats_route(session: Annotated[AsyncSession, DbDependency]):
+    """Get the counts of shows per type, status, content rating and release year.
+
+    Served from counts refreshed every few minutes, shows created since the last
+    refresh are not counted yet.
+    """
+    body = SHOW_STATS.body
+    if body is None:
+        body = await SHOW_STATS.load(await session.connection())
+    return json_response(body)
+
+
 @ROUTER.get("/{show_id}", response_model=ShowRead)
 async def read_show_route(
     show_id: int,
+    fields: Annotated[tuple[str, ...] | None, Depends(show_fields_query)],
     session: Annotated[AsyncSession, DbDependency],
-) -> ShowRead:
-    """Get a show by its ID."""
+):
+    """Get a show by its ID.
+
+    With `fields` set, the show only holds those fields.
+    """
+    if fields is not None:
+        row = await get_show_fields(session, show_id, fields)
+        if row is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Show not found",
+            )
+        TRENDING.record_view(show_id)
+        return json_response(dict(row))
     # TODO(Ryan): this can raise an error if the show is not found
     # need to add a exception handler to app
-    return await get_show(session, show_id)  # type: ignore[return-value]
+    show = await get_show_cached(session, show_id)
+    if show is not None:
+        TRENDING.record_view(show_id)
+    return show
+
+
+@ROUTER.get("/{show_id}/similar", response_model=SimilarShowResponseList)
+async def read_similar_shows_route(
+    show_id: int,
+    session: Annotated[AsyncSession, DbDependency],
+    limit: Annotated[int, Query(ge=1, le=SIMILAR_SHOWS_K)] = 10,
+):
+    """Get the shows most similar to a show, most similar first.
+
+    Similar shows are precomputed, a show added since the last recompute has none.
+    """
+    try:
+        shows = await list_similar_shows(session, show_id, limit)
+    except EntryNotFoundError as e:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Show not found",
+        ) from e
+    return SimilarShowResponseList(shows=shows)
 
 
 @ROUTER.patch("/{show_id}", response_model=ShowRead)
@@ -5,27 +5,64 @@ from fastapi import APIRouter
 from fastapi import Depends
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from anime_rest_api.api.common_query import fields_query
+from anime_rest_api.api.common_query import include_total_query
 from anime_rest_api.api.common_query import limit_and_offset_query
 from anime_rest_api.api.common_query import requesting_user_header
 from anime_rest_api.api.dependencies import DbDependency
+from anime_rest_api.api.models import PartialUserResponseList
 from anime_rest_api.api.models import UserResponseList
 from anime_rest_api.api.models.sessions import JwtUser
+from anime_rest_api.api.responses import json_response
+from anime_rest_api.config import env_flag
+from anime_rest_api.db.crud.count_operations import CountMode
+from anime_rest_api.db.crud.user_operations import count_users
+from anime_rest_api.db.crud.user_operations import list_user_fields
 from anime_rest_api.db.crud.user_operations import list_users
+from anime_rest_api.db.models.auth import UserPublic
 
 ROUTER = APIRouter(prefix="/users", tags=["users", "auth"])
 LOG = logging.getLogger(f"anime-api.{__name__}")
+# the password hash should never be something a client asks for or gets
+_PRIVATE_USER_FIELDS = frozenset({"password_hash"})
+user_fields_query = fields_query(UserPublic, exclude=_PRIVATE_USER_FIELDS)
+LEAN_LISTINGS = env_flag("LEAN_LISTINGS")
+"""Serve full listings from plain rows instead of ORM instances and models."""
+_ALL_USER_FIELDS = tuple(
+    name for name in UserPublic.model_fields if name not in _PRIVATE_USER_FIELDS
+)
 
 
 @ROUTER.get("", response_model=UserResponseList)
 async def list_users_route(
     *,
     limit_and_offset: tuple[int, int] = Depends(limit_and_offset_query),
+    include_total: Annotated[CountMode | None, Depends(include_total_query)],
+    fields: Annotated[tuple[str, ...] | None, Depends(user_fields_query)],
     session: Annotated[AsyncSession, DbDependency],
     requesting_user: Annotated[JwtUser, Depends(requesting_user_header)],
 ):
-    """List users in a paginated way."""
+    """List users in a paginated way.
+
+    With `fields` set, each user only holds those fields.
+    """
     limit, offset = limit_and_offset
     LOG.info("Requesting user %s", requesting_user)
+    total = None
+    if include_total is not None:
+        total = await count_users(session, include_total)
+    if fields is None and LEAN_LISTINGS:
+        fields = _ALL_USER_FIELDS
+    if fields is not None:
+        # rows straight from the database, skip the ORM and response validation
+        rows = await list_user_fields(session, fields, offset, limit + 1)
+        return json_response(
+            PartialUserResponseList.model_construct(
+                users=[dict(row) for row in rows[:limit]],
+                has_more=len(rows) > limit,
+                total=total,
+            ),
+        )
     users = list(
         await list_users(
             session,
@@ -34,4 +71,4 @@ async def list_users_route(
         ),
     )
     has_more = len(users) > limit
-    return {"users": users[:limit], "has_more": has_more}
+    return {"users": users[:limit], "has_more": has_more, "total": total}
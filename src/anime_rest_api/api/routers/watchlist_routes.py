@@ -0,0 +1,159 @@
+"""Watchlist of the requesting user, written in bulk."""
+
+import base64
+import binascii
+import datetime as dt
+from typing import Annotated
+
+from fastapi import APIRouter
+from fastapi import Depends
+from fastapi import HTTPException
+from fastapi import Query
+from fastapi import status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from anime_rest_api.api.common_query import include_total_query
+from anime_rest_api.api.common_query import requesting_user_header
+from anime_rest_api.api.dependencies import DbDependency
+from anime_rest_api.api.models import WatchlistRemoveRequest
+from anime_rest_api.api.models import WatchlistResponseList
+from anime_rest_api.api.models import WatchlistUpsertRequest
+from anime_rest_api.api.models import WatchlistWriteResponse
+from anime_rest_api.api.models.sessions import JwtUser
+from anime_rest_api.db.crud.count_operations import CountMode
+from anime_rest_api.db.crud.watchlist_operations import count_watchlist_entries
+from anime_rest_api.db.crud.watchlist_operations import delete_watchlist_entries
+from anime_rest_api.db.crud.watchlist_operations import list_watchlist_entries
+from anime_rest_api.db.crud.watchlist_operations import upsert_watchlist_entries
+from anime_rest_api.db.models.content import WatchStatus
+from anime_rest_api.db.models.content import WatchlistCounts
+
+ROUTER = APIRouter(prefix="/watchlist", tags=["watchlist"])
+
+
+def encode_cursor(updated_at: dt.datetime, show_id: int) -> str:
+    """Encode the position of a watchlist entry as an opaque cursor."""
+    position = f"{updated_at.isoformat()}|{show_id}"
+    return base64.urlsafe_b64encode(position.encode()).decode()
+
+
+def decode_cursor(cursor: str) -> tuple[dt.datetime, int]:
+    """Decode a cursor made by `encode_cursor`.
+
+    Raises:
+        ValueError: If the cursor is malformed.
+    """
+    try:
+        position = base64.urlsafe_b64decode(cursor.encode()).decode()
+    except (binascii.Error, UnicodeDecodeError) as e:
+        msg = "Malformed cursor"
+        raise ValueError(msg) from e
+    updated_at, _, show_id = position.partition("|")
+    return dt.datetime.fromisoformat(updated_at), int(show_id)
+
+
+def limit_and_after_query(
+    limit: Annotated[int, Query(ge=1, le=100)] = 10,
+    after: Annotated[
+        str | None,
+        Query(description="`nextAfter` of the previous page."),
+    ] = None,
+) -> tuple[int, tuple[dt.datetime, int] | None]:
+    """Limit of the page, and the decoded cursor of the page to list after."""
+    if after is None:
+        return limit, None
+    try:
+        return limit, decode_cursor(after)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="Malformed `after` cursor",
+        ) from e
+
+
+@ROUTER.get("", response_model=WatchlistResponseList)
+async def list_watchlist_route(
+    *,
+    limit_and_after: Annotated[
+        tuple[int, tuple[dt.datetime, int] | None],
+        Depends(limit_and_after_query),
+    ],
+    status_filter: Annotated[WatchStatus | None, Query(alias="status")] = None,
+    include_total: Annotated[CountMode | None, Depends(include_total_query)],
+    session: Annotated[AsyncSession, DbDependency],
+    requesting_user: Annotated[JwtUser, Depends(requesting_user_header)],
+):
+    """List the watchlist of the requesting user, most recently updated first.
+
+    The total comes from the kept counts, so it is exact in either mode.
+    """
+    limit, after = limit_and_after
+    entries = list(
+        await list_watchlist_entries(
+            session,
+            requesting_user.user_id,
+            limit + 1,
+            status=status_filter,
+            after=after,
+        ),
+    )
+    has_more = len(entries) > limit
+    entries = entries[:limit]
+    total = None
+    if include_total is not None:
+        counts = await count_watchlist_entries(session, requesting_user.user_id)
+        total = (
+            counts.total if status_filter is None else getattr(counts, status_filter)
+        )
+    next_after = None
+    if has_more:
+        last = entries[-1]
+        next_after = encode_cursor(last.updated_at, last.show_id)  # type: ignore[arg-type]
+    return WatchlistResponseList(
+        entries=entries,  # type: ignore[arg-type]
+        has_more=has_more,
+        total=total,
+        next_after=next_after,
+    )
+
+
+@ROUTER.get("/counts", response_model=WatchlistCounts)
+async def count_watchlist_route(
+    session: Annotated[AsyncSession, DbDependency],
+    requesting_user: Annotated[JwtUser, Depends(requesting_user_header)],
+) -> WatchlistCounts:
+    """Count the watchlist entries of the requesting user per status."""
+    return await count_watchlist_entries(session, requesting_user.user_id)
+
+
+@ROUTER.put("", response_model=WatchlistWriteResponse)
+async def upsert_watchlist_route(
+    body: WatchlistUpsertRequest,
+    session: Annotated[AsyncSession, DbDependency],
+    requesting_user: Annotated[JwtUser, Depends(requesting_user_header)],
+) -> WatchlistWriteResponse:
+    """Add shows to the watchlist, replacing the entries of shows already on it.
+
+    Shows that don't exist are skipped, `changed` counts the entries written.
+    """
+    changed = await upsert_watchlist_entries(
+        session,
+        requesting_user.user_id,
+        body.entries,
+    )
+    return WatchlistWriteResponse(changed=changed)
+
+
+@ROUTER.post("/remove", response_model=WatchlistWriteResponse)
+async def remove_watchlist_route(
+    body: WatchlistRemoveRequest,
+    session: Annotated[AsyncSession, DbDependency],
+    requesting_user: Annotated[JwtUser, Depends(requesting_user_header)],
+) -> WatchlistWriteResponse:
+    """Remove shows from the watchlist, `changed` counts the entries removed."""
+    changed = await delete_watchlist_entries(
+        session,
+        requesting_user.user_id,
+        body.show_ids,
+    )
+    return WatchlistWriteResponse(changed=changed)
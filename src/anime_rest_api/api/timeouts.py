@@ -0,0 +1,172 @@
+"""Bound how long a request can hold a pooled database connection.
+
+Every route gets a Postgres `statement_timeout`, and a request whose client went
+away is cancelled, which makes asyncpg cancel the running query server side.
+"""
+
+import asyncio
+import contextlib
+import logging
+import os
+from typing import Annotated
+
+from fastapi import Depends
+from fastapi import Request
+from fastapi import status
+from fastapi.responses import JSONResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.types import ASGIApp
+from starlette.types import Message
+from starlette.types import Receive
+from starlette.types import Scope
+from starlette.types import Send
+
+from anime_rest_api.db.connection import apply_statement_timeout
+
+from .dependencies import DbDependency
+from .metrics import REGISTRY
+from .metrics import Counter
+
+LOG = logging.getLogger(f"anime-api.{__name__}")
+
+QUERY_CANCELED_SQLSTATE = "57014"
+DEFAULT_STATEMENT_TIMEOUT_MS = int(os.getenv("ANIME_API_STATEMENT_TIMEOUT_MS", "5000"))
+"""Statement timeout of routes without their own entry in `STATEMENT_TIMEOUTS`."""
+
+__all__ = [
+    "DEFAULT_STATEMENT_TIMEOUT_MS",
+    "STATEMENT_TIMEOUTS",
+    "CancelOnDisconnectMiddleware",
+    "StatementTimeoutDependency",
+    "parse_statement_timeouts",
+    "query_canceled_handler",
+    "statement_timeout",
+]
+
+CANCELLED = REGISTRY.register(
+    Counter(
+        "anime_api_disconnect_cancelled_total",
+        "Requests cancelled because the client disconnected.",
+    ),
+)
+TIMED_OUT = REGISTRY.register(
+    Counter(
+        "anime_api_statement_timeout_total",
+        "Requests answered with 504 after hitting the statement timeout.",
+        ("route",),
+    ),
+)
+
+
+def parse_statement_timeouts(value: str) -> dict[str, int]:
+    """Parse `METHOD /path=milliseconds` pairs separated by `;`.
+
+    >>> parse_statement_timeouts("GET /shows=2000; POST /login = 3000")
+    {'GET /shows': 2000, 'POST /login': 3000}
+    """
+    timeouts = {}
+    for pair in value.split(";"):
+        if not pair.strip():
+            continue
+        route, _, milliseconds = pair.rpartition("=")
+        timeouts[route.strip()] = int(milliseconds)
+    return timeouts
+
+
+STATEMENT_TIMEOUTS: dict[str, int] = {
+    # a deep offset on a listing is the usual slow query, keep it short
+    "GET /shows": 2000,
+    "GET /users": 2000,
+    "GET /shows/{show_id}": 1000,
+    **parse_statement_timeouts(os.getenv("ANIME_API_STATEMENT_TIMEOUTS", "")),
+}
+"""Statement timeout in milliseconds keyed by `METHOD /route/path`."""
+
+
+def _route_key(request: Request) -> str:
+    route = request.scope.get("route")
+    path = getattr(route, "path", request.url.path)
+    return f"{request.method} {path}"
+
+
+async def statement_timeout(
+    request: Request,
+    session: Annotated[AsyncSession, DbDependency],
+) -> None:
+    """Apply the statement timeout of the requested route to its session."""
+    timeout_ms = STATEMENT_TIMEOUTS.get(
+        _route_key(request),
+        DEFAULT_STATEMENT_TIMEOUT_MS,
+    )
+    await apply_statement_timeout(session, timeout_ms)
+
+
+StatementTimeoutDependency = Depends(statement_timeout)
+
+
+async def query_canceled_handler(request: Request, exc: Exception) -> JSONResponse:
+    """Answer statements cancelled by their timeout with `504`.
+
+    Registered for `DBAPIError`, any other database error is raised again and left
+    to the default handling.
+    """
+    orig = getattr(exc, "orig", None)
+    if getattr(orig, "sqlstate", None) != QUERY_CANCELED_SQLSTATE:
+        raise exc
+    route = _route_key(request)
+    TIMED_OUT.inc(route)
+    LOG.warning("Statement timeout hit on %s", route)
+    return JSONResponse(
+        {"detail": "Database query timed out"},
+        status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+    )
+
+
+class CancelOnDisconnectMiddleware:
+    """Cancel a request as soon as its client disconnects.
+
+    The app runs in its own task while this middleware forwards `receive` messages
+    to it, so a `http.disconnect` can cancel the app even while it is awaiting a
+    query. The cancelled query hands its connection back to the pool right away.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        """Wrap app."""
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """Run an HTTP request, cancelling it on disconnect."""
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        messages: asyncio.Queue[Message] = asyncio.Queue()
+        app_task = asyncio.ensure_future(self.app(scope, messages.get, send))
+        disconnected = False
+
+        async def forward() -> None:
+            nonlocal disconnected
+            while True:
+                message = await receive()
+                messages.put_nowait(message)
+                if message["type"] == "http.disconnect":
+                    if not app_task.done():
+                        disconnected = True
+                        app_task.cancel()
+                    return
+
+        forwarder = asyncio.create_task(forward())
+        try:
+            await app_task
+        except asyncio.CancelledError:
+            # re-raise when we are the ones being cancelled, not only the app
+            task = asyncio.current_task()
+            if not disconnected or (task is not None and task.cancelling()):
+                raise
+            CANCELLED.inc()
+            LOG.info("Client disconnected, cancelled %s", scope["path"])
+        finally:
+            forwarder.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await forwarder
+            if not app_task.done():
+                app_task.cancel()
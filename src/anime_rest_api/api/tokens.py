@@ -0,0 +1,280 @@
+"""Codecs signing and verifying our HS256 JSON Web Tokens.
+
+A codec is built once with its key, audience and issuer, so nothing about them is
+parsed again per token. `HmacTokenCodec` implements HS256 directly on a keyed
+`hmac` object that is copied for every token, `JoseTokenCodec` goes through
+python-jose. Both raise the `jose` exceptions, and read each other's tokens.
+"""
+
+import base64
+from collections.abc import Collection
+from collections.abc import Mapping
+import hashlib
+import hmac
+import json
+import time
+from typing import Any
+from typing import Literal
+from typing import Protocol
+
+from jose import jwt
+from jose.exceptions import ExpiredSignatureError
+from jose.exceptions import JWTClaimsError
+from jose.exceptions import JWTError
+
+type TokenBackend = Literal["hmac", "jose"]
+
+__all__ = [
+    "HmacTokenCodec",
+    "JoseTokenCodec",
+    "TokenBackend",
+    "TokenCodec",
+    "at_hash",
+    "build_codec",
+]
+
+
+def _b64encode(raw: bytes) -> bytes:
+    return base64.urlsafe_b64encode(raw).rstrip(b"=")
+
+
+def _b64decode(segment: bytes) -> bytes:
+    return base64.urlsafe_b64decode(segment + b"=" * (-len(segment) % 4))
+
+
+def at_hash(access_token: str) -> str:
+    """Left half of the SHA-256 of access_token, as in OpenID Connect.
+
+    >>> at_hash("abc.def.ghi")
+    'ZVnpC13VdAW98YDym1CQUw'
+    """
+    digest = hashlib.sha256(access_token.encode()).digest()
+    return _b64encode(digest[: len(digest) // 2]).decode()
+
+
+class TokenCodec(Protocol):
+    """Sign claims into a token and verify a token back into claims."""
+
+    def encode(
+        self,
+        claims: Mapping[str, Any],
+        *,
+        access_token: str | None = None,
+    ) -> str:
+        """Sign claims, adding the `at_hash` of access_token when given."""
+        ...
+
+    def decode(
+        self,
+        token: str,
+        *,
+        required: Collection[str],
+        access_token: str | None = None,
+    ) -> dict[str, Any]:
+        """Verify token and return its claims.
+
+        Args:
+            token (str): Token to verify.
+            required (Collection[str]): Claims the token must have.
+            access_token (str | None, optional): Access token the `at_hash` of
+                the token must match. Defaults to None, not comparing it.
+
+        Raises:
+            JWTError: If the signature, audience, issuer, expiration or any
+                required claim is invalid.
+        """
+        ...
+
+
+class JoseTokenCodec:
+    """HS256 tokens through python-jose."""
+
+    def __init__(self, secret: str, *, audience: str, issuer: str) -> None:
+        """Initialize a codec for tokens of audience issued by issuer."""
+        self._secret = secret
+        self.audience = audience
+        self.issuer = issuer
+
+    def encode(
+        self,
+        claims: Mapping[str, Any],
+        *,
+        access_token: str | None = None,
+    ) -> str:
+        """Sign claims, adding the `at_hash` of access_token when given."""
+        return jwt.encode(
+            dict(claims),
+            self._secret,
+            algorithm="HS256",
+            access_token=access_token,
+        )
+
+    def decode(
+        self,
+        token: str,
+        *,
+        required: Collection[str],
+        access_token: str | None = None,
+    ) -> dict[str, Any]:
+        """Verify token and return its claims."""
+        options = {f"require_{claim}": True for claim in required}
+        if access_token is None:
+            # jose rejects an `at_hash` it has nothing to compare with
+            options.pop("require_at_hash", None)
+            options["verify_at_hash"] = False
+        claims = jwt.decode(
+            token,
+            self._secret,
+            algorithms=["HS256"],
+            audience=self.audience,
+            issuer=self.issuer,
+            access_token=access_token,
+            options=options,
+        )
+        if "at_hash" in required and "at_hash" not in claims:
+            msg = 'missing required key "at_hash" among claims'
+            raise JWTError(msg)
+        return claims
+
+
+class HmacTokenCodec:
+    """HS256 tokens signed with a preloaded `hmac` key."""
+
+    def __init__(self, secret: str, *, audience: str, issuer: str) -> None:
+        """Initialize a codec for tokens of audience issued by issuer."""
+        self._mac = hmac.new(secret.encode(), digestmod=hashlib.sha256)
+        self.audience = audience
+        self.issuer = issuer
+        self._header = _b64encode(
+            json.dumps(
+                {"alg": "HS256", "typ": "JWT"},
+                separators=(",", ":"),
+                sort_keys=True,
+            ).encode(),
+        )
+
+    def _sign(self, signing_input: bytes) -> bytes:
+        mac = self._mac.copy()
+        mac.update(signing_input)
+        return _b64encode(mac.digest())
+
+    def encode(
+        self,
+        claims: Mapping[str, Any],
+        *,
+        access_token: str | None = None,
+    ) -> str:
+        """Sign claims, adding the `at_hash` of access_token when given."""
+        payload = dict(claims)
+        if access_token is not None:
+            payload["at_hash"] = at_hash(access_token)
+        signing_input = (
+            self._header
+            + b"."
+            + _b64encode(json.dumps(payload, separators=(",", ":")).encode())
+        )
+        return (signing_input + b"." + self._sign(signing_input)).decode()
+
+    def decode(
+        self,
+        token: str,
+        *,
+        required: Collection[str],
+        access_token: str | None = None,
+    ) -> dict[str, Any]:
+        """Verify token and return its claims."""
+        raw = token.encode()
+        signing_input, _, signature = raw.rpartition(b".")
+        header, _, payload = signing_input.partition(b".")
+        if not header or not payload or b"." in payload:
+            msg = "Not enough segments"
+            raise JWTError(msg)
+        if header != self._header:
+            self._check_header(header)
+        if not hmac.compare_digest(signature, self._sign(signing_input)):
+            msg = "Signature verification failed."
+            raise JWTError(msg)
+        try:
+            claims = json.loads(_b64decode(payload))
+        except ValueError as e:
+            msg = f"Invalid payload string: {e}"
+            raise JWTError(msg) from e
+        if not isinstance(claims, dict):
+            msg = "Invalid payload string: must be a json object"
+            raise JWTError(msg)
+        self._check_claims(claims, required, access_token)
+        return claims
+
+    @staticmethod
+    def _check_header(header: bytes) -> None:
+        """Accept other encodings of the header, as long as they pick HS256."""
+        try:
+            parsed = json.loads(_b64decode(header))
+        except ValueError as e:
+            msg = "Error decoding token headers."
+            raise JWTError(msg) from e
+        if not isinstance(parsed, dict) or parsed.get("alg") != "HS256":
+            msg = "The specified alg value is not allowed"
+            raise JWTError(msg)
+
+    def _check_claims(
+        self,
+        claims: dict[str, Any],
+        required: Collection[str],
+        access_token: str | None,
+    ) -> None:
+        missing = [claim for claim in required if claim not in claims]
+        if missing:
+            msg = f"missing required key(s): {missing}"
+            raise JWTError(msg)
+        now = time.time()
+        for claim in ("iat", "nbf", "exp"):
+            if claim in claims and not isinstance(claims[claim], int):
+                msg = f"{claim} claim must be an integer."
+                raise JWTClaimsError(msg)
+        if "nbf" in claims and claims["nbf"] > now:
+            msg = "The token is not yet valid (nbf)"
+            raise JWTClaimsError(msg)
+        if "exp" in claims and claims["exp"] < now:
+            msg = "Signature has expired."
+            raise ExpiredSignatureError(msg)
+        audiences = claims.get("aud", [])
+        if isinstance(audiences, str):
+            audiences = [audiences]
+        if self.audience not in audiences:
+            msg = "Invalid audience"
+            raise JWTClaimsError(msg)
+        if claims.get("iss") != self.issuer:
+            msg = "Invalid issuer"
+            raise JWTClaimsError(msg)
+        if (
+            access_token is not None
+            and "at_hash" in claims
+            and not hmac.compare_digest(claims["at_hash"], at_hash(access_token))
+        ):
+            msg = "at_hash claim does not match access_token."
+            raise JWTClaimsError(msg)
+
+
+_CODECS: dict[TokenBackend, type[HmacTokenCodec | JoseTokenCodec]] = {
+    "hmac": HmacTokenCodec,
+    "jose": JoseTokenCodec,
+}
+
+
+def build_codec(
+    backend: TokenBackend | str,
+    secret: str,
+    *,
+    audience: str,
+    issuer: str,
+) -> TokenCodec:
+    """Build the codec of backend with its key loaded.
+
+    Raises:
+        ValueError: If backend isn't one of `hmac` or `jose`.
+    """
+    if backend not in _CODECS:
+        msg = f"Unknown token backend {backend!r}, choose from {list(_CODECS)}"
+        raise ValueError(msg)
+    return _CODECS[backend](secret, audience=audience, issuer=issuer)  # type: ignore[index]
@@ -0,0 +1,26 @@
+"""Helpers for reading `ANIME_API_` prefixed environment variables."""
+
+import os
+
+__all__ = ["env_flag"]
+
+_TRUTHY = frozenset({"1", "true", "yes", "on"})
+
+
+def env_flag(name: str, *, default: bool = False) -> bool:
+    """Read a boolean switch from the environment.
+
+    >>> env_flag("SOME_UNSET_SWITCH", default=True)
+    True
+
+    Args:
+        name (str): Variable name without the `ANIME_API_` prefix.
+        default (bool, optional): Value when the variable is unset. Defaults to False.
+
+    Returns:
+        bool: True for `1`, `true`, `yes` or `on`, case insensitive.
+    """
+    value = os.getenv(f"ANIME_API_{name}")
+    if value is None:
+        return default
+    return value.strip().lower() in _TRUTHY
@@ -7,6 +7,8 @@ from .connection import DatabaseConnection
 from .errors import InvalidDbConnectionStateError
 from .models.auth import AUTH_METADATA
 from .models.content import CONTENT_METADATA
+from .models.content import CREATE_SHOW_STATS_VIEW
+from .models.content import DROP_SHOW_STATS_VIEW
 
 __all__ = [
     "DatabaseConnection",
@@ -21,13 +23,18 @@ __all__ = [
 async def setup_db(conn: AsyncConnection) -> None:
     """Setup the database."""
     await conn.execute(text("CREATE EXTENSION IF NOT EXISTS pgcrypto"))
-    for meta in [CONTENT_METADATA, AUTH_METADATA]:
+    # content tables reference auth.users, so auth goes first
+    for meta in [AUTH_METADATA, CONTENT_METADATA]:
         await conn.execute(CreateSchema(meta.schema, if_not_exists=True))  # type: ignore[arg-type]
         await conn.run_sync(meta.create_all)
+    for statement in CREATE_SHOW_STATS_VIEW:
+        await conn.execute(statement)
 
 
 async def clean_db(conn: AsyncConnection) -> None:
     """Drop all tables and schemas."""
+    # the view depends on the shows table
+    await conn.execute(DROP_SHOW_STATS_VIEW)
     for meta in [CONTENT_METADATA, AUTH_METADATA]:
         await conn.run_sync(meta.drop_all)
         await conn.execute(DropSchema(meta.schema, cascade=True)) # type: ignore[arg-type]
@@ -0,0 +1,77 @@
+"""Small in-process caches for values read from the database."""
+
+from collections import OrderedDict
+from collections.abc import Callable
+from collections.abc import Hashable
+import time
+
+__all__ = ["TtlCache"]
+
+
+class TtlCache[K: Hashable, V]:
+    """Bounded mapping where every entry expires after a fixed time to live.
+
+    Entries are evicted lazily on read, and the least recently written entry is
+    dropped when the cache is full.
+
+    >>> cache = TtlCache[str, int](ttl=60, max_size=2)
+    >>> cache.set("a", 1)
+    >>> cache.get("a")
+    1
+    >>> cache.get("missing") is None
+    True
+    """
+
+    def __init__(
+        self,
+        ttl: float,
+        max_size: int = 1024,
+        *,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """Initialize an empty cache.
+
+        Args:
+            ttl (float): Seconds an entry stays valid after being set.
+            max_size (int, optional): Maximum number of entries. Defaults to 1024.
+            clock (Callable[[], float], optional): Source of the current time,
+                overridable for tests. Defaults to `time.monotonic`.
+        """
+        self.ttl = ttl
+        self.max_size = max_size
+        self._clock = clock
+        self._entries: OrderedDict[K, tuple[float, V]] = OrderedDict()
+
+    def __len__(self) -> int:
+        """Number of entries, including ones that expired but were not read yet."""
+        return len(self._entries)
+
+    def __repr__(self) -> str:
+        """Debug representation of the object."""
+        return f"{self.__class__.__name__}(ttl={self.ttl}, size={len(self)})"
+
+    def get(self, key: K) -> V | None:
+        """Return the value for key, or None when missing or expired."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at <= self._clock():
+            del self._entries[key]
+            return None
+        return value
+
+    def set(self, key: K, value: V) -> None:
+        """Store value under key, evicting the oldest entry if the cache is full."""
+        self._entries.pop(key, None)
+        self._entries[key] = (self._clock() + self.ttl, value)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, key: K) -> None:
+        """Drop a single entry if it exists."""
+        self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        """Drop every entry."""
+        self._entries.clear()
@@ -3,12 +3,22 @@ import os
 from typing import Self
 
 from sqlalchemy import URL
+from sqlalchemy import event
+from sqlalchemy.engine import Connection
 from sqlalchemy.ext.asyncio import AsyncEngine
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.ext.asyncio import async_sessionmaker
 from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.orm import Session
+from sqlalchemy.orm import SessionTransaction
+
+from anime_rest_api.tracing import EXPORTER
+from anime_rest_api.tracing import end_span
+from anime_rest_api.tracing import instrument_engine
+from anime_rest_api.tracing import start_span
 
 from .errors import InvalidDbConnectionStateError
+from .instrumentation import SLOW_QUERY_LOG
 
 
 class DatabaseConnection:
@@ -37,6 +47,9 @@ class DatabaseConnection:
         self.echo = echo
         self._engine = create_async_engine(db_url, echo=echo)
         self._session = async_sessionmaker(self._engine)
+        SLOW_QUERY_LOG.install(self._engine)
+        if EXPORTER is not None:
+            instrument_engine(self._engine)
 
     def __repr__(self) -> str:
         """Debug representation of the object."""
@@ -57,8 +70,38 @@ class DatabaseConnection:
 
     async def session(self) -> AsyncGenerator[AsyncSession, None]:
         """Public getter for the session."""
-        async with self._session() as session:
-            yield session
+        session_span = start_span("Db.session")
+        try:
+            async with self._session() as session:
+                yield session
+        finally:
+            end_span(session_span)
+
+
+async def apply_statement_timeout(session: AsyncSession, timeout_ms: int) -> None:
+    """Limit every statement of session to timeout_ms milliseconds.
+
+    Uses `SET LOCAL` at the start of each transaction, so the setting never leaks
+    into other users of the pooled connection, and still applies after a commit
+    starts a new transaction. A transaction already begun is limited right away.
+
+    Args:
+        session (AsyncSession): Session to limit, before or during its transaction.
+        timeout_ms (int): Timeout in milliseconds, 0 disables the timeout.
+    """
+    statement = f"SET LOCAL statement_timeout = {int(timeout_ms)}"
+
+    def set_timeout(
+        _session: Session,
+        _transaction: SessionTransaction,
+        connection: Connection,
+    ) -> None:
+        connection.exec_driver_sql(statement)
+
+    event.listen(session.sync_session, "after_begin", set_timeout)
+    if session.in_transaction():
+        connection = await session.connection()
+        await connection.exec_driver_sql(statement)
 
 
 Db = DatabaseConnection(os.getenv("ANIME_API_DATABASE_URL"), echo=False)
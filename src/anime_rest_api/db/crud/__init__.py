@@ -1,10 +1,12 @@
 from .errors import DatabaseError
+from .errors import EntryExistsError
 from .errors import EntryNotFoundError
 from .errors import InvalidPermissionsError
 from .errors import UnexpectedDbError
 
 __all__ = [
     "DatabaseError",
+    "EntryExistsError",
     "EntryNotFoundError",
     "UnexpectedDbError",
     "InvalidPermissionsError",
@@ -0,0 +1,145 @@
+"""Operations for counting the total rows behind a paginated listing."""
+
+import json
+import logging
+import os
+from typing import Literal
+
+from sqlalchemy import Select
+from sqlalchemy import Table
+from sqlalchemy import func
+from sqlalchemy import select
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from anime_rest_api.db.cache import TtlCache
+
+LOG = logging.getLogger(f"anime-api.{__name__}")
+
+type CountMode = Literal["exact", "estimate"]
+
+_EXACT_COUNT_TTL = float(os.getenv("ANIME_API_EXACT_COUNT_TTL", "30"))
+EXACT_COUNTS: TtlCache[str, int] = TtlCache(ttl=_EXACT_COUNT_TTL, max_size=256)
+"""Recently computed exact counts, keyed by the rendered count query."""
+
+__all__ = [
+    "EXACT_COUNTS",
+    "CountMode",
+    "count_rows",
+    "estimate_count",
+    "exact_count",
+]
+
+
+def _unpaginated(statement: Select) -> Select:
+    """Strip ordering and pagination, they don't change the total."""
+    return statement.order_by(None).limit(None).offset(None)
+
+
+def _render(session: AsyncSession, statement: Select) -> str:
+    """Render a statement with its parameters inlined.
+
+    Only used for EXPLAIN and cache keys, the values come from our own filters
+    and SQLAlchemy escapes them for the dialect.
+    """
+    return str(
+        statement.compile(
+            dialect=session.get_bind().dialect,
+            compile_kwargs={"literal_binds": True},
+        ),
+    )
+
+
+def _single_table(statement: Select) -> Table | None:
+    """Return the table of an unfiltered single table select, otherwise None."""
+    froms = statement.get_final_froms()
+    if statement.whereclause is not None or len(froms) != 1:
+        return None
+    table = froms[0]
+    return table if isinstance(table, Table) else None
+
+
+async def exact_count(session: AsyncSession, statement: Select) -> int:
+    """Run a `COUNT(*)` over the rows of statement.
+
+    The result is cached for `ANIME_API_EXACT_COUNT_TTL` seconds, so repeated page
+    loads only pay for the full scan once per window.
+
+    Args:
+        session (AsyncSession): Database session
+        statement (Select): Listing query, pagination is ignored.
+
+    Returns:
+        int: Number of rows the listing would return without pagination.
+    """
+    count_statement = select(func.count()).select_from(
+        _unpaginated(statement).subquery(),
+    )
+    key = _render(session, count_statement)
+    cached = EXACT_COUNTS.get(key)
+    if cached is not None:
+        return cached
+    total = (await session.execute(count_statement)).scalar_one()
+    EXACT_COUNTS.set(key, total)
+    return total
+
+
+async def estimate_count(session: AsyncSession, statement: Select) -> int:
+    """Estimate the rows of statement from planner statistics.
+
+    Unfiltered single table listings read `pg_class.reltuples`, anything else asks
+    the planner through `EXPLAIN`. Neither touches the table data itself.
+
+    Args:
+        session (AsyncSession): Database session
+        statement (Select): Listing query, pagination is ignored.
+
+    Returns:
+        int: Estimated number of rows, never negative.
+    """
+    statement = _unpaginated(statement)
+    table = _single_table(statement)
+    if table is not None:
+        reltuples: int | None = (
+            await session.execute(
+                text(
+                    "SELECT reltuples::bigint FROM pg_catalog.pg_class "
+                    "WHERE oid = to_regclass(:name)",
+                ),
+                {"name": table.fullname},
+            )
+        ).scalar_one_or_none()
+        # -1 means the table was never vacuumed or analyzed, ask the planner instead
+        if reltuples is not None and reltuples >= 0:
+            return int(reltuples)
+    raw_plan: list[dict] | str = (
+        await session.execute(
+            text(f"EXPLAIN (FORMAT JSON) {_render(session, statement)}"),
+        )
+    ).scalar_one()
+    # asyncpg hands back json columns as text unless a codec is registered
+    plan: list[dict] = json.loads(raw_plan) if isinstance(raw_plan, str) else raw_plan
+    estimate = int(plan[0]["Plan"]["Plan Rows"])
+    LOG.debug("Planner estimated %d rows", estimate)
+    return max(estimate, 0)
+
+
+async def count_rows(
+    session: AsyncSession,
+    statement: Select,
+    mode: CountMode,
+) -> int:
+    """Count the rows of a listing using the requested strategy.
+
+    Args:
+        session (AsyncSession): Database session
+        statement (Select): Listing query, pagination is ignored.
+        mode (CountMode): `exact` for a cached `COUNT(*)`, `estimate` for planner
+            statistics.
+
+    Returns:
+        int: Total rows of the listing.
+    """
+    if mode == "exact":
+        return await exact_count(session, statement)
+    return await estimate_count(session, statement)
@@ -0,0 +1,201 @@
+"""Episodes of shows, listed by number and ingested in bulk.
+
+Writes are upserts that leave unchanged episodes alone, so importing the same
+airing schedule again doesn't rewrite its rows. `import_episodes` is the path for
+large imports: rows are copied into a temporary table, then merged by one upsert.
+"""
+
+from collections.abc import Iterable
+from collections.abc import Sequence
+import datetime as dt
+
+from sqlalchemy import select as select_columns
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlmodel import select
+
+from anime_rest_api.db.models.content import Episode
+from anime_rest_api.db.models.content import EpisodeWrite
+from anime_rest_api.db.models.content import Show
+
+from .errors import EntryNotFoundError
+
+MAX_BATCH = 1000
+"""Most episodes written by one `ingest_episodes`."""
+
+type EpisodeRow = tuple[int, int, str | None, dt.date | None, int | None]
+"""`show_id`, `number`, `title`, `air_date` and `duration` of an episode."""
+
+_EPISODE_COLUMNS = ["show_id", "number", "title", "air_date", "duration"]
+
+# an episode is only rewritten when it changed
+_MERGE = """
+ON CONFLICT (show_id, number) DO UPDATE SET
+    title = excluded.title,
+    air_date = excluded.air_date,
+    duration = excluded.duration
+WHERE (episode.title, episode.air_date, episode.duration)
+    IS DISTINCT FROM (excluded.title, excluded.air_date, excluded.duration)
+"""
+
+_UPSERT_EPISODES = text(
+    f"""
+    WITH written AS (
+        INSERT INTO content.episodes AS episode
+            (show_id, number, title, air_date, duration)
+        SELECT :show_id, batch.number, batch.title, batch.air_date, batch.duration
+        FROM unnest(
+            CAST(:numbers AS integer[]),
+            CAST(:titles AS text[]),
+            CAST(:air_dates AS date[]),
+            CAST(:durations AS integer[])
+        ) AS batch(number, title, air_date, duration)
+        -- nothing is written for a show that doesn't exist
+        JOIN content.shows ON shows.show_id = :show_id
+        {_MERGE}
+        RETURNING 1
+    )
+    SELECT count(*) FROM written
+    """,  # noqa: S608
+)
+
+_CREATE_STAGING = text(
+    """
+    CREATE TEMPORARY TABLE episode_staging (
+        position bigint GENERATED ALWAYS AS IDENTITY,
+        show_id integer NOT NULL,
+        number integer NOT NULL,
+        title text,
+        air_date date,
+        duration integer
+    )
+    """,
+)
+
+_MERGE_STAGING = text(
+    f"""
+    WITH written AS (
+        INSERT INTO content.episodes AS episode
+            (show_id, number, title, air_date, duration)
+        -- one row per episode, the last copied wins, in key order
+        SELECT DISTINCT ON (show_id, number)
+            show_id, number, staged.title, staged.air_date, staged.duration
+        FROM episode_staging AS staged
+        JOIN content.shows USING (show_id)
+        ORDER BY show_id, number, staged.position DESC
+        {_MERGE}
+        RETURNING 1
+    )
+    SELECT count(*) FROM written
+    """,  # noqa: S608
+)
+
+
+async def list_episodes(
+    session: AsyncSession,
+    show_id: int,
+    limit: int,
+    after: int | None = None,
+) -> Sequence[Episode]:
+    """List the episodes of a show by number.
+
+    Args:
+        session (AsyncSession): Database session
+        show_id (int): Show to list the episodes of.
+        limit (int): Limit for pagination
+        after (int | None, optional): Only episodes with a higher number, the
+            last number of the previous page. Defaults to None, from the first.
+
+    Raises:
+        EntryNotFoundError: If the show doesn't exist.
+
+    Returns:
+        Sequence[Episode]: Episodes, in ascending number order.
+    """
+    statement = select(Episode).where(Episode.show_id == show_id)
+    if after is not None:
+        statement = statement.where(Episode.number > after)
+    statement = statement.order_by(Episode.number).limit(limit)  # type: ignore[arg-type]
+    episodes = (await session.execute(statement)).scalars().all()
+    if not episodes and not await _show_exists(session, show_id):
+        raise EntryNotFoundError(Show.__tablename__, show_id)
+    return episodes
+
+
+async def ingest_episodes(
+    session: AsyncSession,
+    show_id: int,
+    episodes: Sequence[EpisodeWrite],
+) -> int:
+    """Add episodes to a show, replacing those with the same number.
+
+    Args:
+        session (AsyncSession): Database session
+        show_id (int): Show the episodes are of.
+        episodes (Sequence[EpisodeWrite]): Episodes to write, at most
+            `MAX_BATCH`. The last of an episode number repeated in episodes wins.
+
+    Raises:
+        ValueError: If there are more than `MAX_BATCH` episodes.
+        EntryNotFoundError: If the show doesn't exist.
+
+    Returns:
+        int: Episodes written, unchanged episodes aren't.
+    """
+    if len(episodes) > MAX_BATCH:
+        msg = f"At most {MAX_BATCH} episodes can be written at once"
+        raise ValueError(msg)
+    # an upsert can't change the same row twice
+    latest = {episode.number: episode for episode in episodes}
+    ordered = [latest[number] for number in sorted(latest)]
+    result = await session.execute(
+        _UPSERT_EPISODES,
+        {
+            "show_id": show_id,
+            "numbers": [episode.number for episode in ordered],
+            "titles": [episode.title for episode in ordered],
+            "air_dates": [episode.air_date for episode in ordered],
+            "durations": [episode.duration for episode in ordered],
+        },
+    )
+    written: int = result.scalar_one()
+    if not written and not await _show_exists(session, show_id):
+        raise EntryNotFoundError(Show.__tablename__, show_id)
+    await session.commit()
+    return written
+
+
+async def import_episodes(conn: AsyncConnection, rows: Iterable[EpisodeRow]) -> int:
+    """Copy any number of episodes of any shows in, in the current transaction.
+
+    Rows go through `COPY` into a temporary table, then into `content.episodes`
+    with one upsert, so a whole airing schedule is written at once.
+
+    Args:
+        conn (AsyncConnection): Connection in a transaction, the caller commits.
+        rows (Iterable[EpisodeRow]): Episodes to write. Episodes of shows that
+            don't exist are skipped, the last of a repeated episode wins.
+
+    Returns:
+        int: Episodes written, unchanged episodes aren't.
+    """
+    await conn.execute(_CREATE_STAGING)
+    raw = await conn.get_raw_connection()
+    await raw.driver_connection.copy_records_to_table(  # type: ignore[union-attr]
+        "episode_staging",
+        records=rows,
+        columns=_EPISODE_COLUMNS,
+    )
+    written: int = (await conn.execute(_MERGE_STAGING)).scalar_one()
+    # dropped now rather than at commit, so a transaction can import again
+    await conn.execute(text("DROP TABLE episode_staging"))
+    return written
+
+
+async def _show_exists(session: AsyncSession, show_id: int) -> bool:
+    show_columns = Show.__table__.c  # type: ignore[attr-defined]
+    statement = select_columns(show_columns.show_id).where(
+        show_columns.show_id == show_id,
+    )
+    return (await session.execute(statement)).scalar_one_or_none() is not None
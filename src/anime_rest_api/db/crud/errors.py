@@ -48,6 +48,18 @@ class EntryNotFoundError(DatabaseError):
         self.add_note(f"Entry {entry_id} not found in {table}")
 
 
+class EntryExistsError(DatabaseError):
+    """Raised when an entry conflicts with one already in the database."""
+
+    entry_id: int | str
+
+    def __init__(self, table: str, entry_id: int | str) -> None:
+        """Initialize the error with the id of the conflicting entry."""
+        super().__init__(table, "CREATE")
+        self.entry_id = entry_id
+        self.add_note(f"Entry {entry_id} already exists in {table}")
+
+
 type Operation = Literal["CREATE", "READ", "UPDATE", "DELETE"]
 
 
@@ -0,0 +1,69 @@
+"""Background jobs as seen by the API, they are run by `anime_rest_api.worker`."""
+
+from collections.abc import Sequence
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlmodel import select
+
+from anime_rest_api.db.models.content import Job
+from anime_rest_api.db.models.content import JobCreate
+from anime_rest_api.db.models.content import JobStatus
+from anime_rest_api.db.models.content import JobType
+
+from .errors import EntryNotFoundError
+
+
+async def enqueue_job(session: AsyncSession, job: JobCreate) -> Job:
+    """Queue a job, it runs as soon as a worker has room for its type."""
+    db_job = Job.model_validate(job)
+    session.add(db_job)
+    await session.commit()
+    await session.refresh(db_job)
+    return db_job
+
+
+async def get_job(session: AsyncSession, job_id: int) -> Job:
+    """Get a job by its ID.
+
+    Raises:
+        EntryNotFoundError: If job_id does not exist in table.
+    """
+    job = await session.get(Job, job_id)
+    if job is None:
+        raise EntryNotFoundError(Job.__tablename__, job_id)
+    return job
+
+
+async def list_jobs(
+    session: AsyncSession,
+    limit: int,
+    *,
+    status: JobStatus | None = None,
+    job_type: JobType | None = None,
+    before: int | None = None,
+) -> Sequence[Job]:
+    """List jobs, newest first.
+
+    Args:
+        session (AsyncSession): Database session
+        limit (int): Limit for pagination
+        status (JobStatus | None, optional): Only jobs with this status.
+            Defaults to None, every job.
+        job_type (JobType | None, optional): Only jobs of this type. Defaults to
+            None, every job.
+        before (int | None, optional): Only jobs with a lower ID, the last ID of
+            the previous page. Defaults to None, starting at the newest.
+
+    Returns:
+        Sequence[Job]: Jobs, in descending ID order.
+    """
+    statement = select(Job)
+    if status is not None:
+        statement = statement.where(Job.status == status)
+    if job_type is not None:
+        statement = statement.where(Job.job_type == job_type)
+    if before is not None:
+        statement = statement.where(Job.job_id < before)  # type: ignore[operator]
+    statement = statement.order_by(Job.job_id.desc()).limit(limit)  # type: ignore[union-attr]
+    result = await session.execute(statement)
+    return result.scalars().all()
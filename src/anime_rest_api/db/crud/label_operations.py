@@ -0,0 +1,115 @@
+"""Genres, studios and tags of shows, written by name."""
+
+from collections.abc import Sequence
+from typing import NamedTuple
+
+from sqlalchemy import ColumnElement
+from sqlalchemy import Table
+from sqlalchemy import delete
+from sqlalchemy import func
+from sqlalchemy import literal
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from anime_rest_api.db.models.content import Genre
+from anime_rest_api.db.models.content import Show
+from anime_rest_api.db.models.content import ShowGenre
+from anime_rest_api.db.models.content import ShowStudio
+from anime_rest_api.db.models.content import ShowTag
+from anime_rest_api.db.models.content import Studio
+from anime_rest_api.db.models.content import Tag
+
+
+class _Label(NamedTuple):
+    table: Table
+    link: Table
+    key: str
+
+
+_LABELS: dict[str, _Label] = {
+    "genres": _Label(Genre.__table__, ShowGenre.__table__, "genre_id"),  # type: ignore[attr-defined]
+    "studios": _Label(Studio.__table__, ShowStudio.__table__, "studio_id"),  # type: ignore[attr-defined]
+    "tags": _Label(Tag.__table__, ShowTag.__table__, "tag_id"),  # type: ignore[attr-defined]
+}
+LABEL_FIELDS = set(_LABELS)
+"""`ShowRead` fields that hold the names of a relation of the show."""
+
+
+def label_names_column(field: str) -> ColumnElement:
+    """Names of a relation of each show, as a correlated array subquery.
+
+    Ordered like the relationships of `Show`, so rows and models match.
+    """
+    label = _LABELS[field]
+    show_ids = Show.__table__.c.show_id  # type: ignore[attr-defined]
+    names = (
+        select(label.table.c.name)
+        .join(label.link, label.link.c[label.key] == label.table.c[label.key])
+        .where(label.link.c.show_id == show_ids)
+        .order_by(label.table.c.name)
+        .correlate(Show.__table__)  # type: ignore[attr-defined]
+        .scalar_subquery()
+    )
+    return func.array(names)
+
+
+def genre_filter(genre: str) -> ColumnElement[bool]:
+    """Condition on `shows` for shows with the genre.
+
+    Goes through the `(genre_id, show_id)` index of `show_genres`.
+    """
+    label = _LABELS["genres"]
+    with_genre = (
+        select(label.link.c.show_id)
+        .join(label.table, label.link.c.genre_id == label.table.c.genre_id)
+        .where(label.table.c.name == genre)
+    )
+    return Show.__table__.c.show_id.in_(with_genre)  # type: ignore[attr-defined]
+
+
+async def set_show_labels(
+    session: AsyncSession,
+    show_id: int,
+    labels: dict[str, Sequence[str] | None],
+) -> None:
+    """Replace genres, studios or tags of a show in the current transaction.
+
+    Args:
+        session (AsyncSession): Database session
+        show_id (int): Show whose relations change.
+        labels (dict[str, Sequence[str] | None]): Names per field of
+            `LABEL_FIELDS`, None or a missing field leaves it as is. New names
+            are created.
+    """
+    for field, names in labels.items():
+        if names is None:
+            continue
+        label = _LABELS[field]
+        unique_names = sorted(set(names))
+        if unique_names:
+            await session.execute(
+                insert(label.table)
+                .values([{"name": name} for name in unique_names])
+                .on_conflict_do_nothing(index_elements=["name"]),
+            )
+        wanted = select(label.table.c[label.key]).where(
+            label.table.c.name.in_(unique_names),
+        )
+        await session.execute(
+            delete(label.link).where(
+                label.link.c.show_id == show_id,
+                label.link.c[label.key].not_in(wanted),
+            ),
+        )
+        if unique_names:
+            await session.execute(
+                insert(label.link)
+                .from_select(
+                    ["show_id", label.key],
+                    select(literal(show_id), label.table.c[label.key]).where(
+                        label.table.c.name.in_(unique_names),
+                    ),
+                )
+                .on_conflict_do_nothing(),
+            )
@@ -0,0 +1,301 @@
+"""Reviews of shows, and the per show aggregates every review write keeps current.
+
+Each write applies its change to `content.show_ratings` in its own transaction,
+as a delta of the review count, score sum and score histogram. Concurrent writes on
+the same show serialize on its aggregates row, reading a rating never scans reviews.
+"""
+
+from collections.abc import Sequence
+import datetime as dt
+
+from sqlalchemy import select as select_columns
+from sqlalchemy import text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlmodel import select
+
+from anime_rest_api.db.invalidation import INVALIDATION_BUS
+from anime_rest_api.db.invalidation import SHOWS_TOPIC
+from anime_rest_api.db.invalidation import notify_invalidation
+from anime_rest_api.db.models.content import Review
+from anime_rest_api.db.models.content import ReviewCreate
+from anime_rest_api.db.models.content import ReviewRead
+from anime_rest_api.db.models.content import ReviewUpdate
+from anime_rest_api.db.models.content import Show
+from anime_rest_api.db.models.content import ShowRating
+from anime_rest_api.db.models.content.reviews import MAX_SCORE
+
+from .errors import EntryExistsError
+from .errors import EntryNotFoundError
+from .errors import InvalidPermissionsError
+from .errors import Operation
+
+# an upsert, the first review of a show creates its row with the delta as values
+_APPLY_RATING_DELTA = text(
+    """
+    INSERT INTO content.show_ratings AS rating
+        (show_id, review_count, score_sum, histogram)
+    VALUES (:show_id, :review_count, :score_sum, CAST(:histogram AS integer[]))
+    ON CONFLICT (show_id) DO UPDATE SET
+        review_count = rating.review_count + excluded.review_count,
+        score_sum = rating.score_sum + excluded.score_sum,
+        histogram = ARRAY(
+            SELECT bucket.reviews + bucket.delta
+            FROM unnest(rating.histogram, excluded.histogram)
+                WITH ORDINALITY AS bucket(reviews, delta, score)
+            ORDER BY bucket.score
+        )
+    """,
+)
+
+
+async def apply_rating_delta(
+    session: AsyncSession,
+    show_id: int,
+    *,
+    added: int | None = None,
+    removed: int | None = None,
+) -> None:
+    """Update the aggregates of a show for a score added, removed or both.
+
+    Args:
+        session (AsyncSession): Database session, in the transaction of the write.
+        show_id (int): Show the review belongs to.
+        added (int | None, optional): Score of a new review, or the new score of
+            an updated one. Defaults to None.
+        removed (int | None, optional): Score of a deleted review, or the old score
+            of an updated one. Defaults to None.
+    """
+    histogram = [0] * MAX_SCORE
+    if added is not None:
+        histogram[added - 1] += 1
+    if removed is not None:
+        histogram[removed - 1] -= 1
+    await session.execute(
+        _APPLY_RATING_DELTA,
+        {
+            "show_id": show_id,
+            "review_count": (added is not None) - (removed is not None),
+            "score_sum": (added or 0) - (removed or 0),
+            "histogram": histogram,
+        },
+    )
+
+
+async def _commit_rating_change(session: AsyncSession, show_id: int) -> None:
+    """Commit, evicting the show whose rating changed from every worker's cache."""
+    await notify_invalidation(session, SHOWS_TOPIC, show_id)
+    await session.commit()
+    INVALIDATION_BUS.evict(SHOWS_TOPIC, show_id)
+
+
+async def _show_exists(session: AsyncSession, show_id: int) -> bool:
+    show_columns = Show.__table__.c  # type: ignore[attr-defined]
+    statement = select_columns(show_columns.show_id).where(
+        show_columns.show_id == show_id,
+    )
+    result = await session.execute(statement)
+    return result.scalar_one_or_none() is not None
+
+
+async def list_show_reviews(
+    session: AsyncSession,
+    show_id: int,
+    limit: int,
+    before: int | None = None,
+) -> Sequence[Review]:
+    """List the reviews of a show, newest first.
+
+    Args:
+        session (AsyncSession): Database session
+        show_id (int): Show to list the reviews of.
+        limit (int): Limit for pagination
+        before (int | None, optional): Only reviews with a lower ID, the last ID of
+            the previous page. Defaults to None, starting at the newest.
+
+    Returns:
+        Sequence[Review]: Reviews, in descending ID order.
+    """
+    statement = select(Review).where(Review.show_id == show_id)
+    if before is not None:
+        statement = statement.where(Review.review_id < before)  # type: ignore[operator]
+    statement = statement.order_by(Review.review_id.desc()).limit(limit)  # type: ignore[union-attr]
+    result = await session.execute(statement)
+    return result.scalars().all()
+
+
+async def get_review(session: AsyncSession, review_id: int) -> Review:
+    """Get a review by its ID.
+
+    Raises:
+        EntryNotFoundError: If review_id does not exist in table.
+    """
+    review = await session.get(Review, review_id)
+    if review is None:
+        raise EntryNotFoundError(Review.__tablename__, review_id)
+    return review
+
+
+async def get_show_rating(session: AsyncSession, show_id: int) -> ShowRating:
+    """Get the aggregates of the reviews of a show.
+
+    Raises:
+        EntryNotFoundError: If show_id does not exist.
+
+    Returns:
+        ShowRating: Aggregates of the show, all zero when it has no reviews yet.
+    """
+    rating = await session.get(ShowRating, show_id)
+    if rating is not None:
+        return rating
+    if not await _show_exists(session, show_id):
+        raise EntryNotFoundError(Show.__tablename__, show_id)
+    return ShowRating(
+        show_id=show_id,
+        review_count=0,
+        score_sum=0,
+        histogram=[0] * MAX_SCORE,
+    )
+
+
+async def create_review(
+    session: AsyncSession,
+    show_id: int,
+    user_id: int,
+    review: ReviewCreate,
+) -> ReviewRead:
+    """Create the review of a show by a user, and count it in the show's rating.
+
+    Args:
+        session (AsyncSession): Database session
+        show_id (int): Show being reviewed.
+        user_id (int): User writing the review.
+        review (ReviewCreate): Score and body of the review.
+
+    Raises:
+        EntryNotFoundError: If show_id does not exist.
+        EntryExistsError: If the user already reviewed the show.
+
+    Returns:
+        ReviewRead: Review created with its id
+    """
+    if not await _show_exists(session, show_id):
+        raise EntryNotFoundError(Show.__tablename__, show_id)
+    statement = (
+        insert(Review)
+        .values(show_id=show_id, user_id=user_id, score=review.score, body=review.body)
+        .on_conflict_do_nothing(index_elements=["user_id", "show_id"])
+        .returning(Review)
+    )
+    result = await session.execute(statement)
+    inserted = result.scalars().first()
+    if inserted is None:
+        raise EntryExistsError(Review.__tablename__, f"{user_id}/{show_id}")
+    await apply_rating_delta(session, show_id, added=review.score)
+    created = ReviewRead.model_validate(inserted)
+    await _commit_rating_change(session, show_id)
+    return created
+
+
+async def _get_own_review_for_update(
+    session: AsyncSession,
+    review_id: int,
+    user_id: int,
+    *,
+    is_admin: bool,
+    operation: Operation,
+) -> Review:
+    """Lock a review, checking the user may change it."""
+    statement = select(Review).where(Review.review_id == review_id).with_for_update()
+    result = await session.execute(statement)
+    review = result.scalars().first()
+    if review is None:
+        raise EntryNotFoundError(Review.__tablename__, review_id)
+    if review.user_id != user_id and not is_admin:
+        raise InvalidPermissionsError(Review.__tablename__, operation, user_id)
+    return review
+
+
+async def update_review(
+    session: AsyncSession,
+    review_id: int,
+    review_update: ReviewUpdate,
+    user_id: int,
+) -> ReviewRead:
+    """Update a review with only the fields that are set.
+
+    Args:
+        session (AsyncSession): Database session
+        review_id (int): Review ID to update
+        review_update (ReviewUpdate): Wrapper of fields to set for the Review
+        user_id (int): User making the request, only the author can update it.
+
+    Raises:
+        EntryNotFoundError: If review_id does not exist in table.
+        InvalidPermissionsError: If the user isn't the author of the review.
+
+    Returns:
+        ReviewRead: Updated review
+    """
+    review = await _get_own_review_for_update(
+        session,
+        review_id,
+        user_id,
+        is_admin=False,
+        operation="UPDATE",
+    )
+    old_score = review.score
+    review.sqlmodel_update(review_update.model_dump(exclude_unset=True))
+    review.updated_at = dt.datetime.now(tz=dt.UTC)
+    session.add(review)
+    await session.flush()
+    updated = ReviewRead.model_validate(review)
+    if review.score == old_score:
+        await session.commit()
+        return updated
+    await apply_rating_delta(
+        session,
+        review.show_id,
+        added=review.score,
+        removed=old_score,
+    )
+    await _commit_rating_change(session, review.show_id)
+    return updated
+
+
+async def delete_review(
+    session: AsyncSession,
+    review_id: int,
+    user_id: int,
+    *,
+    is_admin: bool = False,
+) -> ReviewRead:
+    """Delete a review, and remove it from the show's rating.
+
+    Args:
+        session (AsyncSession): Database session.
+        review_id (int): ID of the review to delete.
+        user_id (int): User making the request.
+        is_admin (bool, optional): Whether the user can delete any review.
+            Defaults to False, only their own.
+
+    Raises:
+        EntryNotFoundError: If review with ID does not exist.
+        InvalidPermissionsError: If the user can't delete the review.
+
+    Returns:
+        ReviewRead: Review that was deleted
+    """
+    review = await _get_own_review_for_update(
+        session,
+        review_id,
+        user_id,
+        is_admin=is_admin,
+        operation="DELETE",
+    )
+    deleted = ReviewRead.model_validate(review)
+    await session.delete(review)
+    await session.flush()
+    await apply_rating_delta(session, deleted.show_id, removed=deleted.score)
+    await _commit_rating_change(session, deleted.show_id)
+    return deleted
@@ -1,24 +1,223 @@
 from collections.abc import Sequence
+from itertools import chain
+import os
 
+from sqlalchemy import ColumnElement
+from sqlalchemy import Float
+from sqlalchemy import Integer
+from sqlalchemy import RowMapping
+from sqlalchemy import Text
+from sqlalchemy import cast
+from sqlalchemy import func
+from sqlalchemy import literal
+from sqlalchemy import literal_column
+from sqlalchemy import select as select_columns
+from sqlalchemy.dialects.postgresql import aggregate_order_by
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlmodel import select
 
+from anime_rest_api.db.cache import TtlCache
+from anime_rest_api.db.invalidation import INVALIDATION_BUS
+from anime_rest_api.db.invalidation import SHOWS_TOPIC
+from anime_rest_api.db.invalidation import SHOW_LISTINGS_TOPIC
+from anime_rest_api.db.invalidation import notify_invalidation
 from anime_rest_api.db.models.content import Show
 from anime_rest_api.db.models.content import ShowCreate
+from anime_rest_api.db.models.content import ShowRating
+from anime_rest_api.db.models.content import ShowRead
 from anime_rest_api.db.models.content import ShowUpdate
 
+from .count_operations import EXACT_COUNTS
+from .count_operations import CountMode
+from .count_operations import count_rows
 from .errors import EntryNotFoundError
+from .label_operations import LABEL_FIELDS
+from .label_operations import genre_filter
+from .label_operations import label_names_column
+from .label_operations import set_show_labels
+from .watchlist_operations import remove_show_from_watchlists
 
+_SHOW_CACHE_TTL = float(os.getenv("ANIME_API_SHOW_CACHE_TTL", "60"))
+SHOW_CACHE: TtlCache[int, ShowRead] = TtlCache(ttl=_SHOW_CACHE_TTL, max_size=4096)
+"""Shows recently read by ID, evicted across workers when a show changes."""
 
-async def list_shows(session: AsyncSession, offset: int, limit: int) -> Sequence[Show]:
-    """List shows."""
+INVALIDATION_BUS.subscribe(
+    SHOWS_TOPIC,
+    lambda key: SHOW_CACHE.invalidate(int(key)),
+    SHOW_CACHE.clear,
+)
+# creating, deleting or relabeling a show changes the totals of the listing,
+# a new review of a show doesn't
+INVALIDATION_BUS.subscribe(
+    SHOW_LISTINGS_TOPIC,
+    lambda _key: EXACT_COUNTS.clear(),
+    EXACT_COUNTS.clear,
+)
+
+_SHOW_COLUMNS = Show.__table__.c  # type: ignore[attr-defined]
+_RATING_COLUMNS = ShowRating.__table__.c  # type: ignore[attr-defined]
+_SHOWS_WITH_RATINGS = Show.__table__.outerjoin(ShowRating.__table__)  # type: ignore[attr-defined]
+# `ShowRead` fields that come from the aggregates of the reviews of a show
+_RATING_FIELDS: dict[str, ColumnElement] = {
+    "average_rating": (
+        cast(_RATING_COLUMNS.score_sum, Float)
+        / cast(func.nullif(_RATING_COLUMNS.review_count, 0), Float)
+    ),
+    "review_count": func.coalesce(_RATING_COLUMNS.review_count, 0),
+}
+
+
+def _show_field_column(name: str) -> ColumnElement:
+    if name in _RATING_FIELDS:
+        return _RATING_FIELDS[name].label(name)
+    if name in LABEL_FIELDS:
+        return label_names_column(name).label(name)
+    return _SHOW_COLUMNS[name]
+
+
+def _show_field_columns(fields: Sequence[str]) -> list[ColumnElement]:
+    """Columns of `_SHOWS_WITH_RATINGS` for `ShowRead` field names."""
+    return [_show_field_column(name) for name in fields]
+
+
+async def list_shows(
+    session: AsyncSession,
+    offset: int,
+    limit: int,
+    *,
+    genre: str | None = None,
+) -> Sequence[Show]:
+    """List shows, only those with genre when given.
+
+    Genres, studios and tags are loaded for the whole page at once, a page takes
+    the same number of statements whatever its size.
+    """
     # issue here where mypy detects that the column is int | None
     # but the database version is int
     statement = select(Show).order_by(Show.show_id).offset(offset).limit(limit)  # type: ignore[arg-type]
+    if genre is not None:
+        statement = statement.where(genre_filter(genre))
     result = await session.execute(statement)
     return result.scalars().all()
 
 
+async def list_show_fields(
+    session: AsyncSession,
+    fields: Sequence[str],
+    offset: int,
+    limit: int,
+    *,
+    genre: str | None = None,
+) -> Sequence[RowMapping]:
+    """List only the given columns of shows.
+
+    Args:
+        session (AsyncSession): Database session
+        fields (Sequence[str]): Column names to select, already validated.
+        offset (int): Offset for pagination
+        limit (int): Limit for pagination
+        genre (str | None, optional): Only shows with this genre. Defaults to
+            None, every show.
+
+    Returns:
+        Sequence[RowMapping]: One mapping of column name to value per show.
+    """
+    statement = (
+        select_columns(*_show_field_columns(fields))
+        .select_from(_SHOWS_WITH_RATINGS)
+        .order_by(_SHOW_COLUMNS.show_id)
+        .offset(offset)
+        .limit(limit)
+    )
+    if genre is not None:
+        statement = statement.where(genre_filter(genre))
+    result = await session.execute(statement)
+    return result.mappings().all()
+
+
+async def render_show_page_json(  # noqa: PLR0913
+    session: AsyncSession,
+    fields: Sequence[str],
+    offset: int,
+    limit: int,
+    total: int | None = None,
+    *,
+    genre: str | None = None,
+) -> str:
+    """Have Postgres render a whole page of shows as a JSON response body.
+
+    The body has the same shape as `PartialShowResponseList` dumped by alias, so
+    routes can send it as is without building any Python objects per show.
+
+    Args:
+        session (AsyncSession): Database session
+        fields (Sequence[str]): Column names to include per show, already validated.
+        offset (int): Offset for pagination
+        limit (int): Limit for pagination, one extra row is read for `hasMore`.
+        total (int | None, optional): Value for the `total` key. Defaults to None.
+        genre (str | None, optional): Only shows with this genre. Defaults to
+            None, every show.
+
+    Returns:
+        str: JSON text of the page.
+    """
+    page_statement = (
+        select_columns(
+            _SHOW_COLUMNS.show_id.label("page_order"),
+            *_show_field_columns(fields),
+        )
+        .select_from(_SHOWS_WITH_RATINGS)
+        .order_by(_SHOW_COLUMNS.show_id)
+        .offset(offset)
+        .limit(limit + 1)
+    )
+    if genre is not None:
+        page_statement = page_statement.where(genre_filter(genre))
+    page = page_statement.subquery("page")
+    numbered = select_columns(
+        page,
+        func.row_number().over(order_by=page.c.page_order).label("page_position"),
+    ).subquery("numbered")
+    # keys are validated field names, inline them so they aren't untyped parameters
+    show_object = func.json_build_object(
+        *chain.from_iterable(
+            (literal_column(f"'{name}'"), numbered.c[name]) for name in fields
+        ),
+    )
+    shows = func.coalesce(
+        func.json_agg(aggregate_order_by(show_object, numbered.c.page_order)).filter(
+            numbered.c.page_position <= limit,
+        ),
+        literal_column("'[]'::json"),
+    )
+    body = func.json_build_object(
+        literal_column("'hasMore'"),
+        func.count() > limit,
+        literal_column("'total'"),
+        cast(literal(total), Integer),
+        literal_column("'shows'"),
+        shows,
+        literal_column("'count'"),
+        func.least(func.count(), limit),
+    )
+    statement = select_columns(cast(body, Text)).select_from(numbered)
+    result = await session.execute(statement)
+    return result.scalar_one()
+
+
+async def count_shows(
+    session: AsyncSession,
+    mode: CountMode,
+    *,
+    genre: str | None = None,
+) -> int:
+    """Count all shows, or those with genre, exactly or from planner statistics."""
+    statement = select(Show)
+    if genre is not None:
+        statement = statement.where(genre_filter(genre))
+    return await count_rows(session, statement, mode)
+
+
 async def get_show(session: AsyncSession, show_id: int) -> Show | None:
     """Get a show by its ID."""
     statement = select(Show).where(Show.show_id == show_id)
@@ -26,12 +225,52 @@ async def get_show(session: AsyncSession, show_id: int) -> Show | None:
     return result.scalars().first()
 
 
+async def get_show_fields(
+    session: AsyncSession,
+    show_id: int,
+    fields: Sequence[str],
+) -> RowMapping | None:
+    """Get only the given columns of a show by its ID."""
+    statement = (
+        select_columns(*_show_field_columns(fields))
+        .select_from(_SHOWS_WITH_RATINGS)
+        .where(_SHOW_COLUMNS.show_id == show_id)
+    )
+    result = await session.execute(statement)
+    return result.mappings().first()
+
+
+async def get_show_cached(session: AsyncSession, show_id: int) -> ShowRead | None:
+    """Get a show by its ID, served from `SHOW_CACHE` when possible."""
+    cached = SHOW_CACHE.get(show_id)
+    if cached is not None:
+        return cached
+    show = await get_show(session, show_id)
+    if show is None:
+        return None
+    show_read = ShowRead.model_validate(show)
+    SHOW_CACHE.set(show_id, show_read)
+    return show_read
+
+
 async def create_show(session: AsyncSession, show: ShowCreate) -> Show:
     """Create a show."""
-    session.add(show)
+    db_show = Show.model_validate(show.model_dump(exclude=LABEL_FIELDS))
+    session.add(db_show)
+    # flush to get the generated ID for the notification
+    await session.flush()
+    await set_show_labels(
+        session,
+        db_show.show_id,  # type: ignore[arg-type]
+        show.model_dump(include=LABEL_FIELDS),
+    )
+    await notify_invalidation(session, SHOWS_TOPIC, db_show.show_id)  # type: ignore[arg-type]
+    await notify_invalidation(session, SHOW_LISTINGS_TOPIC, db_show.show_id)  # type: ignore[arg-type]
     await session.commit()
-    await session.refresh(show)
-    return show  # type: ignore[return-value]
+    await session.refresh(db_show)
+    INVALIDATION_BUS.evict(SHOWS_TOPIC, db_show.show_id)  # type: ignore[arg-type]
+    INVALIDATION_BUS.evict(SHOW_LISTINGS_TOPIC, db_show.show_id)  # type: ignore[arg-type]
+    return db_show
 
 
 async def update_show(session: AsyncSession, show_id: int, show: ShowUpdate) -> Show:
@@ -51,10 +290,18 @@ async def update_show(session: AsyncSession, show_id: int, show: ShowUpdate) ->
     db_show = await get_show(session, show_id)
     if db_show is None:
         raise EntryNotFoundError(Show.__tablename__, show_id)
-    db_show.sqlmodel_update(show.model_dump(exclude_unset=True))
+    db_show.sqlmodel_update(show.model_dump(exclude_unset=True, exclude=LABEL_FIELDS))
     session.add(db_show)
+    labels = show.model_dump(exclude_unset=True, include=LABEL_FIELDS)
+    await set_show_labels(session, show_id, labels)
+    await notify_invalidation(session, SHOWS_TOPIC, show_id)
+    if labels:
+        await notify_invalidation(session, SHOW_LISTINGS_TOPIC, show_id)
     await session.commit()
     await session.refresh(db_show)
+    INVALIDATION_BUS.evict(SHOWS_TOPIC, show_id)
+    if labels:
+        INVALIDATION_BUS.evict(SHOW_LISTINGS_TOPIC, show_id)
     return db_show
 
 
@@ -74,6 +321,11 @@ async def delete_show(session: AsyncSession, show_id: int) -> Show:
     show = await get_show(session, show_id)
     if show is None:
         raise EntryNotFoundError(Show.__tablename__, show_id)
+    await remove_show_from_watchlists(session, show_id)
     await session.delete(show)
+    await notify_invalidation(session, SHOWS_TOPIC, show_id)
+    await notify_invalidation(session, SHOW_LISTINGS_TOPIC, show_id)
     await session.commit()
+    INVALIDATION_BUS.evict(SHOWS_TOPIC, show_id)
+    INVALIDATION_BUS.evict(SHOW_LISTINGS_TOPIC, show_id)
     return show
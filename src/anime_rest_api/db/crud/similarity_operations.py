@@ -0,0 +1,53 @@
+"""Reads of the similar shows precomputed by `anime_rest_api.db.similarity`."""
+
+import os
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlmodel import select
+
+from anime_rest_api.db.models.content import Show
+from anime_rest_api.db.models.content import ShowSimilarity
+from anime_rest_api.db.models.content import SimilarShowRead
+
+from .errors import EntryNotFoundError
+
+SIMILAR_SHOWS_K = int(os.getenv("ANIME_API_SIMILAR_SHOWS_K", "20"))
+"""Similar shows precomputed and kept per show."""
+
+
+async def list_similar_shows(
+    session: AsyncSession,
+    show_id: int,
+    limit: int,
+) -> list[SimilarShowRead]:
+    """List the shows most similar to a show, most similar first.
+
+    Args:
+        session (AsyncSession): Database session
+        show_id (int): Show to find similar shows of.
+        limit (int): Most shows to return, at most `SIMILAR_SHOWS_K` are kept.
+
+    Raises:
+        EntryNotFoundError: If the show doesn't exist.
+
+    Returns:
+        list[SimilarShowRead]: Similar shows with their similarity score, empty
+            until the similar shows of the show are computed.
+    """
+    statement = (
+        select(Show, ShowSimilarity.score)
+        .join(
+            ShowSimilarity,
+            ShowSimilarity.similar_show_id == Show.show_id,  # type: ignore[arg-type]
+        )
+        .where(ShowSimilarity.show_id == show_id)
+        .order_by(ShowSimilarity.rank)  # type: ignore[arg-type]
+        .limit(limit)
+    )
+    rows = (await session.execute(statement)).all()
+    if not rows and await session.get(Show, show_id) is None:
+        raise EntryNotFoundError("shows", show_id)
+    return [
+        SimilarShowRead.model_validate(show, update={"score": score})
+        for show, score in rows
+    ]
@@ -3,21 +3,36 @@ from collections.abc import Sequence
 from sqlalchemy import ColumnElement
 from sqlalchemy import Function
 from sqlalchemy import Result
+from sqlalchemy import RowMapping
 from sqlalchemy import func
 from sqlalchemy import insert
+from sqlalchemy import select as select_columns
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlmodel import and_
 from sqlmodel import select
 
+from anime_rest_api.db.invalidation import INVALIDATION_BUS
+from anime_rest_api.db.invalidation import USERS_TOPIC
+from anime_rest_api.db.invalidation import notify_invalidation
 from anime_rest_api.db.models.auth import User
 from anime_rest_api.db.models.auth import UserRead
 from anime_rest_api.db.models.auth.user import UserCreate
 from anime_rest_api.db.models.auth.user import UserUpdate
 
+from .count_operations import EXACT_COUNTS
+from .count_operations import CountMode
+from .count_operations import count_rows
 from .errors import EntryNotFoundError
 from .errors import InvalidPermissionsError
 from .errors import UnexpectedDbError
 
+# deleting a user changes the totals of the listing
+INVALIDATION_BUS.subscribe(
+    USERS_TOPIC,
+    lambda _key: EXACT_COUNTS.clear(),
+    EXACT_COUNTS.clear,
+)
+
 
 def password_salt_hash_statement(password: str) -> Function:
     """Create a statement to hash a password with a salt.
@@ -71,6 +86,39 @@ async def list_users(
     return result.scalars().all()
 
 
+async def list_user_fields(
+    session: AsyncSession,
+    fields: Sequence[str],
+    offset: int,
+    limit: int,
+) -> Sequence[RowMapping]:
+    """List only the given columns of users.
+
+    Args:
+        session (AsyncSession): Database session
+        fields (Sequence[str]): Column names to select, already validated.
+        offset (int): Offset for pagination
+        limit (int): Limit for pagination
+
+    Returns:
+        Sequence[RowMapping]: One mapping of column name to value per user.
+    """
+    columns = User.__table__.c  # type: ignore[attr-defined]
+    statement = (
+        select_columns(*(columns[name] for name in fields))
+        .order_by(columns.user_id)
+        .offset(offset)
+        .limit(limit)
+    )
+    result = await session.execute(statement)
+    return result.mappings().all()
+
+
+async def count_users(session: AsyncSession, mode: CountMode) -> int:
+    """Count all users, exactly or from planner statistics."""
+    return await count_rows(session, select(User), mode)
+
+
 async def get_user(
     session: AsyncSession,
     user_id: int,
@@ -213,8 +261,10 @@ async def update_user(
         )
     db_user.sqlmodel_update(updated_fields)
     session.add(db_user)
+    await notify_invalidation(session, USERS_TOPIC, user_id)
     await session.commit()
     await session.refresh(db_user)
+    INVALIDATION_BUS.evict(USERS_TOPIC, user_id)
     return db_user
 
 
@@ -235,7 +285,9 @@ async def delete_user(session: AsyncSession, user_id: int) -> UserRead:
     if db_user is None:
         raise EntryNotFoundError(User.__tablename__, user_id)
     await session.delete(db_user)
+    await notify_invalidation(session, USERS_TOPIC, user_id)
     await session.commit()
+    INVALIDATION_BUS.evict(USERS_TOPIC, user_id)
     return db_user
 
 
@@ -260,6 +312,8 @@ async def increment_user_session_version(
         raise EntryNotFoundError(User.__tablename__, user_id)
     db_user.session_version += 1
     session.add(db_user)
+    await notify_invalidation(session, USERS_TOPIC, user_id)
     await session.commit()
     await session.refresh(db_user)
+    INVALIDATION_BUS.evict(USERS_TOPIC, user_id)
     return db_user
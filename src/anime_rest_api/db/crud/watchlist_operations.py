@@ -0,0 +1,251 @@
+"""Watchlists of users, written in bulk with their per status counts.
+
+A bulk write is one statement: the entries are passed as arrays, upserted or
+deleted, and the difference they make to each status is applied to
+`content.watchlist_counts` by the same statement. Writes of a user are serialized
+by an advisory lock, so the previous status of every entry is the one counted.
+"""
+
+from collections.abc import Sequence
+import datetime as dt
+
+from sqlalchemy import text
+from sqlalchemy import tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlmodel import select
+
+from anime_rest_api.db.models.content import WatchStatus
+from anime_rest_api.db.models.content import WatchlistCount
+from anime_rest_api.db.models.content import WatchlistCounts
+from anime_rest_api.db.models.content import WatchlistEntry
+from anime_rest_api.db.models.content import WatchlistEntryWrite
+
+MAX_BATCH = 1000
+"""Most entries written by one statement."""
+
+# first key of the advisory locks of watchlists, the second is the user ID
+_LOCK_CLASS = 42_001
+
+_LOCK_USER = text("SELECT pg_advisory_xact_lock(:lock_class, :user_id)")
+
+# the counts are updated by a data modifying CTE, which runs even if unreferenced
+_COUNT_DELTAS = """
+counted AS (
+    INSERT INTO content.watchlist_counts AS counts (user_id, status, entries)
+    SELECT :user_id, status, sum(delta)
+    FROM deltas
+    GROUP BY status
+    ON CONFLICT (user_id, status) DO UPDATE
+        SET entries = counts.entries + excluded.entries
+)
+"""
+
+_UPSERT_ENTRIES = text(
+    f"""
+    WITH incoming AS (
+        -- shows that don't exist are skipped, instead of failing the batch
+        SELECT batch.show_id, batch.status, batch.progress
+        FROM unnest(
+            CAST(:show_ids AS integer[]),
+            CAST(:statuses AS content.watchstatus[]),
+            CAST(:progress AS integer[])
+        ) AS batch(show_id, status, progress)
+        JOIN content.shows USING (show_id)
+    ),
+    previous AS (
+        SELECT entry.status
+        FROM content.watchlist_entries AS entry
+        JOIN incoming USING (show_id)
+        WHERE entry.user_id = :user_id
+    ),
+    upserted AS (
+        INSERT INTO content.watchlist_entries AS entry
+            (user_id, show_id, status, progress, updated_at)
+        SELECT :user_id, show_id, status, progress, now()
+        FROM incoming
+        ON CONFLICT (user_id, show_id) DO UPDATE SET
+            status = excluded.status,
+            progress = excluded.progress,
+            updated_at = excluded.updated_at
+        RETURNING entry.status
+    ),
+    deltas AS (
+        SELECT status, 1 AS delta FROM upserted
+        UNION ALL
+        SELECT status, -1 AS delta FROM previous
+    ),
+    {_COUNT_DELTAS}
+    SELECT count(*) FROM upserted
+    """,  # noqa: S608
+)
+
+_DELETE_ENTRIES = text(
+    f"""
+    WITH removed AS (
+        DELETE FROM content.watchlist_entries
+        WHERE user_id = :user_id AND show_id = ANY(CAST(:show_ids AS integer[]))
+        RETURNING status
+    ),
+    deltas AS (
+        SELECT status, -1 AS delta FROM removed
+    ),
+    {_COUNT_DELTAS}
+    SELECT count(*) FROM removed
+    """,  # noqa: S608
+)
+
+_REMOVE_SHOW = text(
+    """
+    WITH removed AS (
+        DELETE FROM content.watchlist_entries
+        WHERE show_id = :show_id
+        RETURNING user_id, status
+    )
+    UPDATE content.watchlist_counts AS counts
+    SET entries = counts.entries - removed_counts.entries
+    FROM (
+        SELECT user_id, status, count(*) AS entries
+        FROM removed
+        GROUP BY user_id, status
+    ) AS removed_counts
+    WHERE counts.user_id = removed_counts.user_id
+        AND counts.status = removed_counts.status
+    """,
+)
+
+
+async def _lock_user(session: AsyncSession, user_id: int) -> None:
+    await session.execute(_LOCK_USER, {"lock_class": _LOCK_CLASS, "user_id": user_id})
+
+
+async def upsert_watchlist_entries(
+    session: AsyncSession,
+    user_id: int,
+    entries: Sequence[WatchlistEntryWrite],
+) -> int:
+    """Add shows to the watchlist of a user, replacing entries already there.
+
+    Args:
+        session (AsyncSession): Database session
+        user_id (int): User whose watchlist changes.
+        entries (Sequence[WatchlistEntryWrite]): Entries to write, at most
+            `MAX_BATCH`. The last entry of a show repeated in entries wins.
+
+    Raises:
+        ValueError: If there are more than `MAX_BATCH` entries.
+
+    Returns:
+        int: Entries written, shows that don't exist are skipped.
+    """
+    if len(entries) > MAX_BATCH:
+        msg = f"At most {MAX_BATCH} entries can be written at once"
+        raise ValueError(msg)
+    # an upsert can't change the same row twice
+    latest = {entry.show_id: entry for entry in entries}
+    if not latest:
+        return 0
+    await _lock_user(session, user_id)
+    result = await session.execute(
+        _UPSERT_ENTRIES,
+        {
+            "user_id": user_id,
+            "show_ids": list(latest),
+            "statuses": [entry.status.value for entry in latest.values()],
+            "progress": [entry.progress for entry in latest.values()],
+        },
+    )
+    written: int = result.scalar_one()
+    await session.commit()
+    return written
+
+
+async def delete_watchlist_entries(
+    session: AsyncSession,
+    user_id: int,
+    show_ids: Sequence[int],
+) -> int:
+    """Remove shows from the watchlist of a user.
+
+    Args:
+        session (AsyncSession): Database session
+        user_id (int): User whose watchlist changes.
+        show_ids (Sequence[int]): Shows to remove, at most `MAX_BATCH`.
+
+    Raises:
+        ValueError: If there are more than `MAX_BATCH` shows.
+
+    Returns:
+        int: Entries removed.
+    """
+    if len(show_ids) > MAX_BATCH:
+        msg = f"At most {MAX_BATCH} entries can be removed at once"
+        raise ValueError(msg)
+    if not show_ids:
+        return 0
+    await _lock_user(session, user_id)
+    result = await session.execute(
+        _DELETE_ENTRIES,
+        {"user_id": user_id, "show_ids": list(set(show_ids))},
+    )
+    removed: int = result.scalar_one()
+    await session.commit()
+    return removed
+
+
+async def remove_show_from_watchlists(session: AsyncSession, show_id: int) -> None:
+    """Remove a show from every watchlist in the current transaction.
+
+    Deleting the show cascades to its entries, but not to the counts.
+    """
+    await session.execute(_REMOVE_SHOW, {"show_id": show_id})
+
+
+async def list_watchlist_entries(
+    session: AsyncSession,
+    user_id: int,
+    limit: int,
+    *,
+    status: WatchStatus | None = None,
+    after: tuple[dt.datetime, int] | None = None,
+) -> Sequence[WatchlistEntry]:
+    """List the watchlist of a user, most recently updated first.
+
+    Args:
+        session (AsyncSession): Database session
+        user_id (int): User whose watchlist is listed.
+        limit (int): Limit for pagination
+        status (WatchStatus | None, optional): Only entries with this status.
+            Defaults to None, every entry.
+        after (tuple[dt.datetime, int] | None, optional): `updated_at` and
+            `show_id` of the last entry of the previous page. Defaults to None,
+            starting at the most recent.
+
+    Returns:
+        Sequence[WatchlistEntry]: Entries, by descending `updated_at` and `show_id`.
+    """
+    statement = select(WatchlistEntry).where(WatchlistEntry.user_id == user_id)
+    if status is not None:
+        statement = statement.where(WatchlistEntry.status == status)
+    if after is not None:
+        statement = statement.where(
+            tuple_(WatchlistEntry.updated_at, WatchlistEntry.show_id) < after,
+        )
+    statement = statement.order_by(
+        WatchlistEntry.updated_at.desc(),  # type: ignore[union-attr]
+        WatchlistEntry.show_id.desc(),  # type: ignore[attr-defined]
+    ).limit(limit)
+    result = await session.execute(statement)
+    return result.scalars().all()
+
+
+async def count_watchlist_entries(
+    session: AsyncSession,
+    user_id: int,
+) -> WatchlistCounts:
+    """Count the watchlist entries of a user per status, from the kept counts."""
+    statement = select(WatchlistCount.status, WatchlistCount.entries).where(
+        WatchlistCount.user_id == user_id,
+    )
+    result = await session.execute(statement)
+    counts = {str(status): entries for status, entries in result.all()}
+    return WatchlistCounts(**counts, total=sum(counts.values()))
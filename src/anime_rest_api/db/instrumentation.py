@@ -0,0 +1,313 @@
+"""Slow query log for every statement run through our engine.
+
+Statements are timed with engine events. The ones over the threshold are logged
+with their normalized SQL, the shape of their parameters and the CRUD functions
+that ran them, and aggregated per fingerprint for the admin endpoint. A sample of
+slow `SELECT`s can be run again with `EXPLAIN (ANALYZE, BUFFERS)` in the background,
+with the values of their parameters removed from the plan kept.
+"""
+
+import asyncio
+from collections.abc import Sequence
+from contextvars import ContextVar
+import logging
+import os
+import random
+import re
+import sys
+import time
+from typing import Any
+
+import greenlet  # type: ignore[import-untyped]
+from pydantic import BaseModel
+from pydantic import computed_field
+from sqlalchemy import event
+from sqlalchemy.engine import Connection
+from sqlalchemy.engine import ExecutionContext
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+LOG = logging.getLogger(f"anime-api.{__name__}")
+
+_CRUD_PACKAGE = "anime_rest_api.db.crud"
+_START_ATTRIBUTE = "_anime_api_started_at"
+_EXPLAINING: ContextVar[bool] = ContextVar("_EXPLAINING", default=False)
+
+__all__ = [
+    "SLOW_QUERY_LOG",
+    "SlowQueryLog",
+    "SlowQueryStat",
+    "crud_operations",
+    "fingerprint",
+    "parameters_shape",
+    "redact_plan",
+]
+
+_NORMALIZERS = (
+    (re.compile(r"'(?:[^']|'')*'"), "?"),  # string literals
+    (re.compile(r"\$\d+(?:::[A-Z ]+(?:\[\])?)?"), "?"),  # asyncpg placeholders
+    (re.compile(r"\b\d+(?:\.\d+)?\b"), "?"),  # number literals
+    (re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)"), "(?, ...)"),  # IN lists
+    (re.compile(r"\s+"), " "),
+)
+
+
+def fingerprint(statement: str) -> str:
+    """Normalize a statement so executions with other values group together.
+
+    >>> fingerprint("SELECT * FROM t WHERE id IN ($1::INTEGER, $2::INTEGER)  LIMIT 10")
+    'SELECT * FROM t WHERE id IN (?, ...) LIMIT ?'
+    >>> fingerprint("SELECT 'it''s' AS name")
+    'SELECT ? AS name'
+    """
+    for pattern, replacement in _NORMALIZERS:
+        statement = pattern.sub(replacement, statement)
+    return statement.strip()
+
+
+_PLAN_LITERALS = (
+    (re.compile(r"'(?:[^']|'')*'"), "?"),  # string, array and date constants
+    # number constants compared to, estimates and timings are `name=number`
+    (re.compile(r"(?<=[=<>] )-?\d+(?:\.\d+)?\b"), "?"),
+)
+
+
+def redact_plan(plan: str) -> str:
+    """Remove the constants of a plan, the values of parameters among them.
+
+    >>> redact_plan("Filter: ((username = 'ann'::text) AND (user_id > 7))")
+    'Filter: ((username = ?::text) AND (user_id > ?))'
+    >>> redact_plan("Seq Scan on users  (cost=0.00..1.05 rows=1 width=4)")
+    'Seq Scan on users  (cost=0.00..1.05 rows=1 width=4)'
+    """
+    for pattern, replacement in _PLAN_LITERALS:
+        plan = pattern.sub(replacement, plan)
+    return plan
+
+
+def parameters_shape(parameters: Any, *, executemany: bool = False) -> str:  # noqa: ANN401
+    """Describe parameters by their types only, never their values.
+
+    >>> parameters_shape((1, "a", None))
+    '(int, str, NoneType)'
+    >>> parameters_shape([(1,), (2,)], executemany=True)
+    '2 x (int)'
+    """
+    if executemany:
+        rows = list(parameters)
+        first = parameters_shape(rows[0]) if rows else "()"
+        return f"{len(rows)} x {first}"
+    if isinstance(parameters, dict):
+        types = ", ".join(
+            f"{key}: {type(value).__name__}" for key, value in parameters.items()
+        )
+        return f"{{{types}}}"
+    if isinstance(parameters, Sequence) and not isinstance(parameters, str):
+        return f"({', '.join(type(value).__name__ for value in parameters)})"
+    return type(parameters).__name__
+
+
+def crud_operations() -> list[str]:
+    """Names of the CRUD functions running the current statement, outermost first.
+
+    Statements run in a greenlet spawned by the awaiting coroutine, so the frames
+    of the CRUD functions are found through the parent of that greenlet.
+    """
+    parent = greenlet.getcurrent().parent
+    frame = parent.gr_frame if parent is not None else sys._getframe(1)  # noqa: SLF001
+    names = []
+    while frame is not None:
+        if frame.f_globals.get("__name__", "").startswith(_CRUD_PACKAGE):
+            names.append(frame.f_code.co_name)
+        frame = frame.f_back
+    return names[::-1]
+
+
+class SlowQueryStat(BaseModel):
+    """Aggregate of every slow execution of one statement fingerprint."""
+
+    fingerprint: str
+    calls: int = 0
+    total_ms: float = 0.0
+    max_ms: float = 0.0
+    operations: list[str] = []
+    """CRUD call chain of the latest slow execution."""
+    parameters_shape: str = ""
+    explain: str | None = None
+    """Latest `EXPLAIN (ANALYZE, BUFFERS)` output, when one was sampled.
+
+    Without constants, so values of parameters, like passwords, are never kept.
+    """
+
+    @computed_field
+    def mean_ms(self) -> float:
+        """Mean duration of the slow executions."""
+        return self.total_ms / self.calls if self.calls else 0.0
+
+
+class SlowQueryLog:
+    """Time statements of an engine and keep the slowest fingerprints."""
+
+    def __init__(
+        self,
+        threshold_ms: float,
+        *,
+        max_entries: int = 500,
+        explain_rate: float = 0.0,
+        explain_timeout_ms: int = 10_000,
+    ) -> None:
+        """Initialize an empty log.
+
+        Args:
+            threshold_ms (float): Statements at least this slow are recorded,
+                a negative value disables the log.
+            max_entries (int, optional): Fingerprints kept, the ones with the least
+                total time are dropped first. Defaults to 500.
+            explain_rate (float, optional): Share of slow `SELECT`s explained in the
+                background, between 0 and 1. Defaults to 0.
+            explain_timeout_ms (int, optional): Statement timeout of those explains.
+                Defaults to 10 seconds.
+        """
+        self.threshold_ms = threshold_ms
+        self.max_entries = max_entries
+        self.explain_rate = explain_rate
+        self.explain_timeout_ms = explain_timeout_ms
+        self._stats: dict[str, SlowQueryStat] = {}
+        self._engine: AsyncEngine | None = None
+        self._explain_running = False
+        self._background: set[asyncio.Task] = set()
+
+    def install(self, engine: AsyncEngine) -> None:
+        """Start timing the statements of engine."""
+        if self.threshold_ms < 0:
+            return
+        self._engine = engine
+        event.listen(engine.sync_engine, "before_cursor_execute", self._before)
+        event.listen(engine.sync_engine, "after_cursor_execute", self._after)
+
+    def top(self, limit: int = 20) -> list[SlowQueryStat]:
+        """Fingerprints with the most total slow time first."""
+        return sorted(self._stats.values(), key=lambda s: s.total_ms, reverse=True)[
+            :limit
+        ]
+
+    def reset(self) -> None:
+        """Forget every recorded fingerprint."""
+        self._stats.clear()
+
+    def record(
+        self,
+        statement: str,
+        parameters: Any,  # noqa: ANN401
+        elapsed_ms: float,
+        *,
+        executemany: bool = False,
+    ) -> SlowQueryStat:
+        """Add a slow execution to the log and return its aggregate."""
+        key = fingerprint(statement)
+        stat = self._stats.get(key)
+        if stat is None:
+            if len(self._stats) >= self.max_entries:
+                smallest = min(self._stats.values(), key=lambda s: s.total_ms)
+                del self._stats[smallest.fingerprint]
+            stat = self._stats[key] = SlowQueryStat(fingerprint=key)
+        stat.calls += 1
+        stat.total_ms += elapsed_ms
+        stat.max_ms = max(stat.max_ms, elapsed_ms)
+        stat.operations = crud_operations()
+        stat.parameters_shape = parameters_shape(parameters, executemany=executemany)
+        LOG.warning(
+            "Slow query %.1fms in %s: %s %s",
+            elapsed_ms,
+            " > ".join(stat.operations) or "<unknown>",
+            key,
+            stat.parameters_shape,
+        )
+        return stat
+
+    def _before(
+        self,
+        _conn: Connection,
+        _cursor: Any,  # noqa: ANN401
+        _statement: str,
+        _parameters: Any,  # noqa: ANN401
+        context: ExecutionContext | None,
+        _executemany: bool,  # noqa: FBT001
+    ) -> None:
+        if context is not None:
+            setattr(context, _START_ATTRIBUTE, time.perf_counter())
+
+    def _after(
+        self,
+        _conn: Connection,
+        _cursor: Any,  # noqa: ANN401
+        statement: str,
+        parameters: Any,  # noqa: ANN401
+        context: ExecutionContext | None,
+        executemany: bool,  # noqa: FBT001
+    ) -> None:
+        started_at = getattr(context, _START_ATTRIBUTE, None)
+        if started_at is None or _EXPLAINING.get():
+            return
+        elapsed_ms = (time.perf_counter() - started_at) * 1000
+        if elapsed_ms < self.threshold_ms:
+            return
+        stat = self.record(statement, parameters, elapsed_ms, executemany=executemany)
+        if self._should_explain(statement, executemany=executemany):
+            self._explain_soon(stat, statement, parameters)
+
+    def _should_explain(self, statement: str, *, executemany: bool) -> bool:
+        # EXPLAIN ANALYZE runs the statement again, never do that for writes
+        return (
+            self._engine is not None
+            and not executemany
+            and not self._explain_running
+            and statement.lstrip()[:6].upper() == "SELECT"
+            and random.random() < self.explain_rate  # noqa: S311
+        )
+
+    def _explain_soon(
+        self,
+        stat: SlowQueryStat,
+        statement: str,
+        parameters: Any,  # noqa: ANN401
+    ) -> None:
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        self._explain_running = True
+        task = loop.create_task(self._explain(stat, statement, parameters))
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+
+    async def _explain(
+        self,
+        stat: SlowQueryStat,
+        statement: str,
+        parameters: Any,  # noqa: ANN401
+    ) -> None:
+        """Run `EXPLAIN (ANALYZE, BUFFERS)` on its own connection, one at a time."""
+        _EXPLAINING.set(True)
+        try:
+            async with self._engine.connect() as conn:  # type: ignore[union-attr]
+                await conn.exec_driver_sql(
+                    f"SET LOCAL statement_timeout = {int(self.explain_timeout_ms)}",
+                )
+                result = await conn.exec_driver_sql(
+                    f"EXPLAIN (ANALYZE, BUFFERS) {statement}",
+                    parameters,
+                )
+                stat.explain = redact_plan("\n".join(row[0] for row in result))
+                # never keep anything the statement may have done
+                await conn.rollback()
+        except Exception:
+            LOG.exception("Failed to explain slow query %s", stat.fingerprint)
+        finally:
+            self._explain_running = False
+
+
+SLOW_QUERY_LOG = SlowQueryLog(
+    float(os.getenv("ANIME_API_SLOW_QUERY_MS", "250")),
+    explain_rate=float(os.getenv("ANIME_API_SLOW_QUERY_EXPLAIN_RATE", "0")),
+)
+"""Process wide slow query log, installed on the engine of `DatabaseConnection`."""
@@ -0,0 +1,186 @@
+"""Cross worker cache invalidation through Postgres `LISTEN`/`NOTIFY`.
+
+Writers call `notify_invalidation` inside their transaction, Postgres only delivers
+the notification once that transaction commits. Every worker keeps a single
+dedicated `LISTEN` connection that forwards notifications to the eviction
+callbacks registered on `INVALIDATION_BUS`.
+"""
+
+import asyncio
+from collections import defaultdict
+from collections.abc import Callable
+import logging
+
+import asyncpg  # type: ignore[import-untyped]
+from sqlalchemy import URL
+from sqlalchemy import func
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+LOG = logging.getLogger(f"anime-api.{__name__}")
+
+CHANNEL = "anime_api_invalidate"
+SHOWS_TOPIC = "shows"
+SHOW_LISTINGS_TOPIC = "show_listings"
+"""Shows were added, deleted or relabeled, unlike a show changing alone."""
+USERS_TOPIC = "users"
+
+__all__ = [
+    "CHANNEL",
+    "INVALIDATION_BUS",
+    "SHOWS_TOPIC",
+    "SHOW_LISTINGS_TOPIC",
+    "USERS_TOPIC",
+    "InvalidationBus",
+    "asyncpg_dsn",
+    "notify_invalidation",
+]
+
+
+def asyncpg_dsn(url: URL) -> str:
+    """Turn our SQLAlchemy URL into a DSN plain asyncpg understands."""
+    return url.set(drivername="postgresql").render_as_string(hide_password=False)
+
+
+class InvalidationBus:
+    """Fan out invalidation messages to the local caches that subscribed to them."""
+
+    def __init__(self) -> None:
+        """Initialize a bus without subscribers."""
+        self._evictors: defaultdict[str, list[Callable[[str], None]]] = defaultdict(
+            list,
+        )
+        self._flushers: list[Callable[[], None]] = []
+        self.connected = asyncio.Event()
+
+    def subscribe(
+        self,
+        topic: str,
+        evict: Callable[[str], None],
+        flush: Callable[[], None],
+    ) -> None:
+        """Register the callbacks of a local cache.
+
+        Args:
+            topic (str): Topic whose messages evict entries of the cache.
+            evict (Callable[[str], None]): Drop the entry for a key of the topic.
+            flush (Callable[[], None]): Drop every entry, used when notifications
+                may have been missed.
+        """
+        self._evictors[topic].append(evict)
+        self._flushers.append(flush)
+
+    def evict(self, topic: str, key: str | int) -> None:
+        """Evict key from every local cache subscribed to topic."""
+        for evict in self._evictors.get(topic, ()):
+            evict(str(key))
+
+    def flush_all(self) -> None:
+        """Empty every subscribed local cache."""
+        LOG.info("Flushing %d local caches", len(self._flushers))
+        for flush in self._flushers:
+            flush()
+
+    def dispatch(self, payload: str) -> None:
+        """Apply a `topic:key` notification payload."""
+        topic, _, key = payload.partition(":")
+        self.evict(topic, key)
+
+    def _on_notify(
+        self,
+        _conn: asyncpg.Connection,
+        _pid: int,
+        _channel: str,
+        payload: str,
+    ) -> None:
+        self.dispatch(payload)
+
+    async def listen(
+        self,
+        dsn: str,
+        *,
+        min_backoff: float = 0.5,
+        max_backoff: float = 30.0,
+        health_interval: float = 15.0,
+    ) -> None:
+        """Keep a `LISTEN` connection open until cancelled.
+
+        Reconnects when the connection drops, and flushes every local cache once
+        listening again since messages sent during the gap are lost. Connecting,
+        or starting to listen, is retried with exponential backoff whatever it
+        failed with, so the worker never stops listening for good.
+
+        Args:
+            dsn (str): asyncpg connection string, see `asyncpg_dsn`.
+            min_backoff (float, optional): First reconnect delay in seconds.
+                Defaults to 0.5.
+            max_backoff (float, optional): Largest reconnect delay in seconds.
+                Defaults to 30.
+            health_interval (float, optional): Seconds between pings checking the
+                idle connection is still alive. Defaults to 15.
+        """
+        backoff = min_backoff
+        while True:
+            listened = False
+            try:
+                conn = await asyncpg.connect(dsn)
+            except Exception as exc:  # noqa: BLE001
+                LOG.warning("Invalidation listener can't connect: %r", exc)
+            else:
+                try:
+                    await self._listen_on(conn, health_interval)
+                except Exception:
+                    LOG.exception("Invalidation listener failed")
+                finally:
+                    listened = self.connected.is_set()
+                    self.connected.clear()
+                    if not conn.is_closed():
+                        conn.terminate()
+            if listened:
+                backoff = min_backoff
+                LOG.warning("Invalidation listener lost its connection, reconnecting")
+                continue
+            LOG.warning("Invalidation listener retries in %ss", backoff)
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, max_backoff)
+
+    async def _listen_on(
+        self,
+        conn: asyncpg.Connection,
+        health_interval: float,
+    ) -> None:
+        """Listen on an open connection until it is lost."""
+        lost = asyncio.Event()
+        conn.add_termination_listener(lambda _conn: lost.set())
+        await conn.add_listener(CHANNEL, self._on_notify)
+        # anything could have changed while nobody was listening
+        self.flush_all()
+        self.connected.set()
+        while not lost.is_set():
+            try:
+                await asyncio.wait_for(lost.wait(), timeout=health_interval)
+            except TimeoutError:
+                try:
+                    await conn.fetchval("SELECT 1", timeout=health_interval)
+                except (
+                    OSError,
+                    TimeoutError,
+                    asyncpg.PostgresError,
+                    # the connection closed under the ping
+                    asyncpg.InterfaceError,
+                ):
+                    return
+
+
+INVALIDATION_BUS = InvalidationBus()
+"""Process wide bus, caches subscribe to it when their module is imported."""
+
+
+async def notify_invalidation(session: AsyncSession, topic: str, key: int) -> None:
+    """Queue a notification that key of topic changed.
+
+    Postgres sends it when the transaction of session commits, and drops it on
+    rollback. Callers still evict their own worker with `INVALIDATION_BUS.evict`
+    after committing so they read their own writes.
+    """
+    await session.execute(select(func.pg_notify(CHANNEL, f"{topic}:{key}")))
@@ -0,0 +1,424 @@
+"""Background jobs, queued in `content.jobs` and run outside the API workers.
+
+A worker claims due jobs with `FOR UPDATE SKIP LOCKED`, so any number of workers
+share the queue without ever running a job twice at once. Each job type has a cap
+on the jobs of that type a worker runs at once, and CPU bound work is handed to a
+process pool so it doesn't block the event loop of the worker.
+
+A failed attempt is queued again after an exponential backoff, until the job is
+out of attempts. Running jobs send heartbeats, and a job whose worker stopped
+sending them is queued again by any other worker.
+"""
+
+import asyncio
+from collections.abc import Awaitable
+from collections.abc import Callable
+from concurrent.futures import Executor
+from concurrent.futures import ProcessPoolExecutor
+import contextlib
+import functools
+import json
+import logging
+import multiprocessing
+import os
+import random
+import socket
+from typing import Any
+from typing import NamedTuple
+
+from sqlalchemy import Executable
+from sqlalchemy import Integer
+from sqlalchemy import String
+from sqlalchemy import text
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from .models.content import JobType
+
+LOG = logging.getLogger(f"anime-api.{__name__}")
+
+__all__ = [
+    "ClaimedJob",
+    "JobContext",
+    "JobRegistry",
+    "JobSpec",
+    "JobWorker",
+    "retry_delay",
+]
+
+type JobHandler = Callable[["JobContext"], Awaitable[dict[str, Any] | None]]
+"""Runs a job, returns its result."""
+
+_CLAIM = text(
+    """
+    UPDATE content.jobs SET
+        status = 'running',
+        attempts = attempts + 1,
+        worker = :worker,
+        started_at = now(),
+        heartbeat_at = now(),
+        progress = 0,
+        progress_message = NULL
+    WHERE job_id = (
+        SELECT job_id
+        FROM content.jobs
+        WHERE status = 'queued'
+            AND run_after <= now()
+            AND CAST(job_type AS text) = ANY(CAST(:job_types AS text[]))
+        ORDER BY run_after, job_id
+        LIMIT 1
+        FOR UPDATE SKIP LOCKED
+    )
+    RETURNING job_id, job_type, payload, attempts, max_attempts
+    """,
+).columns(
+    job_id=Integer,
+    job_type=String,
+    payload=JSONB,
+    attempts=Integer,
+    max_attempts=Integer,
+)
+# every update of a running job checks it still is this worker's
+_OWNED = "job_id = :job_id AND worker = :worker AND status = 'running'"
+_HEARTBEAT = text(
+    f"""
+    UPDATE content.jobs SET
+        heartbeat_at = now(),
+        progress = coalesce(:progress, progress),
+        progress_message = coalesce(:message, progress_message)
+    WHERE {_OWNED}
+    """,
+)
+_SUCCEED = text(
+    f"""
+    UPDATE content.jobs SET
+        status = 'succeeded',
+        progress = 1,
+        result = CAST(:result AS jsonb),
+        error = NULL,
+        finished_at = now()
+    WHERE {_OWNED}
+    """,
+)
+_FAIL = text(
+    f"""
+    UPDATE content.jobs SET
+        status = CAST(
+            CASE WHEN attempts < max_attempts THEN 'queued' ELSE 'failed' END
+            AS content.jobstatus
+        ),
+        run_after = now() + make_interval(secs => :delay),
+        error = :error,
+        finished_at = CASE WHEN attempts < max_attempts THEN NULL ELSE now() END
+    WHERE {_OWNED}
+    """,
+)
+# the attempt of a job cut short by its worker stopping doesn't count
+_RELEASE = text(
+    f"""
+    UPDATE content.jobs SET status = 'queued', attempts = attempts - 1
+    WHERE {_OWNED}
+    """,  # noqa: S608
+)
+_REQUEUE_STALE = text(
+    """
+    UPDATE content.jobs SET
+        status = CAST(
+            CASE WHEN attempts < max_attempts THEN 'queued' ELSE 'failed' END
+            AS content.jobstatus
+        ),
+        run_after = now(),
+        error = 'Worker stopped sending heartbeats',
+        finished_at = CASE WHEN attempts < max_attempts THEN NULL ELSE now() END
+    WHERE status = 'running'
+        AND heartbeat_at < now() - make_interval(secs => :stale_after)
+    """,
+)
+
+
+def retry_delay(
+    attempts: int,
+    *,
+    base: float = 10.0,
+    cap: float = 3600.0,
+    jitter: Callable[[], float] = random.random,
+) -> float:
+    """Seconds to wait before the next attempt of a job, doubling each attempt.
+
+    Between half and all of the doubled delay is used, so jobs that failed
+    together don't all retry at the same moment.
+
+    >>> retry_delay(1, jitter=lambda: 1.0), retry_delay(3, jitter=lambda: 1.0)
+    (10.0, 40.0)
+    >>> retry_delay(30, jitter=lambda: 0.0)
+    1800.0
+    """
+    delay = min(cap, base * 2 ** (attempts - 1))
+    return delay * (0.5 + jitter() / 2)
+
+
+class JobSpec(NamedTuple):
+    """How a worker runs the jobs of a type."""
+
+    handler: JobHandler
+    concurrency: int
+    """Most jobs of the type run at once by a worker."""
+
+
+class JobRegistry:
+    """Handlers of the job types a worker runs."""
+
+    def __init__(self) -> None:
+        """Initialize an empty registry."""
+        self._specs: dict[JobType, JobSpec] = {}
+
+    def register(
+        self,
+        job_type: JobType,
+        *,
+        concurrency: int = 1,
+    ) -> Callable[[JobHandler], JobHandler]:
+        """Decorate the handler of a job type.
+
+        Args:
+            job_type (JobType): Type of jobs the handler runs.
+            concurrency (int, optional): Most jobs of the type run at once by a
+                worker. Defaults to 1.
+        """
+
+        def decorator(handler: JobHandler) -> JobHandler:
+            self._specs[job_type] = JobSpec(handler, concurrency)
+            return handler
+
+        return decorator
+
+    def __getitem__(self, job_type: JobType) -> JobSpec:
+        """Spec of a registered job type."""
+        return self._specs[job_type]
+
+    def free_types(self, running: dict[JobType, int]) -> list[JobType]:
+        """Job types with room for another job, given the jobs running per type."""
+        return [
+            job_type
+            for job_type, spec in self._specs.items()
+            if running.get(job_type, 0) < spec.concurrency
+        ]
+
+
+class ClaimedJob(NamedTuple):
+    """A job a worker claimed, and is running."""
+
+    job_id: int
+    job_type: JobType
+    payload: dict[str, Any]
+    attempts: int
+    max_attempts: int
+
+
+class JobContext:
+    """What a job handler gets to do its work and report on it."""
+
+    def __init__(
+        self,
+        job: ClaimedJob,
+        engine: AsyncEngine,
+        executor: Executor,
+        worker: str,
+    ) -> None:
+        """Initialize the context of a claimed job."""
+        self.job = job
+        self.engine = engine
+        self._executor = executor
+        self._worker = worker
+
+    @property
+    def payload(self) -> dict[str, Any]:
+        """Arguments the job was queued with."""
+        return self.job.payload
+
+    async def report(self, progress: float | None, message: str | None = None) -> None:
+        """Record the share of the work done, from 0 to 1, and what is being done."""
+        await _execute(
+            self.engine,
+            _HEARTBEAT,
+            job_id=self.job.job_id,
+            worker=self._worker,
+            progress=progress,
+            message=message,
+        )
+
+    async def run_in_process[**P, R](
+        self,
+        function: Callable[P, R],
+        *args: P.args,
+        **kwargs: P.kwargs,
+    ) -> R:
+        """Run a CPU bound function in the process pool of the worker.
+
+        The function and its arguments are pickled, so the function has to be
+        defined at the top level of a module, and open nothing it is given.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._executor,
+            functools.partial(function, *args, **kwargs),
+        )
+
+
+async def _execute(engine: AsyncEngine, statement: Executable, **params: object) -> int:
+    async with engine.begin() as conn:
+        return (await conn.execute(statement, params)).rowcount
+
+
+class JobWorker:
+    """Claims due jobs and runs them, until cancelled."""
+
+    def __init__(  # noqa: PLR0913
+        self,
+        engine: AsyncEngine,
+        registry: JobRegistry,
+        *,
+        processes: int | None = None,
+        poll_interval: float = 1.0,
+        stale_after: float = 300.0,
+        name: str | None = None,
+    ) -> None:
+        """Initialize a worker, started by awaiting `run`.
+
+        Args:
+            engine (AsyncEngine): Engine of the database holding the jobs.
+            registry (JobRegistry): Job types the worker runs.
+            processes (int | None, optional): Processes of the pool for CPU bound
+                work. Defaults to None, one per CPU.
+            poll_interval (float, optional): Seconds between looks for due jobs
+                while nothing finishes. Defaults to 1.
+            stale_after (float, optional): Seconds without a heartbeat after
+                which a running job is queued again. Defaults to 5 minutes.
+            name (str | None, optional): Recorded on the jobs the worker runs.
+                Defaults to the host name and process ID.
+        """
+        self.engine = engine
+        self.registry = registry
+        self.processes = processes
+        self.poll_interval = poll_interval
+        self.stale_after = stale_after
+        self.name = name or f"{socket.gethostname()}:{os.getpid()}"
+        self.running: dict[asyncio.Task, ClaimedJob] = {}
+
+    async def claim(self) -> ClaimedJob | None:
+        """Claim the next due job of a type the worker has room for."""
+        counts: dict[JobType, int] = {}
+        for job in self.running.values():
+            counts[job.job_type] = counts.get(job.job_type, 0) + 1
+        job_types = self.registry.free_types(counts)
+        if not job_types:
+            return None
+        async with self.engine.begin() as conn:
+            row = (
+                await conn.execute(
+                    _CLAIM,
+                    {"worker": self.name, "job_types": [str(t) for t in job_types]},
+                )
+            ).first()
+        if row is None:
+            return None
+        return ClaimedJob(
+            row.job_id,
+            JobType(row.job_type),
+            row.payload,
+            row.attempts,
+            row.max_attempts,
+        )
+
+    async def requeue_stale(self) -> int:
+        """Queue the running jobs whose worker stopped again, returns how many."""
+        return await _execute(
+            self.engine,
+            _REQUEUE_STALE,
+            stale_after=self.stale_after,
+        )
+
+    async def run_job(self, job: ClaimedJob, executor: Executor) -> None:
+        """Run a claimed job to its end, recording how it went."""
+        context = JobContext(job, self.engine, executor, self.name)
+        heartbeat = asyncio.create_task(self._heartbeat(context))
+        try:
+            result = await self.registry[job.job_type].handler(context)
+        except asyncio.CancelledError:
+            await _execute(self.engine, _RELEASE, job_id=job.job_id, worker=self.name)
+            raise
+        except Exception as e:
+            LOG.exception("Attempt %d of job %d failed", job.attempts, job.job_id)
+            await _execute(
+                self.engine,
+                _FAIL,
+                job_id=job.job_id,
+                worker=self.name,
+                delay=retry_delay(job.attempts),
+                error=f"{type(e).__name__}: {e}",
+            )
+        else:
+            await _execute(
+                self.engine,
+                _SUCCEED,
+                job_id=job.job_id,
+                worker=self.name,
+                result=None if result is None else json.dumps(result, default=str),
+            )
+        finally:
+            heartbeat.cancel()
+
+    async def run(self) -> None:
+        """Claim and run jobs until cancelled, then release the running ones."""
+        # forked processes would inherit the event loop and the engine's sockets
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(self.processes, mp_context=context) as executor:
+            next_reap = 0.0
+            loop = asyncio.get_running_loop()
+            try:
+                while True:
+                    if loop.time() >= next_reap:
+                        next_reap = loop.time() + self.stale_after / 2
+                        await self._logged(self.requeue_stale(), "requeue jobs")
+                    while (
+                        job := await self._logged(self.claim(), "claim")
+                    ) is not None:
+                        task = asyncio.create_task(self.run_job(job, executor))
+                        self.running[task] = job
+                    if self.running:
+                        done, _ = await asyncio.wait(
+                            self.running,
+                            timeout=self.poll_interval,
+                            return_when=asyncio.FIRST_COMPLETED,
+                        )
+                        for task in done:
+                            job = self.running.pop(task)
+                            if not task.cancelled() and task.exception():
+                                LOG.error(
+                                    "Failed to record the end of job %d",
+                                    job.job_id,
+                                    exc_info=task.exception(),
+                                )
+                    else:
+                        await asyncio.sleep(self.poll_interval)
+            finally:
+                for task in self.running:
+                    task.cancel()
+                for task in self.running:
+                    with contextlib.suppress(asyncio.CancelledError):
+                        await task
+                self.running.clear()
+                executor.shutdown(wait=False, cancel_futures=True)
+
+    async def _heartbeat(self, context: JobContext) -> None:
+        while True:
+            await asyncio.sleep(self.stale_after / 3)
+            await self._logged(context.report(None), "send heartbeat")
+
+    @staticmethod
+    async def _logged[T](operation: Awaitable[T], what: str) -> T | None:
+        try:
+            return await operation
+        except Exception:
+            LOG.exception("Failed to %s", what)
+            return None
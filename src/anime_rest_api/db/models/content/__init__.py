@@ -1,9 +1,46 @@
 from .base import CONTENT_METADATA
+from .episodes import EPISODE_PARTITIONS
+from .episodes import Episode
+from .episodes import EpisodeRead
+from .episodes import EpisodeWrite
+from .jobs import Job
+from .jobs import JobCreate
+from .jobs import JobProgress
+from .jobs import JobRead
+from .jobs import JobStatus
+from .jobs import JobType
+from .labels import Genre
+from .labels import ShowGenre
+from .labels import ShowStudio
+from .labels import ShowTag
+from .labels import Studio
+from .labels import Tag
+from .popularity import ShowPopularity
+from .popularity import TrendingShowRead
+from .reviews import Review
+from .reviews import ReviewCreate
+from .reviews import ReviewRead
+from .reviews import ReviewUpdate
+from .reviews import ShowRating
+from .reviews import ShowRatingRead
 from .shows import Show
 from .shows import ShowBase
 from .shows import ShowCreate
 from .shows import ShowRead
 from .shows import ShowUpdate
+from .similarity import ShowFeatureDigest
+from .similarity import ShowSimilarity
+from .similarity import SimilarShowRead
+from .stats import CREATE_SHOW_STATS_VIEW
+from .stats import DROP_SHOW_STATS_VIEW
+from .stats import SHOW_STATS_VIEW
+from .stats import ShowStats
+from .watchlist import WatchStatus
+from .watchlist import WatchlistCount
+from .watchlist import WatchlistCounts
+from .watchlist import WatchlistEntry
+from .watchlist import WatchlistEntryRead
+from .watchlist import WatchlistEntryWrite
 
 __all__ = [
     "CONTENT_METADATA",
@@ -12,4 +49,41 @@ __all__ = [
     "ShowCreate",
     "ShowRead",
     "ShowUpdate",
+    "EPISODE_PARTITIONS",
+    "Episode",
+    "EpisodeRead",
+    "EpisodeWrite",
+    "Job",
+    "JobCreate",
+    "JobProgress",
+    "JobRead",
+    "JobStatus",
+    "JobType",
+    "Genre",
+    "Studio",
+    "Tag",
+    "ShowGenre",
+    "ShowStudio",
+    "ShowTag",
+    "Review",
+    "ReviewCreate",
+    "ReviewRead",
+    "ReviewUpdate",
+    "ShowRating",
+    "ShowRatingRead",
+    "ShowFeatureDigest",
+    "ShowPopularity",
+    "ShowSimilarity",
+    "SimilarShowRead",
+    "CREATE_SHOW_STATS_VIEW",
+    "DROP_SHOW_STATS_VIEW",
+    "SHOW_STATS_VIEW",
+    "ShowStats",
+    "TrendingShowRead",
+    "WatchlistCount",
+    "WatchlistCounts",
+    "WatchlistEntry",
+    "WatchlistEntryRead",
+    "WatchlistEntryWrite",
+    "WatchStatus",
 ]
@@ -0,0 +1,66 @@
+import datetime as dt
+from typing import Annotated
+
+from sqlalchemy import DDL
+from sqlalchemy import event
+from sqlmodel import Field
+from sqlmodel import SQLModel
+
+from .base import CONTENT_METADATA
+
+EPISODE_PARTITIONS = 16
+"""Hash partitions of `content.episodes`, fixed when the table is created."""
+
+
+class EpisodeBase(SQLModel):
+    """Basic model for all common fields of an episode."""
+
+    number: Annotated[int, Field(..., ge=1)]
+    title: Annotated[str | None, Field(None, max_length=500)]
+    air_date: dt.date | None = None
+    duration: Annotated[int | None, Field(None, ge=0)]
+    """Runtime in minutes."""
+
+
+class Episode(EpisodeBase, table=True):
+    """Database model for an episode of a show.
+
+    The table is partitioned by the hash of `show_id`, so the episodes of a show
+    are all in one partition, and each partition has its own primary key index.
+    """
+
+    __tablename__ = "episodes"
+    __table_args__ = ({"postgresql_partition_by": "HASH (show_id)"},)
+    metadata = CONTENT_METADATA
+
+    # the partition key has to be part of the primary key, which also serves the
+    # listing of a show in episode order
+    show_id: int = Field(
+        ...,
+        primary_key=True,
+        foreign_key="shows.show_id",
+        ondelete="CASCADE",
+    )
+    number: int = Field(..., primary_key=True, ge=1)
+
+
+for _remainder in range(EPISODE_PARTITIONS):
+    event.listen(
+        Episode.__table__,  # type: ignore[attr-defined]
+        "after_create",
+        DDL(
+            f"CREATE TABLE %(schema)s.episodes_p{_remainder} PARTITION OF "
+            f"%(fullname)s FOR VALUES WITH (MODULUS {EPISODE_PARTITIONS}, "
+            f"REMAINDER {_remainder})",
+        ),
+    )
+
+
+class EpisodeRead(EpisodeBase):
+    """Data model for outbound data of an episode."""
+
+    show_id: int
+
+
+class EpisodeWrite(EpisodeBase):
+    """Data model to add an episode to a show, or replace it."""
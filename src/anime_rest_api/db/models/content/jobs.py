@@ -0,0 +1,115 @@
+import datetime as dt
+import enum
+from typing import Annotated
+from typing import Any
+
+from sqlalchemy import Column
+from sqlalchemy import DateTime
+from sqlalchemy import Index
+from sqlalchemy import func
+from sqlalchemy import text
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlmodel import Field
+from sqlmodel import SQLModel
+
+from .base import CONTENT_METADATA
+
+
+class JobStatus(enum.StrEnum):
+    """Enum for where a background job is in its life."""
+
+    queued = "queued"
+    running = "running"
+    succeeded = "succeeded"
+    failed = "failed"
+
+
+class JobType(enum.StrEnum):
+    """Enum for the kinds of work the job worker knows how to run."""
+
+    import_episodes = "import_episodes"
+    refresh_show_stats = "refresh_show_stats"
+    refresh_similarity = "refresh_similarity"
+
+
+def _timestamp_column(*, nullable: bool = True) -> Column:
+    return Column(
+        DateTime(timezone=True),
+        nullable=nullable,
+        server_default=None if nullable else func.now(),
+    )
+
+
+class JobBase(SQLModel):
+    """Basic model for all common fields of a job."""
+
+    job_type: JobType
+    payload: dict[str, Any] = Field(
+        default_factory=dict,
+        sa_column=Column(JSONB, nullable=False, server_default=text("'{}'")),
+    )
+    max_attempts: Annotated[int, Field(3, ge=1, le=10)]
+
+
+class Job(JobBase, table=True):
+    """Database model for a unit of work run by the job worker."""
+
+    __tablename__ = "jobs"
+    __table_args__ = (
+        # the queued jobs that are due, in the order the worker claims them
+        Index(
+            "ix_jobs_queued_run_after",
+            "run_after",
+            "job_id",
+            postgresql_where=text("status = 'queued'"),
+        ),
+    )
+    metadata = CONTENT_METADATA
+
+    job_id: int | None = Field(None, primary_key=True)
+    status: JobStatus = Field(JobStatus.queued, index=True)
+    attempts: int = 0
+    progress: float = 0.0
+    """Share of the work done, from 0 to 1, as reported by the job."""
+    progress_message: str | None = None
+    result: dict[str, Any] | None = Field(None, sa_column=Column(JSONB))
+    error: str | None = None
+    """Error of the last failed attempt."""
+    worker: str | None = None
+    """Worker running the job, or that last ran it."""
+    run_after: dt.datetime | None = Field(
+        None,
+        sa_column=_timestamp_column(nullable=False),
+    )
+    created_at: dt.datetime | None = Field(
+        None,
+        sa_column=_timestamp_column(nullable=False),
+    )
+    started_at: dt.datetime | None = Field(None, sa_column=_timestamp_column())
+    heartbeat_at: dt.datetime | None = Field(None, sa_column=_timestamp_column())
+    finished_at: dt.datetime | None = Field(None, sa_column=_timestamp_column())
+
+
+class JobCreate(JobBase):
+    """Data model to queue a job from."""
+
+
+class JobProgress(SQLModel):
+    """Data model for outbound progress of a job."""
+
+    job_id: int
+    status: JobStatus
+    attempts: int
+    progress: float
+    progress_message: str | None
+
+
+class JobRead(JobBase, JobProgress):
+    """Data model for outbound data of a job."""
+
+    result: dict[str, Any] | None
+    error: str | None
+    run_after: dt.datetime
+    created_at: dt.datetime
+    started_at: dt.datetime | None
+    finished_at: dt.datetime | None
@@ -0,0 +1,104 @@
+"""Genres, studios and tags of shows, each a many-to-many relation by name."""
+
+from typing import Annotated
+
+from sqlalchemy import Index
+from sqlmodel import Field
+from sqlmodel import SQLModel
+
+from .base import CONTENT_METADATA
+
+
+class Genre(SQLModel, table=True):
+    """Database model for a genre shows can have."""
+
+    __tablename__ = "genres"
+    metadata = CONTENT_METADATA
+
+    genre_id: int | None = Field(None, primary_key=True)
+    name: Annotated[str, Field(..., min_length=1, unique=True)]
+
+
+class Studio(SQLModel, table=True):
+    """Database model for a studio that makes shows."""
+
+    __tablename__ = "studios"
+    metadata = CONTENT_METADATA
+
+    studio_id: int | None = Field(None, primary_key=True)
+    name: Annotated[str, Field(..., min_length=1, unique=True)]
+
+
+class Tag(SQLModel, table=True):
+    """Database model for a free form tag of shows."""
+
+    __tablename__ = "tags"
+    metadata = CONTENT_METADATA
+
+    tag_id: int | None = Field(None, primary_key=True)
+    name: Annotated[str, Field(..., min_length=1, unique=True)]
+
+
+class ShowGenre(SQLModel, table=True):
+    """Database model linking a show to one of its genres."""
+
+    __tablename__ = "show_genres"
+    __table_args__ = (
+        # the primary key serves loading the genres of shows, this one the
+        # shows of a genre
+        Index("ix_show_genres_genre_id_show_id", "genre_id", "show_id"),
+    )
+    metadata = CONTENT_METADATA
+
+    show_id: int = Field(
+        ...,
+        primary_key=True,
+        foreign_key="shows.show_id",
+        ondelete="CASCADE",
+    )
+    genre_id: int = Field(
+        ...,
+        primary_key=True,
+        foreign_key="genres.genre_id",
+        ondelete="CASCADE",
+    )
+
+
+class ShowStudio(SQLModel, table=True):
+    """Database model linking a show to a studio that made it."""
+
+    __tablename__ = "show_studios"
+    metadata = CONTENT_METADATA
+
+    show_id: int = Field(
+        ...,
+        primary_key=True,
+        foreign_key="shows.show_id",
+        ondelete="CASCADE",
+    )
+    studio_id: int = Field(
+        ...,
+        primary_key=True,
+        foreign_key="studios.studio_id",
+        ondelete="CASCADE",
+    )
+
+
+class ShowTag(SQLModel, table=True):
+    """Database model linking a show to one of its tags."""
+
+    __tablename__ = "show_tags"
+    metadata = CONTENT_METADATA
+
+    show_id: int = Field(
+        ...,
+        primary_key=True,
+        foreign_key="shows.show_id",
+        ondelete="CASCADE",
+    )
+    tag_id: int = Field(
+        ...,
+        primary_key=True,
+        foreign_key="tags.tag_id",
+        ondelete="CASCADE",
+    )
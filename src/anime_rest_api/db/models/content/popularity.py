@@ -0,0 +1,43 @@
+import datetime as dt
+
+from sqlalchemy import Column
+from sqlalchemy import DateTime
+from sqlalchemy import Index
+from sqlmodel import Field
+from sqlmodel import SQLModel
+
+from .base import CONTENT_METADATA
+from .shows import ShowRead
+
+
+class ShowPopularity(SQLModel, table=True):
+    """Database model for the time decayed views of a show, merged from every worker.
+
+    `score` is decayed to `updated_at`. `rank_key` is the natural log of the score
+    decayed to the Unix epoch, it orders shows the same way their decayed scores do
+    at any later time, so the leaderboard is an index scan.
+    """
+
+    __tablename__ = "show_popularity"
+    __table_args__ = (Index("ix_show_popularity_rank_key", "rank_key"),)
+    metadata = CONTENT_METADATA
+
+    show_id: int = Field(
+        ...,
+        primary_key=True,
+        foreign_key="shows.show_id",
+        ondelete="CASCADE",
+    )
+    score: float
+    updated_at: dt.datetime = Field(
+        ...,
+        sa_column=Column(DateTime(timezone=True), nullable=False),
+    )
+    rank_key: float
+
+
+class TrendingShowRead(ShowRead):
+    """Data model for outbound data of a trending show."""
+
+    trend: float
+    """Views of the show, each decayed by the time since it happened."""
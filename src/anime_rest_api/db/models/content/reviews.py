@@ -0,0 +1,131 @@
+import datetime as dt
+from typing import Annotated
+
+from sqlalchemy import ARRAY
+from sqlalchemy import BigInteger
+from sqlalchemy import Column
+from sqlalchemy import DateTime
+from sqlalchemy import ForeignKey
+from sqlalchemy import Index
+from sqlalchemy import Integer
+from sqlalchemy import UniqueConstraint
+from sqlalchemy import func
+from sqlmodel import Field
+from sqlmodel import SQLModel
+
+from anime_rest_api.db.models.auth import User
+
+from .base import CONTENT_METADATA
+
+MIN_SCORE = 1
+MAX_SCORE = 10
+
+
+class ReviewBase(SQLModel):
+    """Basic model for all common fields of a Review."""
+
+    score: Annotated[int, Field(..., ge=MIN_SCORE, le=MAX_SCORE)]
+    body: Annotated[str | None, Field(None, max_length=10_000)]
+
+
+class Review(ReviewBase, table=True):
+    """Database model for a review of a show by a user."""
+
+    __tablename__ = "reviews"
+    __table_args__ = (
+        # one review per user and show, also serves lookups by user
+        UniqueConstraint("user_id", "show_id"),
+        # newest reviews of a show first, without sorting
+        Index("ix_reviews_show_id_review_id", "show_id", "review_id"),
+    )
+    metadata = CONTENT_METADATA
+
+    review_id: int | None = Field(None, primary_key=True)
+    show_id: int = Field(..., foreign_key="shows.show_id", ondelete="CASCADE")
+    # reviews outlive their author, so the ratings of the show stay as they are
+    user_id: int | None = Field(
+        None,
+        # `auth.users` is in another metadata, a string key would not resolve
+        sa_column=Column(
+            Integer,
+            ForeignKey(User.__table__.c.user_id, ondelete="SET NULL"),  # type: ignore[attr-defined]
+        ),
+    )
+    created_at: dt.datetime | None = Field(
+        None,
+        sa_column=Column(
+            DateTime(timezone=True),
+            nullable=False,
+            server_default=func.now(),
+        ),
+    )
+    updated_at: dt.datetime | None = Field(
+        None,
+        sa_column=Column(
+            DateTime(timezone=True),
+            nullable=False,
+            server_default=func.now(),
+        ),
+    )
+
+
+class ReviewRead(ReviewBase):
+    """Data model for outbound data of a review."""
+
+    review_id: int
+    show_id: int
+    user_id: int | None
+    created_at: dt.datetime
+    updated_at: dt.datetime
+
+
+class ReviewCreate(ReviewBase):
+    """Data model to create a review from, the show and user come from the route."""
+
+
+class ReviewUpdate(SQLModel):
+    """Data model to update an existing review with, only set fields change."""
+
+    score: Annotated[int | None, Field(None, ge=MIN_SCORE, le=MAX_SCORE)]
+    body: Annotated[str | None, Field(None, max_length=10_000)]
+
+
+class ShowRating(SQLModel, table=True):
+    """Aggregates of the reviews of a show, kept up to date by every review write.
+
+    Reading the average rating of a show is a primary key lookup, instead of an
+    `AVG()` over all of its reviews.
+    """
+
+    __tablename__ = "show_ratings"
+    metadata = CONTENT_METADATA
+
+    show_id: int = Field(
+        ...,
+        primary_key=True,
+        foreign_key="shows.show_id",
+        ondelete="CASCADE",
+    )
+    review_count: int = 0
+    score_sum: int = Field(0, sa_type=BigInteger)
+    histogram: list[int] = Field(
+        default_factory=lambda: [0] * MAX_SCORE,
+        sa_column=Column(ARRAY(Integer), nullable=False),
+    )
+    """Reviews per score, the first entry counts scores of 1."""
+
+    @property
+    def average_rating(self) -> float | None:
+        """Mean score, None without reviews."""
+        if not self.review_count:
+            return None
+        return self.score_sum / self.review_count
+
+
+class ShowRatingRead(SQLModel):
+    """Data model for outbound aggregates of the reviews of a show."""
+
+    show_id: int
+    review_count: int
+    average_rating: float | None
+    histogram: list[int]
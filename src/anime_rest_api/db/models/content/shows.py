@@ -1,14 +1,26 @@
 import datetime as dt
+from typing import TYPE_CHECKING
 from typing import Annotated
+from typing import Optional
 
 from sqlmodel import Field
+from sqlmodel import Relationship
 from sqlmodel import SQLModel
 
 from .base import CONTENT_METADATA
+from .labels import Genre
+from .labels import ShowGenre
+from .labels import ShowStudio
+from .labels import ShowTag
+from .labels import Studio
+from .labels import Tag
 from .show_details import ShowContentRating
 from .show_details import ShowStatus
 from .show_details import ShowType
 
+if TYPE_CHECKING:
+    from .reviews import ShowRating
+
 
 class ShowBase(SQLModel):
     """Basic model for all common fields of a Show."""
@@ -28,16 +40,83 @@ class Show(ShowBase, table=True):
     metadata = CONTENT_METADATA
 
     show_id: int | None = Field(None, primary_key=True)
+    # joined into every query of shows, it is one primary key lookup per show
+    rating: Optional["ShowRating"] = Relationship(
+        sa_relationship_kwargs={"lazy": "joined", "viewonly": True},
+    )
+    # each loaded with one `IN` query for all the shows of a result, a page of
+    # shows takes the same four statements whatever its size
+    genre_entries: list[Genre] = Relationship(
+        link_model=ShowGenre,
+        sa_relationship_kwargs={
+            "lazy": "selectin",
+            "viewonly": True,
+            "order_by": "Genre.name",
+        },
+    )
+    studio_entries: list[Studio] = Relationship(
+        link_model=ShowStudio,
+        sa_relationship_kwargs={
+            "lazy": "selectin",
+            "viewonly": True,
+            "order_by": "Studio.name",
+        },
+    )
+    tag_entries: list[Tag] = Relationship(
+        link_model=ShowTag,
+        sa_relationship_kwargs={
+            "lazy": "selectin",
+            "viewonly": True,
+            "order_by": "Tag.name",
+        },
+    )
+
+    @property
+    def average_rating(self) -> float | None:
+        """Mean score of the reviews of the show, None without reviews."""
+        return self.rating.average_rating if self.rating is not None else None
+
+    @property
+    def review_count(self) -> int:
+        """Number of reviews of the show."""
+        return self.rating.review_count if self.rating is not None else 0
+
+    @property
+    def genres(self) -> list[str]:
+        """Names of the genres of the show, alphabetically."""
+        return [genre.name for genre in self.genre_entries]
+
+    @property
+    def studios(self) -> list[str]:
+        """Names of the studios that made the show, alphabetically."""
+        return [studio.name for studio in self.studio_entries]
+
+    @property
+    def tags(self) -> list[str]:
+        """Names of the tags of the show, alphabetically."""
+        return [tag.name for tag in self.tag_entries]
 
 
 class ShowRead(ShowBase):
     """Data model for outbound data of a show."""
 
     show_id: int
+    average_rating: float | None = None
+    review_count: int = 0
+    genres: list[str] = Field(default_factory=list)
+    studios: list[str] = Field(default_factory=list)
+    tags: list[str] = Field(default_factory=list)
 
 
 class ShowCreate(ShowBase):
-    """Data model to create a show from."""
+    """Data model to create a show from.
+
+    Genres, studios and tags are given by name, and created when they are new.
+    """
+
+    genres: list[str] = Field(default_factory=list)
+    studios: list[str] = Field(default_factory=list)
+    tags: list[str] = Field(default_factory=list)
 
 
 class ShowUpdate(SQLModel):
@@ -54,3 +133,9 @@ class ShowUpdate(SQLModel):
     show_type: ShowType | None = None
     status: ShowStatus | None = None
     content_rating: ShowContentRating | None = None
+    genres: list[str] | None = None
+    """Replace the genres of the show, by name."""
+    studios: list[str] | None = None
+    """Replace the studios of the show, by name."""
+    tags: list[str] | None = None
+    """Replace the tags of the show, by name."""
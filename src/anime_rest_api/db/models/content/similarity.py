@@ -0,0 +1,62 @@
+import datetime as dt
+
+from sqlalchemy import BigInteger
+from sqlalchemy import Column
+from sqlalchemy import DateTime
+from sqlalchemy import Index
+from sqlalchemy import func
+from sqlmodel import Field
+from sqlmodel import SQLModel
+
+from .base import CONTENT_METADATA
+from .shows import ShowRead
+
+
+class ShowSimilarity(SQLModel, table=True):
+    """Database model for a precomputed neighbour of a show, by rank."""
+
+    __tablename__ = "show_similarity"
+    __table_args__ = (
+        # finds the lists a changed show is in, for incremental recomputes
+        Index("ix_show_similarity_similar_show_id", "similar_show_id"),
+    )
+    metadata = CONTENT_METADATA
+
+    show_id: int = Field(
+        ...,
+        primary_key=True,
+        foreign_key="shows.show_id",
+        ondelete="CASCADE",
+    )
+    rank: int = Field(..., primary_key=True)
+    # not a foreign key, a deleted neighbour stays until its lists are recomputed
+    similar_show_id: int
+    score: float
+    """Cosine similarity of the features of both shows."""
+
+
+class ShowFeatureDigest(SQLModel, table=True):
+    """Database model for the features a show had when its neighbours were computed.
+
+    Not a foreign key of `shows`, so deleted shows are still found afterwards.
+    """
+
+    __tablename__ = "show_feature_digests"
+    metadata = CONTENT_METADATA
+
+    show_id: int = Field(..., primary_key=True)
+    digest: int = Field(..., sa_column=Column(BigInteger, nullable=False))
+    computed_at: dt.datetime | None = Field(
+        None,
+        sa_column=Column(
+            DateTime(timezone=True),
+            nullable=False,
+            server_default=func.now(),
+        ),
+    )
+
+
+class SimilarShowRead(ShowRead):
+    """Data model for outbound data of a show similar to another."""
+
+    score: float
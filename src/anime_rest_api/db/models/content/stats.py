@@ -0,0 +1,47 @@
+import datetime as dt
+
+from sqlalchemy import text
+from sqlmodel import Field
+from sqlmodel import SQLModel
+
+from .base import CONTENT_METADATA
+
+SHOW_STATS_VIEW = f"{CONTENT_METADATA.schema}.show_stats"
+"""Materialized view of the counts of shows per combination of their details."""
+
+# views aren't in the metadata, `setup_db` and `clean_db` run these around it
+CREATE_SHOW_STATS_VIEW = (
+    text(
+        f"""
+        CREATE MATERIALIZED VIEW IF NOT EXISTS {SHOW_STATS_VIEW} AS
+        SELECT
+            show_type,
+            status,
+            content_rating,
+            CAST(extract(year FROM release_date) AS integer) AS release_year,
+            count(*) AS shows
+        FROM {CONTENT_METADATA.schema}.shows
+        GROUP BY 1, 2, 3, 4
+        """,
+    ),
+    # refreshing concurrently needs a unique index over every row
+    text(
+        f"""
+        CREATE UNIQUE INDEX IF NOT EXISTS ix_show_stats_details
+        ON {SHOW_STATS_VIEW} (show_type, status, content_rating, release_year)
+        """,
+    ),
+)
+DROP_SHOW_STATS_VIEW = text(f"DROP MATERIALIZED VIEW IF EXISTS {SHOW_STATS_VIEW}")
+
+
+class ShowStats(SQLModel):
+    """Data model for outbound counts of shows per detail."""
+
+    total: int = 0
+    by_show_type: dict[str, int] = Field(default_factory=dict)
+    by_status: dict[str, int] = Field(default_factory=dict)
+    by_content_rating: dict[str, int] = Field(default_factory=dict)
+    by_release_year: dict[int, int] = Field(default_factory=dict)
+    refreshed_at: dt.datetime | None = None
+    """When the counts were read from the view, None before the first read."""
@@ -0,0 +1,107 @@
+import datetime as dt
+import enum
+from typing import Annotated
+
+from sqlalchemy import Column
+from sqlalchemy import DateTime
+from sqlalchemy import ForeignKey
+from sqlalchemy import Index
+from sqlalchemy import Integer
+from sqlalchemy import func
+from sqlmodel import Field
+from sqlmodel import SQLModel
+
+from anime_rest_api.db.models.auth import User
+
+from .base import CONTENT_METADATA
+
+
+class WatchStatus(enum.StrEnum):
+    """Enum for where a user is with a show of their watchlist."""
+
+    planned = "planned"
+    watching = "watching"
+    completed = "completed"
+    dropped = "dropped"
+
+
+def _user_id_column() -> Column:
+    # `auth.users` is in another metadata, a string key would not resolve
+    return Column(
+        Integer,
+        ForeignKey(User.__table__.c.user_id, ondelete="CASCADE"),  # type: ignore[attr-defined]
+        primary_key=True,
+    )
+
+
+class WatchlistEntryBase(SQLModel):
+    """Basic model for all common fields of a watchlist entry."""
+
+    show_id: int = Field(..., foreign_key="shows.show_id", ondelete="CASCADE")
+    status: WatchStatus
+    progress: Annotated[int, Field(0, ge=0)]
+    """Episodes watched."""
+
+
+class WatchlistEntry(WatchlistEntryBase, table=True):
+    """Database model for a show on the watchlist of a user."""
+
+    __tablename__ = "watchlist_entries"
+    __table_args__ = (
+        # covers the listing, most recently updated first, with index only scans
+        Index(
+            "ix_watchlist_entries_user_id_updated_at",
+            "user_id",
+            "updated_at",
+            "show_id",
+            postgresql_include=["status", "progress"],
+        ),
+    )
+    metadata = CONTENT_METADATA
+
+    user_id: int = Field(..., sa_column=_user_id_column())
+    show_id: int = Field(
+        ...,
+        primary_key=True,
+        foreign_key="shows.show_id",
+        ondelete="CASCADE",
+    )
+    updated_at: dt.datetime | None = Field(
+        None,
+        sa_column=Column(
+            DateTime(timezone=True),
+            nullable=False,
+            server_default=func.now(),
+        ),
+    )
+
+
+class WatchlistEntryRead(WatchlistEntryBase):
+    """Data model for outbound data of a watchlist entry."""
+
+    updated_at: dt.datetime
+
+
+class WatchlistEntryWrite(WatchlistEntryBase):
+    """Data model to add a show to a watchlist, or replace its entry."""
+
+
+class WatchlistCount(SQLModel, table=True):
+    """Entries of a user per status, kept up to date by every watchlist write."""
+
+    __tablename__ = "watchlist_counts"
+    metadata = CONTENT_METADATA
+
+    user_id: int = Field(..., sa_column=_user_id_column())
+    status: WatchStatus = Field(..., primary_key=True)
+    entries: int = 0
+
+
+class WatchlistCounts(SQLModel):
+    """Data model for outbound entry counts of a watchlist."""
+
+    planned: int = 0
+    watching: int = 0
+    completed: int = 0
+    dropped: int = 0
+    total: int = 0
@@ -0,0 +1,249 @@
+"""Trending shows, from time decayed counts of their views.
+
+A view of a show only adds to an in-process counter. The counter keeps its values
+scaled up by how long after its reference time they were added, so recording a
+view is one dictionary update, and decaying is left to whoever reads the values.
+
+A background task flushes the counts of every worker to `content.show_popularity`
+in one batched upsert per interval, which decays the stored score to the time of
+the flush and adds the new views. It then reads the top shows back into a
+snapshot, which `GET /shows/trending` serves without querying.
+"""
+
+import asyncio
+from collections.abc import Awaitable
+from collections.abc import Callable
+import datetime as dt
+import logging
+import math
+import os
+import time
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlmodel import select
+
+from .models.content import Show
+from .models.content import TrendingShowRead
+
+LOG = logging.getLogger(f"anime-api.{__name__}")
+
+__all__ = ["TRENDING", "DecayedCounter", "Trending"]
+
+# the stored score is decayed to the flush, and ranked by its log at the epoch
+_DECAYED = (
+    "p.score * exp(extract(epoch FROM p.updated_at - excluded.updated_at) / :tau)"
+)
+_UPSERT_POPULARITY = text(
+    f"""
+    INSERT INTO content.show_popularity AS p (show_id, score, updated_at, rank_key)
+    SELECT
+        batch.show_id,
+        batch.views,
+        now(),
+        ln(batch.views) + extract(epoch FROM now()) / :tau
+    FROM unnest(
+        CAST(:show_ids AS integer[]),
+        CAST(:views AS double precision[])
+    ) AS batch(show_id, views)
+    -- views of shows deleted since are dropped
+    JOIN content.shows USING (show_id)
+    ORDER BY batch.show_id
+    ON CONFLICT (show_id) DO UPDATE SET
+        score = {_DECAYED} + excluded.score,
+        updated_at = excluded.updated_at,
+        rank_key = ln({_DECAYED} + excluded.score)
+            + extract(epoch FROM excluded.updated_at) / :tau
+    """,
+)
+_TOP_SHOWS = text(
+    """
+    SELECT show_id, score * exp(extract(epoch FROM updated_at - now()) / :tau)
+    FROM content.show_popularity
+    ORDER BY rank_key DESC
+    LIMIT :limit
+    """,
+)
+
+
+class DecayedCounter:
+    """Counts per show that decay exponentially with a time constant.
+
+    >>> now = [0.0]
+    >>> counter = DecayedCounter(tau=10.0, clock=lambda: now[0])
+    >>> counter.add(1)
+    >>> now[0] = 10.0
+    >>> counter.add(1)
+    >>> {key: round(value, 3) for key, value in counter.drain().items()}
+    {1: 1.368}
+    """
+
+    # rebase before the scale gets anywhere near overflowing a float
+    _MAX_EXPONENT = 100.0
+
+    def __init__(
+        self,
+        tau: float,
+        *,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """Initialize an empty counter.
+
+        Args:
+            tau (float): Seconds for a count to decay by a factor of e.
+            clock (Callable[[], float], optional): Source of the current time,
+                overridable for tests. Defaults to `time.monotonic`.
+        """
+        self.tau = tau
+        self._clock = clock
+        self._reference = clock()
+        self._counts: dict[int, float] = {}
+
+    def __len__(self) -> int:
+        """Number of shows counted since the last drain."""
+        return len(self._counts)
+
+    def add(self, show_id: int, views: float = 1.0) -> None:
+        """Count views of a show now."""
+        exponent = (self._clock() - self._reference) / self.tau
+        if exponent > self._MAX_EXPONENT:
+            self._rebase()
+            exponent = 0.0
+        self._counts[show_id] = self._counts.get(show_id, 0.0) + views * math.exp(
+            exponent,
+        )
+
+    def drain(self) -> dict[int, float]:
+        """Take every count, decayed to now, leaving the counter empty."""
+        now = self._clock()
+        decay = math.exp((self._reference - now) / self.tau)
+        counts = {show_id: count * decay for show_id, count in self._counts.items()}
+        self._counts = {}
+        self._reference = now
+        return counts
+
+    def _rebase(self) -> None:
+        for show_id, count in self.drain().items():
+            self._counts[show_id] = count
+
+
+class Trending:
+    """Views of shows counted by this worker, and the leaderboard of every worker."""
+
+    def __init__(
+        self,
+        *,
+        half_life: float = 6 * 3600,
+        flush_interval: float = 10.0,
+        refresh_interval: float = 5.0,
+        size: int = 100,
+    ) -> None:
+        """Initialize the counts, flushed and refreshed by awaiting `run`.
+
+        Args:
+            half_life (float, optional): Seconds for a view to count half as
+                much. Defaults to 6 hours.
+            flush_interval (float, optional): Seconds between writes of the
+                counts. Defaults to 10.
+            refresh_interval (float, optional): Seconds between reads of the
+                leaderboard. Defaults to 5.
+            size (int, optional): Shows in the leaderboard. Defaults to 100.
+        """
+        self.views = DecayedCounter(half_life / math.log(2))
+        self.flush_interval = flush_interval
+        self.refresh_interval = refresh_interval
+        self.size = size
+        self.leaderboard: list[TrendingShowRead] = []
+        """Top shows, most trending first, as of `refreshed_at`."""
+        self.refreshed_at: dt.datetime | None = None
+
+    def record_view(self, show_id: int) -> None:
+        """Count a view of a show."""
+        self.views.add(show_id)
+
+    async def flush(self, engine: AsyncEngine) -> int:
+        """Write the counts of this worker in one upsert, returns shows written.
+
+        Counts are put back when the write fails, to go with the next flush.
+        """
+        counts = self.views.drain()
+        if not counts:
+            return 0
+        show_ids = sorted(counts)
+        try:
+            async with engine.begin() as conn:
+                await conn.execute(
+                    _UPSERT_POPULARITY,
+                    {
+                        "show_ids": show_ids,
+                        "views": [counts[show_id] for show_id in show_ids],
+                        "tau": self.views.tau,
+                    },
+                )
+        except Exception:
+            for show_id, views in counts.items():
+                self.views.add(show_id, views)
+            raise
+        return len(show_ids)
+
+    async def refresh(self, engine: AsyncEngine) -> None:
+        """Read the top shows of every worker into `leaderboard`."""
+        async with AsyncSession(engine) as session:
+            ranked: list[tuple[int, float]] = list(
+                (
+                    await session.execute(
+                        _TOP_SHOWS,
+                        {"tau": self.views.tau, "limit": self.size},
+                    )
+                )
+                .tuples()
+                .all(),
+            )
+            show_ids = [show_id for show_id, _ in ranked]
+            shows = (
+                await session.execute(
+                    select(Show).where(Show.show_id.in_(show_ids)),  # type: ignore[union-attr]
+                )
+            ).scalars()
+            by_id = {show.show_id: show for show in shows}
+        self.leaderboard = [
+            TrendingShowRead.model_validate(by_id[show_id], update={"trend": trend})
+            for show_id, trend in ranked
+            if show_id in by_id
+        ]
+        self.refreshed_at = dt.datetime.now(dt.UTC)
+
+    async def run(self, engine: AsyncEngine) -> None:
+        """Flush and refresh at their intervals until cancelled, then flush once."""
+        next_flush = next_refresh = time.monotonic()
+        try:
+            while True:
+                now = time.monotonic()
+                if now >= next_flush:
+                    next_flush = now + self.flush_interval
+                    await self._logged(self.flush(engine), "flush trending views")
+                if now >= next_refresh:
+                    next_refresh = now + self.refresh_interval
+                    await self._logged(self.refresh(engine), "refresh trending shows")
+                await asyncio.sleep(max(0.0, min(next_flush, next_refresh) - now))
+        except asyncio.CancelledError:
+            # the views since the last flush would be lost with the worker
+            await self._logged(self.flush(engine), "flush trending views")
+            raise
+
+    @staticmethod
+    async def _logged(operation: Awaitable[object], what: str) -> None:
+        try:
+            await operation
+        except Exception:
+            LOG.exception("Failed to %s", what)
+
+
+TRENDING = Trending(
+    half_life=float(os.getenv("ANIME_API_TRENDING_HALF_LIFE", str(6 * 3600))),
+    flush_interval=float(os.getenv("ANIME_API_TRENDING_FLUSH_INTERVAL", "10")),
+    refresh_interval=float(os.getenv("ANIME_API_TRENDING_REFRESH_INTERVAL", "5")),
+    size=int(os.getenv("ANIME_API_TRENDING_SIZE", "100")),
+)
+"""Trending shows of this worker, flushed and refreshed from the app lifespan."""
@@ -0,0 +1,143 @@
+"""Counts of shows per detail, from a materialized view refreshed in the background.
+
+Counting shows per type, status, content rating and release year scans every
+show, so the counts per combination of the four are kept in `content.show_stats`.
+A background task of each worker refreshes the view concurrently, so reads of it
+are never blocked, then reads it back and keeps the counts serialized, which
+`GET /shows/stats` sends as they are. Only one worker refreshes at a time, the
+others only read the view again.
+"""
+
+import asyncio
+from collections import Counter
+from collections.abc import Iterable
+import contextlib
+import datetime as dt
+import logging
+import os
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from .models.content import SHOW_STATS_VIEW
+from .models.content import ShowStats
+
+LOG = logging.getLogger(f"anime-api.{__name__}")
+
+__all__ = ["SHOW_STATS", "ShowStatsCache", "aggregate_show_stats", "refresh_view"]
+
+# first key of the advisory lock taken by the worker refreshing the view
+_LOCK_CLASS = 42_002
+
+_TRY_LOCK = text("SELECT pg_try_advisory_xact_lock(:lock_class)")
+_REFRESH = text(f"REFRESH MATERIALIZED VIEW CONCURRENTLY {SHOW_STATS_VIEW}")
+_READ = text(
+    f"SELECT show_type, status, content_rating, release_year, shows "  # noqa: S608
+    f"FROM {SHOW_STATS_VIEW}",
+)
+
+type StatsRow = tuple[str, str, str, int, int]
+"""`show_type`, `status`, `content_rating`, `release_year` and `shows`."""
+
+
+def aggregate_show_stats(
+    rows: Iterable[StatsRow],
+    refreshed_at: dt.datetime | None = None,
+) -> ShowStats:
+    """Sum the counts per combination of details into counts per detail.
+
+    >>> rows = [("TV", "Airing", "PG", 2020, 2), ("Movie", "Airing", "R", 2021, 1)]
+    >>> stats = aggregate_show_stats(rows)
+    >>> stats.total, stats.by_status, stats.by_release_year
+    (3, {'Airing': 3}, {2020: 2, 2021: 1})
+    """
+    by_show_type: Counter[str] = Counter()
+    by_status: Counter[str] = Counter()
+    by_content_rating: Counter[str] = Counter()
+    by_release_year: Counter[int] = Counter()
+    for show_type, status, content_rating, release_year, shows in rows:
+        by_show_type[str(show_type)] += shows
+        by_status[str(status)] += shows
+        by_content_rating[str(content_rating)] += shows
+        by_release_year[release_year] += shows
+    return ShowStats(
+        total=by_show_type.total(),
+        by_show_type=dict(sorted(by_show_type.items())),
+        by_status=dict(sorted(by_status.items())),
+        by_content_rating=dict(sorted(by_content_rating.items())),
+        by_release_year=dict(sorted(by_release_year.items())),
+        refreshed_at=refreshed_at,
+    )
+
+
+async def refresh_view(conn: AsyncConnection) -> bool:
+    """Refresh the view in the transaction of conn, unless another one already is.
+
+    Call it after bulk imports of shows, the caller commits.
+
+    Returns:
+        bool: Whether this transaction refreshed the view.
+    """
+    locked: bool = (
+        await conn.execute(_TRY_LOCK, {"lock_class": _LOCK_CLASS})
+    ).scalar_one()
+    if locked:
+        await conn.execute(_REFRESH)
+    return locked
+
+
+class ShowStatsCache:
+    """Counts of shows per detail of this worker, serialized once per read."""
+
+    def __init__(self, *, refresh_interval: float = 300.0) -> None:
+        """Initialize an empty cache, filled by awaiting `run` or `load`.
+
+        Args:
+            refresh_interval (float, optional): Seconds between refreshes of the
+                view. Defaults to 5 minutes.
+        """
+        self.refresh_interval = refresh_interval
+        self.stats: ShowStats | None = None
+        self.body: bytes | None = None
+        """`stats` serialized to JSON."""
+        self._refresh_requested = asyncio.Event()
+
+    async def load(self, conn: AsyncConnection) -> bytes:
+        """Read the view into `stats` and `body`, returns the new body."""
+        rows = (await conn.execute(_READ)).tuples().all()
+        stats = aggregate_show_stats(rows, dt.datetime.now(dt.UTC))
+        body = stats.model_dump_json().encode()
+        self.stats, self.body = stats, body
+        return body
+
+    async def refresh(self, engine: AsyncEngine) -> None:
+        """Refresh the view, unless another worker is, then read it."""
+        async with engine.begin() as conn:
+            await refresh_view(conn)
+        async with engine.connect() as conn:
+            await self.load(conn)
+
+    def request_refresh(self) -> None:
+        """Have `run` refresh now rather than at the end of its interval."""
+        self._refresh_requested.set()
+
+    async def run(self, engine: AsyncEngine) -> None:
+        """Refresh every interval, or when requested, until cancelled."""
+        while True:
+            self._refresh_requested.clear()
+            try:
+                await self.refresh(engine)
+            except Exception:
+                LOG.exception("Failed to refresh show stats")
+            with contextlib.suppress(TimeoutError):
+                await asyncio.wait_for(
+                    self._refresh_requested.wait(),
+                    self.refresh_interval,
+                )
+
+
+SHOW_STATS = ShowStatsCache(
+    refresh_interval=float(os.getenv("ANIME_API_SHOW_STATS_INTERVAL", "300")),
+)
+"""Show stats of this worker, refreshed from the app lifespan."""
@@ -0,0 +1,621 @@
+"""Content based similar shows, precomputed with NumPy.
+
+Every show is encoded into a row of a feature matrix: one-hot blocks for its type,
+status and content rating, interpolated blocks for its release year and its
+average rating, the latter weighted by how many reviews back it, and a block for
+its genres, when it has any. Rows are L2 normalized, so the cosine similarity of
+two shows is the dot product of their rows, and the top `k` neighbours of a block
+of shows come out of one matrix product and one `argpartition` along its rows.
+
+Recomputes are incremental. A digest of each row is kept in
+`content.show_feature_digests`, and only the lists changed shows can enter or leave
+are computed again: those of the changed shows, those holding a deleted show or a
+changed show now scoring below their last neighbour, and those a changed show not
+in them now beats the last neighbour of. Lists a changed show stays in are only
+ranked again with its new score.
+
+NumPy is only needed here, install the `recommend` extra to run it.
+"""
+
+import asyncio
+from collections.abc import Iterable
+from collections.abc import Sequence
+from dataclasses import dataclass
+import hashlib
+import itertools
+import logging
+import time
+from typing import Any
+
+import numpy as np
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from anime_rest_api.db.crud.similarity_operations import SIMILAR_SHOWS_K
+from anime_rest_api.db.models.content.reviews import MAX_SCORE
+from anime_rest_api.db.models.content.reviews import MIN_SCORE
+from anime_rest_api.db.models.content.show_details import ShowContentRating
+from anime_rest_api.db.models.content.show_details import ShowStatus
+from anime_rest_api.db.models.content.show_details import ShowType
+
+LOG = logging.getLogger(f"anime-api.{__name__}")
+
+BLOCK_ROWS = 512
+"""Shows scored against every show by one matrix product.
+
+A block holds `BLOCK_ROWS` x shows float32 scores, 400MB for 200k shows.
+"""
+
+FIRST_YEAR = 1950
+YEARS_PER_BUCKET = 3
+YEAR_BUCKETS = 35
+# reviews it takes for the average rating to weigh fully
+CONFIDENT_REVIEWS = 100
+GENRE_BUCKETS = 32
+"""Columns genres are hashed into by their ID.
+
+Fixed, so adding a genre doesn't change every row. The first `GENRE_BUCKETS`
+genres get a column each.
+"""
+_INSERT_BATCH = 50_000
+
+_TYPE_WEIGHT = 1.0
+_STATUS_WEIGHT = 0.5
+_CONTENT_RATING_WEIGHT = 0.75
+_YEAR_WEIGHT = 1.0
+_RATING_WEIGHT = 1.0
+_GENRE_WEIGHT = 1.0
+
+_SHOW_TYPES = {str(member): code for code, member in enumerate(ShowType)}
+_STATUSES = {str(member): code for code, member in enumerate(ShowStatus)}
+_CONTENT_RATINGS = {str(member): code for code, member in enumerate(ShowContentRating)}
+_RATING_BUCKETS = MAX_SCORE - MIN_SCORE + 1
+
+# one column offset per block of the feature matrix
+_TYPE_OFFSET = 0
+_STATUS_OFFSET = _TYPE_OFFSET + len(_SHOW_TYPES)
+_CONTENT_RATING_OFFSET = _STATUS_OFFSET + len(_STATUSES)
+_YEAR_OFFSET = _CONTENT_RATING_OFFSET + len(_CONTENT_RATINGS)
+_RATING_OFFSET = _YEAR_OFFSET + YEAR_BUCKETS
+_GENRE_OFFSET = _RATING_OFFSET + _RATING_BUCKETS
+FEATURES = _GENRE_OFFSET + GENRE_BUCKETS
+"""Columns of the feature matrix."""
+
+_FEATURE_ROWS = text(
+    """
+    SELECT
+        shows.show_id,
+        shows.show_type::text,
+        shows.status::text,
+        shows.content_rating::text,
+        extract(year FROM shows.release_date)::integer,
+        ratings.score_sum::float / nullif(ratings.review_count, 0),
+        coalesce(ratings.review_count, 0),
+        ARRAY(
+            SELECT genres.genre_id FROM content.show_genres AS genres
+            WHERE genres.show_id = shows.show_id
+        )
+    FROM content.shows AS shows
+    LEFT JOIN content.show_ratings AS ratings USING (show_id)
+    ORDER BY shows.show_id
+    """,
+)
+_DIGESTS = text("SELECT show_id, digest FROM content.show_feature_digests")
+_LISTS_HOLDING = text(
+    """
+    SELECT show_id, similar_show_id FROM content.show_similarity
+    WHERE similar_show_id = ANY(CAST(:show_ids AS integer[]))
+    """,
+)
+_LISTS = text(
+    """
+    SELECT show_id, similar_show_id FROM content.show_similarity
+    WHERE show_id = ANY(CAST(:show_ids AS integer[]))
+    """,
+)
+# score of the last neighbour of every list, lists short of `k` take any show
+_LAST_SCORES = text(
+    """
+    SELECT show_id, CASE WHEN count(*) < :k THEN NULL ELSE min(score) END
+    FROM content.show_similarity
+    GROUP BY show_id
+    """,
+)
+_DELETE_LISTS = text(
+    """
+    DELETE FROM content.show_similarity
+    WHERE show_id = ANY(CAST(:show_ids AS integer[]))
+    """,
+)
+_INSERT_NEIGHBOURS = text(
+    """
+    INSERT INTO content.show_similarity (show_id, rank, similar_show_id, score)
+    SELECT * FROM unnest(
+        CAST(:show_ids AS integer[]),
+        CAST(:ranks AS integer[]),
+        CAST(:similar_show_ids AS integer[]),
+        CAST(:scores AS double precision[])
+    )
+    """,
+)
+_UPSERT_DIGESTS = text(
+    """
+    INSERT INTO content.show_feature_digests (show_id, digest, computed_at)
+    SELECT *, now() FROM unnest(
+        CAST(:show_ids AS integer[]),
+        CAST(:digests AS bigint[])
+    )
+    ON CONFLICT (show_id) DO UPDATE
+        SET digest = excluded.digest, computed_at = excluded.computed_at
+    """,
+)
+_DELETE_DIGESTS = text(
+    """
+    DELETE FROM content.show_feature_digests
+    WHERE show_id = ANY(CAST(:show_ids AS integer[]))
+    """,
+)
+
+
+@dataclass(frozen=True, slots=True)
+class FeatureColumns:
+    """Columns of show attributes the feature matrix is encoded from.
+
+    Categorical attributes are held as codes, the position of their value in
+    their enum.
+    """
+
+    show_ids: np.ndarray
+    show_types: np.ndarray
+    statuses: np.ndarray
+    content_ratings: np.ndarray
+    release_years: np.ndarray
+    average_ratings: np.ndarray
+    """Mean review score, NaN for shows without reviews."""
+    review_counts: np.ndarray
+    genre_rows: np.ndarray
+    """Row of the show of each entry of `genre_ids`."""
+    genre_ids: np.ndarray
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[Sequence[Any]]) -> "FeatureColumns":
+        """Build columns from rows in the order of `_FEATURE_ROWS`."""
+        columns = list(zip(*rows, strict=True)) or [()] * 8
+        show_ids, show_types, statuses, ratings, years, averages, counts, genres = (
+            columns
+        )
+        return cls(
+            show_ids=np.array(show_ids, dtype=np.int64),
+            show_types=np.array([_SHOW_TYPES[v] for v in show_types], dtype=np.intp),
+            statuses=np.array([_STATUSES[v] for v in statuses], dtype=np.intp),
+            content_ratings=np.array(
+                [_CONTENT_RATINGS[v] for v in ratings],
+                dtype=np.intp,
+            ),
+            release_years=np.array(years, dtype=np.float64),
+            average_ratings=np.array(
+                [np.nan if v is None else v for v in averages],
+                dtype=np.float64,
+            ),
+            review_counts=np.array(counts, dtype=np.float64),
+            genre_rows=np.repeat(
+                np.arange(len(genres)),
+                np.array([len(show_genres) for show_genres in genres], dtype=np.intp),
+            ),
+            genre_ids=np.fromiter(
+                itertools.chain.from_iterable(genres),
+                dtype=np.int64,
+            ),
+        )
+
+
+@dataclass(slots=True)
+class SimilarityRefresh:
+    """What a recompute of the similar shows did."""
+
+    shows: int
+    changed: int
+    deleted: int
+    recomputed: int
+    rescored: int
+    """Lists only ranked again with the new scores of changed shows in them."""
+    seconds: float
+
+
+def _interpolate(
+    out: np.ndarray,
+    offset: int,
+    buckets: int,
+    positions: np.ndarray,
+    weights: np.ndarray | float,
+) -> None:
+    """Split each weight between the two buckets around its position.
+
+    Shows a fraction of a bucket apart still share most of their weight.
+    """
+    positions = np.clip(positions, 0, buckets - 1)
+    low = np.floor(positions).astype(np.intp)
+    high = np.minimum(low + 1, buckets - 1)
+    fraction = positions - low
+    rows = np.arange(len(positions))
+    out[rows, offset + low] += weights * (1 - fraction)
+    out[rows, offset + high] += weights * fraction
+
+
+def encode_features(columns: FeatureColumns) -> np.ndarray:
+    """Encode shows into a feature matrix with L2 normalized float32 rows.
+
+    >>> columns = FeatureColumns.from_rows(
+    ...     [
+    ...         (1, "TV", "Finished", "PG13", 2010, 8.0, 100, [1, 4]),
+    ...         (2, "TV", "Finished", "PG13", 2011, 7.9, 90, [1, 4]),
+    ...         (3, "Movie", "Airing", "G", 1980, None, 0, []),
+    ...     ],
+    ... )
+    >>> features = encode_features(columns)
+    >>> features.shape == (3, FEATURES)
+    True
+    >>> scores = features @ features.T
+    >>> bool(scores[0, 1] > 0.9 > scores[0, 2])
+    True
+    """
+    out = np.zeros((len(columns.show_ids), FEATURES), dtype=np.float64)
+    rows = np.arange(len(columns.show_ids))
+    out[rows, _TYPE_OFFSET + columns.show_types] = _TYPE_WEIGHT
+    out[rows, _STATUS_OFFSET + columns.statuses] = _STATUS_WEIGHT
+    out[rows, _CONTENT_RATING_OFFSET + columns.content_ratings] = _CONTENT_RATING_WEIGHT
+    _interpolate(
+        out,
+        _YEAR_OFFSET,
+        YEAR_BUCKETS,
+        (columns.release_years - FIRST_YEAR) / YEARS_PER_BUCKET,
+        _YEAR_WEIGHT,
+    )
+    # rounded, so a review barely moving the average doesn't count as a change
+    rated = ~np.isnan(columns.average_ratings)
+    averages = np.round(np.where(rated, columns.average_ratings, MIN_SCORE), 1)
+    confidence = np.round(
+        np.minimum(
+            1.0,
+            np.log1p(columns.review_counts) / np.log1p(CONFIDENT_REVIEWS),
+        ),
+        2,
+    )
+    _interpolate(
+        out,
+        _RATING_OFFSET,
+        _RATING_BUCKETS,
+        averages - MIN_SCORE,
+        np.where(rated, _RATING_WEIGHT * confidence, 0.0),
+    )
+    # spread over the genres of a show, so many genres don't outweigh the rest
+    genre_counts = np.bincount(columns.genre_rows, minlength=len(rows))
+    np.add.at(
+        out,
+        (columns.genre_rows, _GENRE_OFFSET + columns.genre_ids % GENRE_BUCKETS),
+        _GENRE_WEIGHT / np.sqrt(genre_counts[columns.genre_rows]),
+    )
+    out /= np.linalg.norm(out, axis=1, keepdims=True)
+    return out.astype(np.float32)
+
+
+def feature_digests(features: np.ndarray) -> np.ndarray:
+    """Digest each row of a feature matrix into a signed 64 bit integer."""
+    return np.array(
+        [
+            int.from_bytes(
+                hashlib.blake2b(row.tobytes(), digest_size=8).digest(),
+                signed=True,
+            )
+            for row in features
+        ],
+        dtype=np.int64,
+    )
+
+
+def top_k_neighbours(
+    features: np.ndarray,
+    queries: np.ndarray,
+    k: int,
+    block_rows: int = BLOCK_ROWS,
+) -> tuple[np.ndarray, np.ndarray]:
+    """Find the `k` most similar rows of each query row, a show is not its own.
+
+    Args:
+        features (np.ndarray): L2 normalized feature matrix.
+        queries (np.ndarray): Row indices to find neighbours of.
+        k (int): Neighbours per query, capped to the other rows there are.
+        block_rows (int, optional): Queries scored by one matrix product.
+            Defaults to `BLOCK_ROWS`.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: Row indices and cosine similarities of
+            the neighbours, one row per query, most similar first.
+
+    >>> features = np.eye(3, dtype=np.float32)
+    >>> features[2] = [0.6, 0.8, 0]
+    >>> indices, scores = top_k_neighbours(features, np.arange(3), 1)
+    >>> indices.ravel().tolist()
+    [2, 2, 1]
+    """
+    k = min(k, len(features) - 1)
+    indices = np.empty((len(queries), max(k, 0)), dtype=np.intp)
+    scores = np.empty((len(queries), max(k, 0)), dtype=np.float32)
+    if k <= 0:
+        return indices, scores
+    transposed = np.ascontiguousarray(features.T)
+    for start in range(0, len(queries), block_rows):
+        rows = queries[start : start + block_rows]
+        block = features[rows] @ transposed
+        block[np.arange(len(rows)), rows] = -np.inf
+        top = np.argpartition(block, -k, axis=1)[:, -k:]
+        top_scores = np.take_along_axis(block, top, axis=1)
+        order = np.argsort(-top_scores, axis=1, kind="stable")
+        indices[start : start + len(rows)] = np.take_along_axis(top, order, axis=1)
+        scores[start : start + len(rows)] = np.take_along_axis(
+            top_scores,
+            order,
+            axis=1,
+        )
+    return indices, scores
+
+
+def beaten_lists(
+    features: np.ndarray,
+    changed: np.ndarray,
+    last_scores: np.ndarray,
+    block_rows: int = BLOCK_ROWS,
+    members: tuple[np.ndarray, np.ndarray] | None = None,
+) -> np.ndarray:
+    """Find the rows a changed row is now more similar to than their last neighbour.
+
+    Args:
+        features (np.ndarray): L2 normalized feature matrix.
+        changed (np.ndarray): Row indices of the changed shows.
+        last_scores (np.ndarray): Score of the last neighbour of every row,
+            -inf for rows with a short list.
+        block_rows (int, optional): Rows scored by one matrix product.
+            Defaults to `BLOCK_ROWS`.
+        members (tuple[np.ndarray, np.ndarray] | None, optional): Rows and the
+            positions in `changed` of changed rows already in their list, which
+            don't enter it again. Defaults to None.
+
+    Returns:
+        np.ndarray: Boolean mask of the rows.
+    """
+    beaten = np.zeros(len(features), dtype=bool)
+    if len(changed) == 0:
+        return beaten
+    member_rows, member_columns = members or (np.empty(0, dtype=np.intp),) * 2
+    changed_features = np.ascontiguousarray(features[changed].T)
+    for start in range(0, len(features), block_rows):
+        block = features[start : start + block_rows] @ changed_features
+        in_block = (member_rows >= start) & (member_rows < start + len(block))
+        block[member_rows[in_block] - start, member_columns[in_block]] = -np.inf
+        beaten[start : start + block_rows] = (
+            block.max(axis=1) > last_scores[start : start + block_rows]
+        )
+    return beaten
+
+
+async def _load(
+    conn: AsyncConnection,
+    k: int,
+) -> tuple[FeatureColumns, dict[int, int], dict[int, float | None]]:
+    columns = FeatureColumns.from_rows((await conn.execute(_FEATURE_ROWS)).all())
+    digests: dict[int, int] = dict((await conn.execute(_DIGESTS)).tuples().all())
+    last_scores: dict[int, float | None] = dict(
+        (await conn.execute(_LAST_SCORES, {"k": k})).tuples().all(),
+    )
+    return columns, digests, last_scores
+
+
+def _rows_of(show_ids: np.ndarray, wanted: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Find the rows of `wanted` show IDs, and which of them are still shows."""
+    rows = np.minimum(np.searchsorted(show_ids, wanted), max(len(show_ids) - 1, 0))
+    return rows, show_ids[rows] == wanted
+
+
+def _pair_scores(
+    features: np.ndarray,
+    rows: np.ndarray,
+    others: np.ndarray,
+) -> np.ndarray:
+    return np.einsum("ij,ij->i", features[rows], features[others])
+
+
+async def _insert(
+    conn: AsyncConnection,
+    owners: np.ndarray,
+    ranks: np.ndarray,
+    neighbours: np.ndarray,
+    scores: np.ndarray,
+) -> None:
+    for start in range(0, len(owners), _INSERT_BATCH):
+        batch = slice(start, start + _INSERT_BATCH)
+        await conn.execute(
+            _INSERT_NEIGHBOURS,
+            {
+                "show_ids": owners[batch].tolist(),
+                "ranks": ranks[batch].tolist(),
+                "similar_show_ids": neighbours[batch].tolist(),
+                "scores": scores[batch].astype(np.float64).tolist(),
+            },
+        )
+
+
+async def _store(
+    conn: AsyncConnection,
+    owners: np.ndarray,
+    neighbours: np.ndarray,
+    scores: np.ndarray,
+) -> None:
+    """Replace the lists of `owners` with rows of `neighbours` show IDs."""
+    await conn.execute(_DELETE_LISTS, {"show_ids": owners.tolist()})
+    k = neighbours.shape[1]
+    await _insert(
+        conn,
+        np.repeat(owners, k),
+        np.tile(np.arange(1, k + 1), len(owners)),
+        neighbours.ravel(),
+        scores.ravel(),
+    )
+
+
+async def _rescore(
+    conn: AsyncConnection,
+    features: np.ndarray,
+    show_ids: np.ndarray,
+    owners: np.ndarray,
+) -> None:
+    """Rank the lists of `owners` rows again by the current scores of their shows.
+
+    Only for lists no show enters or leaves.
+    """
+    if len(owners) == 0:
+        return
+    listed = (await conn.execute(_LISTS, {"show_ids": show_ids[owners].tolist()})).all()
+    list_ids, neighbours = np.array(listed, dtype=np.int64).reshape(-1, 2).T
+    scores = _pair_scores(
+        features,
+        _rows_of(show_ids, list_ids)[0],
+        _rows_of(show_ids, neighbours)[0],
+    )
+    order = np.lexsort((-scores, list_ids))
+    list_ids, neighbours, scores = list_ids[order], neighbours[order], scores[order]
+    # position in its list, counted from the first entry of the list
+    ranks = np.arange(1, len(list_ids) + 1) - np.searchsorted(list_ids, list_ids)
+    await conn.execute(_DELETE_LISTS, {"show_ids": show_ids[owners].tolist()})
+    await _insert(conn, list_ids, ranks, neighbours, scores)
+
+
+async def refresh_similarity(
+    engine: AsyncEngine,
+    *,
+    k: int = SIMILAR_SHOWS_K,
+    full: bool = False,
+    block_rows: int = BLOCK_ROWS,
+) -> SimilarityRefresh:
+    """Recompute the similar shows of the shows that need it.
+
+    The matrix work runs in a thread, so the event loop stays free meanwhile.
+
+    Args:
+        engine (AsyncEngine): Engine to read the shows and write the lists with.
+        k (int, optional): Neighbours kept per show. Defaults to `SIMILAR_SHOWS_K`.
+        full (bool, optional): Recompute every list. Defaults to False.
+        block_rows (int, optional): Shows scored by one matrix product.
+            Defaults to `BLOCK_ROWS`.
+
+    Returns:
+        SimilarityRefresh: What the recompute did.
+    """
+    begin = time.perf_counter()
+    async with engine.connect() as conn:
+        columns, digests, last_scores = await _load(conn, k)
+    features = await asyncio.to_thread(encode_features, columns)
+    current = await asyncio.to_thread(feature_digests, features)
+    show_ids = columns.show_ids
+    changed = np.array(
+        [
+            digests.get(show_id) != digest
+            for show_id, digest in zip(
+                show_ids.tolist(),
+                current.tolist(),
+                strict=True,
+            )
+        ],
+        dtype=bool,
+    )
+    deleted = sorted(set(digests).difference(show_ids.tolist()))
+    holding = np.zeros(len(show_ids), dtype=bool)
+    if full or not digests:
+        targets = np.ones(len(show_ids), dtype=bool)
+    else:
+        targets = changed.copy()
+        changed_rows = np.flatnonzero(changed)
+        last = np.array(
+            [last_scores.get(show_id, None) for show_id in show_ids.tolist()],
+            dtype=np.float64,
+        )
+        # no list yet, or a short one, takes any show
+        last[np.isnan(last)] = -np.inf
+        members = None
+        moved = show_ids[changed].tolist() + deleted
+        if moved:
+            async with engine.connect() as conn:
+                held = (await conn.execute(_LISTS_HOLDING, {"show_ids": moved})).all()
+            list_ids, neighbours = np.array(held, dtype=np.int64).reshape(-1, 2).T
+            lists = _rows_of(show_ids, list_ids)[0]
+            rows, found = _rows_of(show_ids, neighbours)
+            # a deleted show leaves every list, a changed one those it now scores
+            # below the last neighbour of, the rest can't push it out
+            leaving = ~found
+            leaving[found] = (
+                _pair_scores(features, lists[found], rows[found]) < last[lists[found]]
+            )
+            targets[lists[leaving]] = True
+            holding[lists] = True
+            members = (lists[found], np.searchsorted(changed_rows, rows[found]))
+        targets |= await asyncio.to_thread(
+            beaten_lists,
+            features,
+            changed_rows,
+            last.astype(np.float32),
+            block_rows,
+            members,
+        )
+    rescored = np.flatnonzero(holding & ~targets)
+    queries = np.flatnonzero(targets)
+    indices, scores = await asyncio.to_thread(
+        top_k_neighbours,
+        features,
+        queries,
+        k,
+        block_rows,
+    )
+    async with engine.begin() as conn:
+        await _store(conn, show_ids[queries], show_ids[indices], scores)
+        await _rescore(conn, features, show_ids, rescored)
+        await conn.execute(
+            _UPSERT_DIGESTS,
+            {
+                "show_ids": show_ids[changed].tolist(),
+                "digests": current[changed].tolist(),
+            },
+        )
+        if deleted:
+            await conn.execute(_DELETE_DIGESTS, {"show_ids": deleted})
+    refresh = SimilarityRefresh(
+        shows=len(show_ids),
+        changed=int(changed.sum()),
+        deleted=len(deleted),
+        recomputed=len(queries),
+        rescored=len(rescored),
+        seconds=time.perf_counter() - begin,
+    )
+    LOG.info("Refreshed similar shows: %s", refresh)
+    return refresh
+
+
+def refresh_similarity_blocking(
+    database_url: str,
+    *,
+    full: bool = False,
+) -> SimilarityRefresh:
+    """Recompute the similar shows with an engine and event loop of its own.
+
+    For running the whole recompute in another process, such as the process pool
+    of the job worker.
+    """
+
+    async def refresh() -> SimilarityRefresh:
+        engine = create_async_engine(database_url)
+        try:
+            return await refresh_similarity(engine, full=full)
+        finally:
+            await engine.dispose()
+
+    return asyncio.run(refresh())
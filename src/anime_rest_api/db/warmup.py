@@ -0,0 +1,122 @@
+"""Warm a worker up before it reports ready.
+
+A fresh worker has an empty pool, asyncpg has not prepared any statement on its
+connections, SQLAlchemy has not compiled any of them, and the read caches are empty.
+The first requests pay for all of that. Warming up opens the pool's connections,
+runs the hot CRUD statements once on each of them, and optionally fills the show
+cache, so readiness only turns on once the first requests get the usual latency.
+"""
+
+import asyncio
+from contextlib import AsyncExitStack
+from contextlib import suppress
+import logging
+import os
+import time
+
+from sqlalchemy.ext.asyncio import AsyncConnection
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .crud.errors import EntryNotFoundError
+from .crud.show_operations import SHOW_CACHE
+from .crud.show_operations import get_show
+from .crud.show_operations import list_shows
+from .crud.user_operations import get_user
+from .crud.user_operations import get_user_login
+from .models.content import ShowRead
+
+LOG = logging.getLogger(f"anime-api.{__name__}")
+
+__all__ = ["WARM_UP", "WarmUp", "warm_connection"]
+
+
+async def warm_connection(connection: AsyncConnection) -> None:
+    """Run every hot CRUD statement once on connection, then roll back.
+
+    Lookups are made for rows that don't exist, the statements still get compiled
+    and prepared on the connection.
+    """
+    async with AsyncSession(bind=connection) as session:
+        await get_show(session, 0)
+        await list_shows(session, 0, 1)
+        with suppress(EntryNotFoundError):
+            await get_user(session, 0)
+        with suppress(EntryNotFoundError):
+            await get_user_login(session, "", "")
+        await session.rollback()
+
+
+class WarmUp:
+    """Warm-up of a worker, and whether it finished."""
+
+    def __init__(
+        self,
+        *,
+        connections: int | None = None,
+        preload_shows: int = 0,
+    ) -> None:
+        """Initialize a warm-up, started by awaiting `run` with the engine to warm.
+
+        Args:
+            connections (int | None, optional): Connections opened and warmed at
+                once. Defaults to None, the size of the pool.
+            preload_shows (int, optional): Shows read into `SHOW_CACHE`, by ID.
+                Defaults to 0, not preloading any.
+        """
+        self.connections = connections
+        self.preload_shows = preload_shows
+        self.done = asyncio.Event()
+        """Set once the warm-up finished, whether or not it succeeded."""
+        self.duration: float | None = None
+        """Seconds the warm-up took, None until it finished."""
+
+    async def run(self, engine: AsyncEngine) -> None:
+        """Warm engine up, then set `done`.
+
+        A failed warm-up is logged and still sets `done`, the worker can serve
+        requests, they are only slower.
+        """
+        started = time.perf_counter()
+        try:
+            connections = self.connections
+            if connections is None:
+                connections = getattr(engine.pool, "size", lambda: 1)()
+            async with AsyncExitStack() as stack:
+                # hold every connection at once, so the pool has to open all of them
+                opened = await asyncio.gather(
+                    *(
+                        stack.enter_async_context(engine.connect())
+                        for _ in range(connections)
+                    ),
+                )
+                await asyncio.gather(*(warm_connection(conn) for conn in opened))
+            if self.preload_shows > 0:
+                await self._preload_shows(engine)
+        except Exception:
+            LOG.exception("Warm-up failed, the worker starts cold")
+        finally:
+            self.duration = time.perf_counter() - started
+            self.done.set()
+        LOG.info("Warm-up finished in %.3fs", self.duration)
+
+    async def _preload_shows(self, engine: AsyncEngine) -> None:
+        async with AsyncSession(engine) as session:
+            shows = await list_shows(
+                session,
+                0,
+                min(self.preload_shows, SHOW_CACHE.max_size),
+            )
+        for show in shows:
+            SHOW_CACHE.set(show.show_id, ShowRead.model_validate(show))  # type: ignore[arg-type]
+
+
+WARM_UP = WarmUp(
+    connections=(
+        int(os.environ["ANIME_API_WARMUP_CONNECTIONS"])
+        if os.getenv("ANIME_API_WARMUP_CONNECTIONS")
+        else None
+    ),
+    preload_shows=int(os.getenv("ANIME_API_WARMUP_PRELOAD_SHOWS", "0")),
+)
+"""Warm-up of this worker, run from the app lifespan."""
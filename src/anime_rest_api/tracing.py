@@ -0,0 +1,419 @@
+"""Lightweight in-process request tracing.
+
+Each sampled request gets a root span, and code running for it opens child spans
+with `span`. Finished spans are queued without blocking, and written in batches by
+a background task to a file, one OTLP/JSON `ExportTraceServiceRequest` per line,
+the format of the OpenTelemetry collector file exporter.
+
+Sampling is decided once per trace when the request comes in: the sampled flag of
+an incoming W3C `traceparent` is followed, otherwise `ANIME_API_TRACE_SAMPLE_RATE`
+of requests are sampled. Code outside a sampled trace only pays a context variable
+lookup per span. Tracing is off unless `ANIME_API_TRACE_FILE` is set.
+"""
+
+import asyncio
+from collections import deque
+from collections.abc import Iterator
+import contextlib
+from contextvars import ContextVar
+import json
+import logging
+import os
+import random
+import time
+from typing import Any
+
+from sqlalchemy import event
+from sqlalchemy.engine import Connection
+from sqlalchemy.engine import ExceptionContext
+from sqlalchemy.engine import ExecutionContext
+from sqlalchemy.ext.asyncio import AsyncEngine
+from starlette.datastructures import MutableHeaders
+from starlette.status import HTTP_500_INTERNAL_SERVER_ERROR
+from starlette.types import ASGIApp
+from starlette.types import Message
+from starlette.types import Receive
+from starlette.types import Scope
+from starlette.types import Send
+
+LOG = logging.getLogger(f"anime-api.{__name__}")
+
+# OTLP span kinds
+INTERNAL = 1
+SERVER = 2
+CLIENT = 3
+
+__all__ = [
+    "CURRENT_SPAN",
+    "EXPORTER",
+    "Span",
+    "SpanExporter",
+    "TracingMiddleware",
+    "end_span",
+    "instrument_engine",
+    "parse_traceparent",
+    "span",
+    "start_span",
+    "start_trace",
+]
+
+CURRENT_SPAN: ContextVar["Span | None"] = ContextVar("CURRENT_SPAN", default=None)
+"""Innermost open span of the running trace, None when it isn't sampled."""
+_SPAN_ATTRIBUTE = "_anime_api_span"
+
+
+def _new_id(bits: int) -> str:
+    return f"{random.getrandbits(bits):0{bits // 4}x}"
+
+
+def _otlp_value(value: Any) -> dict[str, Any]:  # noqa: ANN401
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+class Span:
+    """One timed operation of a trace."""
+
+    __slots__ = (
+        "attributes",
+        "end_ns",
+        "error",
+        "kind",
+        "name",
+        "parent_id",
+        "span_id",
+        "start_ns",
+        "trace_id",
+    )
+
+    def __init__(
+        self,
+        name: str,
+        trace_id: str,
+        parent_id: str | None,
+        *,
+        kind: int = INTERNAL,
+        attributes: dict[str, Any] | None = None,
+    ) -> None:
+        """Start a span now."""
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = _new_id(64)
+        self.parent_id = parent_id
+        self.kind = kind
+        self.attributes = attributes or {}
+        self.error = False
+        self.start_ns = time.time_ns()
+        self.end_ns = 0
+
+    def traceparent(self) -> str:
+        """W3C `traceparent` header value pointing at this span."""
+        return f"00-{self.trace_id}-{self.span_id}-01"
+
+    def to_otlp(self) -> dict[str, Any]:
+        """Span in the OTLP/JSON encoding."""
+        otlp = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": self.kind,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns),
+            "attributes": [
+                {"key": key, "value": _otlp_value(value)}
+                for key, value in self.attributes.items()
+            ],
+            "status": {"code": 2 if self.error else 1},
+        }
+        if self.parent_id is not None:
+            otlp["parentSpanId"] = self.parent_id
+        return otlp
+
+
+class SpanExporter:
+    """Queue finished spans and append them to a file in batches."""
+
+    def __init__(
+        self,
+        path: str,
+        *,
+        batch_size: int = 512,
+        max_queue: int = 8192,
+        interval: float = 5.0,
+        service_name: str = "anime-api",
+    ) -> None:
+        """Initialize an exporter, writing once `run` is awaited.
+
+        Args:
+            path (str): File the batches are appended to.
+            batch_size (int, optional): Spans per written line, a full batch is
+                written right away. Defaults to 512.
+            max_queue (int, optional): Spans waiting to be written, newer spans are
+                dropped when full. Defaults to 8192.
+            interval (float, optional): Seconds between writes of partial batches.
+                Defaults to 5.
+            service_name (str, optional): `service.name` of the exported resource.
+                Defaults to `anime-api`.
+        """
+        self.path = path
+        self.batch_size = batch_size
+        self.interval = interval
+        self.service_name = service_name
+        self.dropped = 0
+        self._queue: deque[Span] = deque()
+        self._max_queue = max_queue
+        self._batch_ready = asyncio.Event()
+
+    def submit(self, finished: Span) -> None:
+        """Queue a finished span, never blocking."""
+        if len(self._queue) >= self._max_queue:
+            self.dropped += 1
+            return
+        self._queue.append(finished)
+        if len(self._queue) >= self.batch_size:
+            self._batch_ready.set()
+
+    async def run(self) -> None:
+        """Write batches until cancelled, then write what is left."""
+        try:
+            while True:
+                with contextlib.suppress(TimeoutError):
+                    await asyncio.wait_for(
+                        self._batch_ready.wait(),
+                        timeout=self.interval,
+                    )
+                self._batch_ready.clear()
+                await self.flush()
+        finally:
+            await self.flush()
+
+    async def flush(self) -> None:
+        """Write every queued span."""
+        while self._queue:
+            count = min(len(self._queue), self.batch_size)
+            batch = [self._queue.popleft() for _ in range(count)]
+            await asyncio.to_thread(self._write, batch)
+
+    def _write(self, batch: list[Span]) -> None:
+        request = {
+            "resourceSpans": [
+                {
+                    "resource": {
+                        "attributes": [
+                            {
+                                "key": "service.name",
+                                "value": {"stringValue": self.service_name},
+                            },
+                        ],
+                    },
+                    "scopeSpans": [
+                        {
+                            "scope": {"name": "anime_rest_api"},
+                            "spans": [finished.to_otlp() for finished in batch],
+                        },
+                    ],
+                },
+            ],
+        }
+        with open(self.path, "a", encoding="utf-8") as trace_file:  # noqa: PTH123
+            trace_file.write(json.dumps(request, separators=(",", ":")) + "\n")
+
+
+_TRACE_FILE = os.getenv("ANIME_API_TRACE_FILE")
+SAMPLE_RATE = float(os.getenv("ANIME_API_TRACE_SAMPLE_RATE", "0.01"))
+"""Share of requests without a `traceparent` that are traced."""
+EXPORTER = SpanExporter(_TRACE_FILE) if _TRACE_FILE else None
+"""Process wide exporter, None when tracing is off."""
+
+
+def parse_traceparent(value: str) -> tuple[str, str, bool] | None:
+    """Read trace id, parent span id and sampled flag of a `traceparent`.
+
+    >>> parse_traceparent("00-4bf92f3577b34da6a3ce929d0e0e4736-00f067aa0ba902b7-01")
+    ('4bf92f3577b34da6a3ce929d0e0e4736', '00f067aa0ba902b7', True)
+    >>> parse_traceparent("not a traceparent") is None
+    True
+    """
+    parts = value.strip().split("-")
+    if len(parts) < 4 or len(parts[1]) != 32 or len(parts[2]) != 16:  # noqa: PLR2004
+        return None
+    version, trace_id, parent_id, flags = parts[:4]
+    try:
+        sampled = bool(int(flags, 16) & 1)
+        int(trace_id, 16)
+        int(parent_id, 16)
+    except ValueError:
+        return None
+    if version == "ff" or set(trace_id) == {"0"} or set(parent_id) == {"0"}:
+        return None
+    return trace_id, parent_id, sampled
+
+
+def start_trace(
+    name: str,
+    traceparent: str | None = None,
+    *,
+    sample_rate: float | None = None,
+    **attributes: Any,  # noqa: ANN401
+) -> Span | None:
+    """Start the root span of a request, None when the request isn't sampled."""
+    parent = parse_traceparent(traceparent) if traceparent else None
+    if parent is not None:
+        trace_id, parent_id, sampled = parent
+    else:
+        trace_id, parent_id = _new_id(128), None
+        rate = SAMPLE_RATE if sample_rate is None else sample_rate
+        sampled = random.random() < rate  # noqa: S311
+    if not sampled:
+        return None
+    return Span(name, trace_id, parent_id, kind=SERVER, attributes=attributes)
+
+
+def start_span(
+    name: str,
+    *,
+    kind: int = INTERNAL,
+    **attributes: Any,  # noqa: ANN401
+) -> Span | None:
+    """Start a child of the current span without making it current.
+
+    Returns None when the current trace isn't sampled.
+    """
+    parent = CURRENT_SPAN.get()
+    if parent is None:
+        return None
+    return Span(
+        name,
+        parent.trace_id,
+        parent.span_id,
+        kind=kind,
+        attributes=attributes,
+    )
+
+
+def end_span(finished: Span | None, *, error: bool = False) -> None:
+    """End a span from `start_span` or `start_trace` and queue it for export."""
+    if finished is None:
+        return
+    finished.end_ns = time.time_ns()
+    finished.error = error
+    if EXPORTER is not None:
+        EXPORTER.submit(finished)
+
+
+@contextlib.contextmanager
+def span(name: str, **attributes: Any) -> Iterator[Span | None]:  # noqa: ANN401
+    """Trace the body as a child of the current span, a no-op when not sampled."""
+    child = start_span(name, **attributes)
+    if child is None:
+        yield None
+        return
+    token = CURRENT_SPAN.set(child)
+    try:
+        yield child
+    except BaseException:
+        end_span(child, error=True)
+        raise
+    else:
+        end_span(child)
+    finally:
+        CURRENT_SPAN.reset(token)
+
+
+def _before_cursor_execute(
+    _conn: Connection,
+    _cursor: Any,  # noqa: ANN401
+    statement: str,
+    _parameters: Any,  # noqa: ANN401
+    context: ExecutionContext | None,
+    executemany: bool,  # noqa: FBT001
+) -> None:
+    # runs in the greenlet of the awaiting task, which shares its context
+    statement_span = start_span(
+        "sql",
+        kind=CLIENT,
+        **{"db.system": "postgresql", "db.statement": statement},
+    )
+    if statement_span is not None and context is not None:
+        if executemany:
+            statement_span.attributes["db.executemany"] = True
+        setattr(context, _SPAN_ATTRIBUTE, statement_span)
+
+
+def _after_cursor_execute(
+    _conn: Connection,
+    _cursor: Any,  # noqa: ANN401
+    _statement: str,
+    _parameters: Any,  # noqa: ANN401
+    context: ExecutionContext | None,
+    _executemany: bool,  # noqa: FBT001
+) -> None:
+    end_span(getattr(context, _SPAN_ATTRIBUTE, None))
+
+
+def _handle_error(exception_context: ExceptionContext) -> None:
+    statement_span = getattr(exception_context.execution_context, _SPAN_ATTRIBUTE, None)
+    end_span(statement_span, error=True)
+
+
+def instrument_engine(engine: AsyncEngine) -> None:
+    """Trace every statement of engine as a child span of the current span."""
+    event.listen(engine.sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine.sync_engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine.sync_engine, "handle_error", _handle_error)
+
+
+class TracingMiddleware:
+    """Open the root span of sampled HTTP requests.
+
+    The span continues the trace of an incoming `traceparent`, and its own
+    `traceparent` is returned in the response headers for correlation.
+    """
+
+    def __init__(self, app: ASGIApp, *, sample_rate: float | None = None) -> None:
+        """Wrap app, sampling `SAMPLE_RATE` of new traces by default."""
+        self.app = app
+        self.sample_rate = sample_rate
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """Run a request inside its root span when sampled."""
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        traceparent = None
+        for key, value in scope["headers"]:
+            if key == b"traceparent":
+                traceparent = value.decode("latin-1")
+                break
+        root = start_trace(
+            f"{scope['method']} {scope['path']}",
+            traceparent,
+            sample_rate=self.sample_rate,
+            **{"http.method": scope["method"], "http.target": scope["path"]},
+        )
+        if root is None:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_traced(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                root.attributes["http.status_code"] = message["status"]
+                MutableHeaders(scope=message).append("traceparent", root.traceparent())
+            await send(message)
+
+        token = CURRENT_SPAN.set(root)
+        try:
+            await self.app(scope, receive, send_traced)
+        except BaseException:
+            end_span(root, error=True)
+            raise
+        else:
+            status_code = root.attributes.get("http.status_code", 500)
+            end_span(root, error=status_code >= HTTP_500_INTERNAL_SERVER_ERROR)
+        finally:
+            CURRENT_SPAN.reset(token)
@@ -0,0 +1,161 @@
+"""Worker running the background jobs queued in `content.jobs`.
+
+Runs next to the API, as many as wanted, each with its own process pool:
+
+    python -m anime_rest_api.worker --processes 2
+"""
+
+import argparse
+
+from dotenv import find_dotenv
+from dotenv import load_dotenv
+
+load_dotenv(
+    find_dotenv(".env.production", raise_error_if_not_found=True, usecwd=False),
+    verbose=True,
+)
+
+# have to make sure environment variables are loaded first
+import asyncio  # noqa: E402
+import csv  # noqa: E402
+import dataclasses  # noqa: E402
+import datetime as dt  # noqa: E402
+import logging.config  # noqa: E402
+from pathlib import Path  # noqa: E402
+from typing import Any  # noqa: E402
+
+from anime_rest_api.api.log import LogConfig  # noqa: E402
+from anime_rest_api.db import setup_db  # noqa: E402
+from anime_rest_api.db.connection import Db  # noqa: E402
+from anime_rest_api.db.crud.episode_operations import EpisodeRow  # noqa: E402
+from anime_rest_api.db.crud.episode_operations import import_episodes  # noqa: E402
+from anime_rest_api.db.jobs import JobContext  # noqa: E402
+from anime_rest_api.db.jobs import JobRegistry  # noqa: E402
+from anime_rest_api.db.jobs import JobWorker  # noqa: E402
+from anime_rest_api.db.models.content import JobType  # noqa: E402
+from anime_rest_api.db.show_stats import refresh_view  # noqa: E402
+
+JOBS = JobRegistry()
+"""Job types the worker runs."""
+
+_IMPORT_BATCH = 50_000
+
+
+def _read_episode_rows(reader: csv.DictReader, limit: int) -> list[EpisodeRow]:
+    rows: list[EpisodeRow] = []
+    for record in reader:
+        rows.append(
+            (
+                int(record["show_id"]),
+                int(record["number"]),
+                record.get("title") or None,
+                dt.date.fromisoformat(record["air_date"])
+                if record.get("air_date")
+                else None,
+                int(record["duration"]) if record.get("duration") else None,
+            ),
+        )
+        if len(rows) == limit:
+            break
+    return rows
+
+
+@JOBS.register(JobType.import_episodes, concurrency=1)
+async def import_episodes_job(context: JobContext) -> dict[str, Any]:
+    """Import the episodes of a CSV file, its path in the `path` of the payload.
+
+    The file has a header with `show_id`, `number`, `title`, `air_date` and
+    `duration` columns. Each batch is committed on its own, importing the file
+    again after a failure only writes the episodes that weren't yet.
+    """
+    path = Path(context.payload["path"])
+    batch = int(context.payload.get("batch", _IMPORT_BATCH))
+    size = max(path.stat().st_size, 1)
+    read = written = 0
+    file = await asyncio.to_thread(path.open, newline="")
+    with file:
+        reader = csv.DictReader(file)
+        while rows := await asyncio.to_thread(_read_episode_rows, reader, batch):
+            async with context.engine.begin() as conn:
+                written += await import_episodes(conn, rows)
+            read += len(rows)
+            # the text layer reads ahead, so this is where its buffer is
+            await context.report(file.buffer.tell() / size, f"{read} episodes read")
+    return {"read": read, "written": written}
+
+
+@JOBS.register(JobType.refresh_show_stats, concurrency=1)
+async def refresh_show_stats_job(context: JobContext) -> dict[str, Any]:
+    """Refresh the view behind `GET /shows/stats`, API workers read it on their own."""
+    async with context.engine.begin() as conn:
+        refreshed = await refresh_view(conn)
+    return {"refreshed": refreshed}
+
+
+@JOBS.register(JobType.refresh_similarity, concurrency=1)
+async def refresh_similarity_job(context: JobContext) -> dict[str, Any]:
+    """Recompute similar shows, every show when `full` is set in the payload.
+
+    The matrix work would hold the event loop of the worker, so the whole
+    recompute runs in a pool process.
+    """
+    # needs the `recommend` extra, only workers running this job need it
+    from anime_rest_api.db.similarity import refresh_similarity_blocking
+
+    result = await context.run_in_process(
+        refresh_similarity_blocking,
+        context.engine.url.render_as_string(hide_password=False),
+        full=bool(context.payload.get("full", False)),
+    )
+    return dataclasses.asdict(result)
+
+
+def get_args(arglist: list[str] | None = None) -> argparse.Namespace:
+    """Parse given argslist and return our flags and settings."""
+    parser = argparse.ArgumentParser(prog="anime_rest_api.worker")
+    parser.add_argument(
+        "--processes",
+        type=int,
+        default=None,
+        help="Processes for CPU bound jobs, defaults to one per CPU",
+    )
+    parser.add_argument(
+        "--poll-interval",
+        type=float,
+        default=1.0,
+        help="Seconds between looks for due jobs while nothing finishes",
+    )
+    parser.add_argument(
+        "--stale-after",
+        type=float,
+        default=300.0,
+        help="Seconds without a heartbeat before a running job is queued again",
+    )
+    return parser.parse_args(arglist)
+
+
+async def run(args: argparse.Namespace) -> None:
+    """Create the tables if needed, then run jobs until interrupted."""
+    async with Db.engine.begin() as conn:
+        await setup_db(conn)
+    worker = JobWorker(
+        Db.engine,
+        JOBS,
+        processes=args.processes,
+        poll_interval=args.poll_interval,
+        stale_after=args.stale_after,
+    )
+    await worker.run()
+
+
+def main(args: argparse.Namespace) -> None:
+    """Run the worker until interrupted, running jobs are queued again."""
+    logging.config.dictConfig(
+        LogConfig(LOGGER_NAME="anime-api", LOG_LEVEL="INFO").model_dump(),
+    )
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    args = get_args()
+    main(args)
@@ -0,0 +1,83 @@
+import asyncio
+
+from fastapi import status
+import httpx
+import pytest
+from starlette.types import Receive
+from starlette.types import Scope
+from starlette.types import Send
+
+from anime_rest_api.api.admission import REJECTED
+from anime_rest_api.api.admission import AdmissionControlMiddleware
+from anime_rest_api.api.admission import AdmissionLimit
+
+pytestmark = pytest.mark.asyncio(loop_scope="module")
+
+
+def slow_app(release: asyncio.Event):
+    async def app(_scope: Scope, _receive: Receive, send: Send) -> None:
+        await release.wait()
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"ok"})
+
+    return app
+
+
+def limited_client(release: asyncio.Event, limit: AdmissionLimit) -> httpx.AsyncClient:
+    middleware = AdmissionControlMiddleware(
+        slow_app(release),
+        limits={"auth": limit, "read": limit, "write": limit},
+    )
+    return httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=middleware),
+        base_url="http://test",
+    )
+
+
+class TestAdmissionControl:
+    """Collection of tests for the admission control middleware."""
+
+    async def test_rejects_when_queue_full(self):
+        release = asyncio.Event()
+        limit = AdmissionLimit(concurrency=1, max_queue=0, max_wait=5)
+        rejected_before = REJECTED.value("read", "queue_full")
+        async with limited_client(release, limit) as client:
+            running = asyncio.create_task(client.get("/shows"))
+            await asyncio.sleep(0.05)
+            response = await client.get("/shows")
+            assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+            assert response.headers["retry-after"] == "5"
+            release.set()
+            assert (await running).status_code == status.HTTP_200_OK
+        assert REJECTED.value("read", "queue_full") == rejected_before + 1
+
+    async def test_rejects_after_max_wait(self):
+        release = asyncio.Event()
+        limit = AdmissionLimit(concurrency=1, max_queue=4, max_wait=0.05)
+        async with limited_client(release, limit) as client:
+            running = asyncio.create_task(client.get("/shows"))
+            await asyncio.sleep(0.01)
+            response = await client.get("/shows")
+            assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+            release.set()
+            await running
+
+    async def test_auth_has_own_capacity(self):
+        release = asyncio.Event()
+        limit = AdmissionLimit(concurrency=1, max_queue=0, max_wait=5)
+        async with limited_client(release, limit) as client:
+            read = asyncio.create_task(client.get("/shows"))
+            await asyncio.sleep(0.05)
+            login = asyncio.create_task(client.post("/login"))
+            await asyncio.sleep(0.05)
+            release.set()
+            assert (await login).status_code == status.HTTP_200_OK
+            await read
+
+    async def test_exempt_paths(self):
+        release = asyncio.Event()
+        release.set()
+        limit = AdmissionLimit(concurrency=1, max_queue=0, max_wait=5)
+        async with limited_client(release, limit) as client:
+            response = await client.get("/metrics")
+            assert response.status_code == status.HTTP_200_OK
@@ -0,0 +1,228 @@
+import asyncio
+from types import SimpleNamespace
+from typing import Annotated
+
+from fastapi import Depends
+from fastapi import FastAPI
+from fastapi import status
+from fastapi.responses import PlainTextResponse
+import httpx
+from pydantic import ValidationError
+import pytest
+
+from anime_rest_api.api import common_query
+from anime_rest_api.api.admission import AdmissionControlMiddleware
+from anime_rest_api.api.admission import AdmissionLimit
+from anime_rest_api.api.batch import BATCH_CONCURRENCY
+from anime_rest_api.api.common_query import requesting_user_header
+from anime_rest_api.api.models.batch import MAX_BATCH_SIZE
+from anime_rest_api.api.models.batch import BatchOperation
+from anime_rest_api.api.models.sessions import ApiAccessJwt
+from anime_rest_api.api.models.sessions import JwtUser
+from anime_rest_api.api.models.sessions import access_token_claims_from_user
+from anime_rest_api.api.models.sessions import build_access_token
+from anime_rest_api.api.routers import BATCH_ROUTER
+
+pytestmark = pytest.mark.asyncio(loop_scope="module")
+
+READS = 6
+
+
+def batch_app() -> tuple[FastAPI, dict]:
+    app = FastAPI()
+    app.include_router(BATCH_ROUTER)
+    seen: dict = {"items": [], "running": 0, "peak": 0}
+
+    @app.get("/slow/{n}")
+    async def slow(n: int) -> dict:
+        seen["running"] += 1
+        seen["peak"] = max(seen["peak"], seen["running"])
+        await asyncio.sleep(0.01)
+        seen["running"] -= 1
+        return {"n": n}
+
+    @app.post("/items", status_code=status.HTTP_201_CREATED)
+    async def add_item(item: dict) -> dict:
+        seen["items"].append(item)
+        return item
+
+    @app.get("/items")
+    async def list_items() -> list:
+        return seen["items"]
+
+    @app.get("/me")
+    async def me(
+        user: Annotated[JwtUser, Depends(requesting_user_header)],
+    ) -> dict:
+        return {"username": user.username}
+
+    @app.get("/text", response_class=PlainTextResponse)
+    async def text() -> str:
+        return "plain"
+
+    return app, seen
+
+
+def access_token() -> str:
+    # only the fields read for the claims, the table model needs a session
+    user = SimpleNamespace(
+        user_id=1,
+        username="batcher",
+        email="batcher@example.com",
+        is_admin=False,
+    )
+    return build_access_token(
+        access_token_claims_from_user(user).model_dump(by_alias=True),  # type: ignore[arg-type]
+    )
+
+
+def batch_client(
+    app: FastAPI | AdmissionControlMiddleware,
+    headers: dict | None = None,
+) -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app),
+        base_url="http://test",
+        headers=headers,
+    )
+
+
+class TestBatch:
+    """Collection of tests for running API calls in one batch."""
+
+    async def test_responses_in_order(self):
+        app, _ = batch_app()
+        async with batch_client(app) as client:
+            response = await client.post(
+                "/batch",
+                json={
+                    "requests": [
+                        {"path": "/slow/1"},
+                        {"path": "/missing"},
+                        {"path": "/text"},
+                        {"path": "/slow/2?unused=1"},
+                    ],
+                },
+            )
+        assert response.status_code == status.HTTP_200_OK
+        results = response.json()["responses"]
+        assert [result["status"] for result in results] == [
+            status.HTTP_200_OK,
+            status.HTTP_404_NOT_FOUND,
+            status.HTTP_200_OK,
+            status.HTTP_200_OK,
+        ]
+        assert results[0]["body"] == {"n": 1}
+        assert results[2]["body"] == "plain"
+        assert results[3]["body"] == {"n": 2}
+        assert results[0]["headers"]["content-type"] == "application/json"
+
+    async def test_reads_run_concurrently_up_to_limit(self):
+        app, seen = batch_app()
+        reads = BATCH_CONCURRENCY + 2
+        async with batch_client(app) as client:
+            response = await client.post(
+                "/batch",
+                json={"requests": [{"path": f"/slow/{i}"} for i in range(reads)]},
+            )
+        bodies = [result["body"] for result in response.json()["responses"]]
+        assert bodies == [{"n": i} for i in range(reads)]
+        assert seen["peak"] == BATCH_CONCURRENCY
+
+    async def test_writes_wait_for_earlier_calls(self):
+        app, _ = batch_app()
+        async with batch_client(app) as client:
+            response = await client.post(
+                "/batch",
+                json={
+                    "requests": [
+                        {"path": "/items"},
+                        {"method": "POST", "path": "/items", "body": {"id": 1}},
+                        {"path": "/items"},
+                    ],
+                },
+            )
+        bodies = [result["body"] for result in response.json()["responses"]]
+        assert bodies == [[], {"id": 1}, [{"id": 1}]]
+
+    async def test_calls_share_one_user(self, monkeypatch: pytest.MonkeyPatch):
+        app, _ = batch_app()
+        decoded = []
+        decode = common_query.decode_access_token
+
+        def counting_decode(token: str) -> ApiAccessJwt:
+            decoded.append(token)
+            return decode(token)
+
+        monkeypatch.setattr(common_query, "decode_access_token", counting_decode)
+        headers = {"Authorization": f"Bearer {access_token()}"}
+        async with batch_client(app, headers) as client:
+            response = await client.post(
+                "/batch",
+                json={"requests": [{"path": "/me"}] * READS},
+            )
+        bodies = [result["body"] for result in response.json()["responses"]]
+        assert bodies == [{"username": "batcher"}] * READS
+        assert len(decoded) == 1
+
+    async def test_calls_without_user_are_unauthorized(self):
+        app, _ = batch_app()
+        async with batch_client(app, {"Authorization": "Bearer bad"}) as client:
+            response = await client.post("/batch", json={"requests": [{"path": "/me"}]})
+        result = response.json()["responses"][0]
+        assert result["status"] == status.HTTP_401_UNAUTHORIZED
+
+    async def test_batch_limits(self):
+        app, _ = batch_app()
+        async with batch_client(app) as client:
+            too_many = await client.post(
+                "/batch",
+                json={"requests": [{"path": "/text"}] * (MAX_BATCH_SIZE + 1)},
+            )
+            nested = await client.post(
+                "/batch",
+                json={"requests": [{"method": "POST", "path": "/batch"}]},
+            )
+        assert too_many.status_code == status.HTTP_422_UNPROCESSABLE_CONTENT
+        assert nested.status_code == status.HTTP_422_UNPROCESSABLE_CONTENT
+        with pytest.raises(ValidationError):
+            BatchOperation(path="shows")
+        with pytest.raises(ValidationError):
+            BatchOperation(path="/b%61tch")
+
+    async def test_encoded_paths_are_decoded(self):
+        app, _ = batch_app()
+        async with batch_client(app) as client:
+            response = await client.post(
+                "/batch",
+                json={"requests": [{"path": "/slow/%31"}]},
+            )
+        assert response.json()["responses"][0]["body"] == {"n": 1}
+
+    async def test_calls_take_admission_slots(self):
+        app, _ = batch_app()
+        limit = AdmissionLimit(concurrency=1, max_queue=0, max_wait=0.05)
+        admission = AdmissionControlMiddleware(
+            app,
+            limits={"auth": limit, "read": limit, "write": limit},
+        )
+        # another request holds the only read slot
+        assert await admission.limiters["read"].acquire() is None
+        try:
+            async with batch_client(admission) as client:
+                response = await client.post(
+                    "/batch",
+                    json={
+                        "requests": [
+                            {"path": "/slow/1"},
+                            {"method": "POST", "path": "/items", "body": {}},
+                        ],
+                    },
+                )
+        finally:
+            admission.limiters["read"].release()
+        assert response.status_code == status.HTTP_200_OK
+        read, write = response.json()["responses"]
+        assert read["status"] == status.HTTP_503_SERVICE_UNAVAILABLE
+        assert read["headers"]["retry-after"] == "1"
+        assert write["status"] == status.HTTP_201_CREATED
@@ -0,0 +1,57 @@
+import asyncio
+import contextlib
+
+from fastapi import status
+from fastapi.testclient import TestClient
+import pytest
+from sqlalchemy.pool import QueuePool
+
+from anime_rest_api.api.app import create_app
+from anime_rest_api.api.health import HealthProbe
+from anime_rest_api.api.health import pool_status
+
+POOL_SIZE = 4
+MAX_OVERFLOW = 2
+
+
+def unused_pool() -> QueuePool:
+    return QueuePool(lambda: None, pool_size=POOL_SIZE, max_overflow=MAX_OVERFLOW)
+
+
+def test_pool_status_counts_capacity():
+    pool = pool_status(unused_pool())
+    assert pool.capacity == POOL_SIZE + MAX_OVERFLOW
+    assert pool.checked_out == 0
+    assert pool.saturation == 0
+
+
+def test_not_ready_before_first_check():
+    report = HealthProbe().report(unused_pool(), warmed_up=True)
+    assert not report.ready
+    assert not report.database
+    assert report.schema_state is None
+
+
+@pytest.mark.asyncio(loop_scope="module")
+async def test_failed_ping_is_reported():
+    probe = HealthProbe(interval=0.05)
+    # nothing listens on port 1, connecting is refused right away
+    running = asyncio.create_task(probe.run("postgresql://anime@127.0.0.1:1/anime"))
+    while probe.checked_at is None:  # noqa: ASYNC110
+        await asyncio.sleep(0.01)
+    running.cancel()
+    with contextlib.suppress(asyncio.CancelledError):
+        await running
+
+    report = probe.report(unused_pool(), warmed_up=True)
+    assert not report.ready
+    assert report.error is not None
+    assert report.ping_ms is None
+
+
+def test_probe_routes_without_lifespan():
+    client = TestClient(create_app())
+    assert client.get("/healthz").json() == {"status": "ok"}
+    response = client.get("/readyz")
+    assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+    assert response.json()["warmed_up"] is False
@@ -0,0 +1,148 @@
+import asyncio
+import itertools
+
+from fastapi import status
+import httpx
+import pytest
+from starlette.types import Receive
+from starlette.types import Scope
+from starlette.types import Send
+
+from anime_rest_api.api.idempotency import IDEMPOTENT_REQUESTS
+from anime_rest_api.api.idempotency import MAX_KEY_LENGTH
+from anime_rest_api.api.idempotency import IdempotencyMiddleware
+
+pytestmark = pytest.mark.asyncio(loop_scope="module")
+
+
+class CountingApp:
+    """Application answering every request with how many it has run."""
+
+    def __init__(self, status_code: int = status.HTTP_201_CREATED) -> None:
+        """Initialize an app that answers right away."""
+        self.calls = itertools.count(1)
+        self.ran = 0
+        self.status_code = status_code
+        self.release = asyncio.Event()
+        self.release.set()
+
+    async def __call__(self, _scope: Scope, receive: Receive, send: Send) -> None:
+        message = await receive()
+        await self.release.wait()
+        self.ran = next(self.calls)
+        body = b"%d:" % self.ran + message["body"]
+        await send(
+            {"type": "http.response.start", "status": self.status_code, "headers": []},
+        )
+        await send({"type": "http.response.body", "body": body})
+
+
+def idempotent_client(app: CountingApp) -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=IdempotencyMiddleware(app)),
+        base_url="http://test",
+    )
+
+
+class TestIdempotency:
+    """Collection of tests for the idempotency key middleware."""
+
+    async def test_replays_first_response(self):
+        app = CountingApp()
+        replayed_before = IDEMPOTENT_REQUESTS.value("replayed")
+        async with idempotent_client(app) as client:
+            first = await client.post(
+                "/shows",
+                content=b"show",
+                headers={"Idempotency-Key": "a"},
+            )
+            retry = await client.post(
+                "/shows",
+                content=b"show",
+                headers={"Idempotency-Key": "a"},
+            )
+        assert app.ran == 1
+        assert first.status_code == retry.status_code == status.HTTP_201_CREATED
+        assert retry.content == first.content == b"1:show"
+        assert "idempotent-replayed" not in first.headers
+        assert retry.headers["idempotent-replayed"] == "true"
+        assert IDEMPOTENT_REQUESTS.value("replayed") == replayed_before + 1
+
+    async def test_concurrent_duplicates_wait(self):
+        app = CountingApp()
+        app.release.clear()
+        async with idempotent_client(app) as client:
+            requests = [
+                asyncio.create_task(
+                    client.post(
+                        "/login",
+                        content=b"user",
+                        headers={"Idempotency-Key": "b"},
+                    ),
+                )
+                for _ in range(3)
+            ]
+            await asyncio.sleep(0.05)
+            app.release.set()
+            responses = await asyncio.gather(*requests)
+        assert app.ran == 1
+        assert {response.content for response in responses} == {b"1:user"}
+
+    async def test_rejects_reused_key_with_other_body(self):
+        app = CountingApp()
+        async with idempotent_client(app) as client:
+            await client.post(
+                "/shows",
+                content=b"one",
+                headers={"Idempotency-Key": "c"},
+            )
+            response = await client.post(
+                "/shows",
+                content=b"two",
+                headers={"Idempotency-Key": "c"},
+            )
+        assert response.status_code == status.HTTP_422_UNPROCESSABLE_CONTENT
+        assert app.ran == 1
+
+    async def test_keys_are_scoped(self):
+        app = CountingApp()
+        async with idempotent_client(app) as client:
+            for path, token in (("/shows", "x"), ("/shows", "y"), ("/login", "x")):
+                await client.post(
+                    path,
+                    content=b"body",
+                    headers={
+                        "Idempotency-Key": "d",
+                        "Authorization": f"Bearer {token}",
+                    },
+                )
+            await client.patch(
+                "/shows",
+                content=b"body",
+                headers={"Idempotency-Key": "d"},
+            )
+        assert app.ran == len(("x", "y", "login", "patch"))
+
+    async def test_server_errors_run_again(self):
+        app = CountingApp(status.HTTP_500_INTERNAL_SERVER_ERROR)
+        async with idempotent_client(app) as client:
+            for _ in range(2):
+                await client.post(
+                    "/shows",
+                    content=b"",
+                    headers={"Idempotency-Key": "e"},
+                )
+        assert app.ran == len(range(2))
+
+    async def test_without_key_or_for_reads(self):
+        app = CountingApp()
+        async with idempotent_client(app) as client:
+            await client.post("/shows", content=b"")
+            await client.post("/shows", content=b"")
+            await client.get("/shows", headers={"Idempotency-Key": "f"})
+            response = await client.post(
+                "/shows",
+                headers={"Idempotency-Key": "f" * (MAX_KEY_LENGTH + 1)},
+            )
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert app.ran == len(range(3))
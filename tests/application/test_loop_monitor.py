@@ -0,0 +1,59 @@
+import asyncio
+import contextlib
+import time
+
+from fastapi import FastAPI
+import httpx
+import pytest
+
+from anime_rest_api.api.loop_monitor import UNMATCHED
+from anime_rest_api.api.loop_monitor import LoopMonitor
+from anime_rest_api.api.loop_monitor import TaskRouteMiddleware
+
+pytestmark = pytest.mark.asyncio(loop_scope="module")
+
+BLOCK_SECONDS = 0.3
+
+
+def blocking_call() -> None:
+    time.sleep(BLOCK_SECONDS)
+
+
+async def blocking_route() -> None:
+    blocking_call()
+
+
+async def test_reports_blocking_call():
+    monitor = LoopMonitor(interval=0.02, block_threshold=0.1)
+    running = asyncio.create_task(monitor.run())
+    await asyncio.sleep(0.05)
+    await asyncio.create_task(blocking_route(), name="GET /slow")
+    await asyncio.sleep(0.05)
+    running.cancel()
+    with contextlib.suppress(asyncio.CancelledError):
+        await running
+
+    [blocked] = monitor.blocked_calls
+    assert blocked.route == "GET /slow"
+    assert any("blocking_call" in frame for frame in blocked.stack)
+    assert blocked.blocked_ms >= BLOCK_SECONDS * 1000
+    assert max(monitor.lags) >= BLOCK_SECONDS - monitor.interval
+
+
+async def test_tasks_named_by_route_template():
+    app = FastAPI()
+
+    @app.get("/shows/{show_id}")
+    async def task_name(show_id: int) -> dict:
+        return {"show_id": show_id, "task": asyncio.current_task().get_name()}  # type: ignore[union-attr]
+
+    app.add_middleware(TaskRouteMiddleware)
+    async with httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app),
+        base_url="http://test",
+    ) as client:
+        matched = await client.get("/shows/7")
+        await client.get("/shows/8/missing")
+    assert matched.json() == {"show_id": 7, "task": "GET /shows/{show_id}"}
+    # the transport runs the app in the calling task
+    assert asyncio.current_task().get_name() == f"GET {UNMATCHED}"  # type: ignore[union-attr]
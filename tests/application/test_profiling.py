@@ -0,0 +1,71 @@
+import asyncio
+
+import pytest
+from starlette.types import Receive
+from starlette.types import Scope
+from starlette.types import Send
+
+from anime_rest_api.api.profiling import ProfilingMiddleware
+from anime_rest_api.api.profiling import RequestWindow
+from anime_rest_api.api.profiling import profile_cpu
+from anime_rest_api.api.profiling import profile_memory
+
+pytestmark = pytest.mark.asyncio(loop_scope="module")
+
+
+def busy_work() -> int:
+    return sum(i * i for i in range(20_000))
+
+
+async def keep_busy(until: asyncio.Event) -> None:
+    while not until.is_set():
+        busy_work()
+        await asyncio.sleep(0)
+
+
+class TestCpuProfile:
+    """Collection of tests for CPU profiles."""
+
+    async def test_pstats_lists_functions(self):
+        stop = asyncio.Event()
+        worker = asyncio.create_task(keep_busy(stop))
+        profile = await profile_cpu(0.05)
+        stop.set()
+        await worker
+        assert "busy_work" in profile
+
+    async def test_collapsed_stacks(self):
+        stop = asyncio.Event()
+        worker = asyncio.create_task(keep_busy(stop))
+        profile = await profile_cpu(0.1, output="collapsed")
+        stop.set()
+        await worker
+        assert f"{__name__}:busy_work" in profile
+        assert all(line.rsplit(" ", 1)[1].isdigit() for line in profile.splitlines())
+
+
+async def test_memory_profile_lists_allocations():
+    kept = []
+
+    async def allocate() -> None:
+        await asyncio.sleep(0.01)
+        kept.extend(bytearray(1024) for _ in range(1000))
+
+    allocating = asyncio.create_task(allocate())
+    profile = await profile_memory(0.05)
+    await allocating
+    assert __file__ in profile
+
+
+async def test_profile_stops_after_requests():
+    async def app(_scope: Scope, _receive: Receive, _send: Send) -> None:
+        await asyncio.sleep(0)
+
+    middleware = ProfilingMiddleware(app)
+    profiling = asyncio.create_task(profile_cpu(30, requests=2))
+    await asyncio.sleep(0)
+    assert RequestWindow.current is not None
+    for _ in range(2):
+        await middleware({"type": "http"}, None, None)  # type: ignore[arg-type]
+    await asyncio.wait_for(profiling, timeout=5)
+    assert RequestWindow.current is None
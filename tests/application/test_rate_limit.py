@@ -0,0 +1,119 @@
+from fastapi import APIRouter
+from fastapi import FastAPI
+from fastapi import status
+import httpx
+import pytest
+
+from anime_rest_api.api import rate_limit
+from anime_rest_api.api.rate_limit import InMemoryRateLimitBackend
+from anime_rest_api.api.rate_limit import RateLimitDependency
+from anime_rest_api.api.rate_limit import RateLimitPolicy
+
+pytestmark = pytest.mark.asyncio(loop_scope="module")
+
+POLICY = RateLimitPolicy(limit=2, period=10)
+
+
+class FakeClock:
+    """Clock only moving when a test sets it."""
+
+    def __init__(self) -> None:
+        """Start at 0."""
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class TestInMemoryBackend:
+    """Collection of tests for the in-memory token buckets."""
+
+    async def test_refills_over_time(self):
+        clock = FakeClock()
+        backend = InMemoryRateLimitBackend(clock=clock)
+        assert await backend.take("key", POLICY) is None
+        assert await backend.take("key", POLICY) is None
+        assert await backend.take("key", POLICY) == pytest.approx(5)
+        clock.now = 5
+        assert await backend.take("key", POLICY) is None
+
+    async def test_keys_are_independent(self):
+        backend = InMemoryRateLimitBackend(clock=FakeClock())
+        for _ in range(POLICY.limit):
+            await backend.take("first", POLICY)
+        assert await backend.take("first", POLICY) is not None
+        assert await backend.take("second", POLICY) is None
+
+    async def test_evicts_least_recently_used(self):
+        backend = InMemoryRateLimitBackend(
+            shards=1,
+            max_keys_per_shard=2,
+            clock=FakeClock(),
+        )
+        for key in ("a", "b", "a", "c"):
+            await backend.take(key, POLICY)
+        assert len(backend) == len(("a", "c"))
+        # "b" was dropped, so it starts with a full bucket again
+        await backend.take("b", POLICY)
+        assert await backend.take("b", POLICY) is None
+
+
+@pytest.fixture
+def limited_client(monkeypatch: pytest.MonkeyPatch) -> httpx.AsyncClient:
+    monkeypatch.setattr(rate_limit, "RATE_LIMIT_BACKEND", InMemoryRateLimitBackend())
+    monkeypatch.setattr(
+        rate_limit,
+        "RATE_LIMITS",
+        {"POST /login": {"username": POLICY}},
+    )
+    router = APIRouter(dependencies=[RateLimitDependency])
+
+    @router.post("/login")
+    async def login() -> dict:
+        return {}
+
+    app = FastAPI()
+    app.include_router(router)
+    return httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app),
+        base_url="http://test",
+    )
+
+
+async def test_rejects_username_over_limit(limited_client: httpx.AsyncClient):
+    async with limited_client as client:
+        for _ in range(POLICY.limit):
+            response = await client.post("/login", json={"username": "Example"})
+            assert response.status_code == status.HTTP_200_OK
+        response = await client.post("/login", json={"username": "example"})
+        assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+        assert response.headers["retry-after"] == "5"
+        response = await client.post("/login", json={"username": "other"})
+        assert response.status_code == status.HTTP_200_OK
+
+
+async def test_limits_any_route_by_template(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(rate_limit, "RATE_LIMIT_BACKEND", InMemoryRateLimitBackend())
+    monkeypatch.setattr(
+        rate_limit,
+        "RATE_LIMITS",
+        {"GET /shows/{show_id}": {"ip": POLICY}, "GET /show": {"ip": POLICY}},
+    )
+    app = FastAPI(dependencies=[RateLimitDependency])
+
+    @app.get("/shows/{show_id}")
+    async def show(show_id: int) -> dict:
+        return {"show_id": show_id}
+
+    assert rate_limit.check_rate_limits(app.routes) == ["GET /show"]
+    async with httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app),
+        base_url="http://test",
+    ) as client:
+        statuses = [
+            (await client.get(f"/shows/{show_id}")).status_code
+            for show_id in range(POLICY.limit + 1)
+        ]
+    assert statuses == [status.HTTP_200_OK] * POLICY.limit + [
+        status.HTTP_429_TOO_MANY_REQUESTS,
+    ]
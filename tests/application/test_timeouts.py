@@ -0,0 +1,148 @@
+import asyncio
+import time
+
+from fastapi import status
+from fastapi.testclient import TestClient
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from starlette.types import Message
+from starlette.types import Receive
+from starlette.types import Scope
+from starlette.types import Send
+
+from anime_rest_api.api import timeouts
+from anime_rest_api.api.timeouts import QUERY_CANCELED_SQLSTATE
+from anime_rest_api.api.timeouts import CancelOnDisconnectMiddleware
+from anime_rest_api.db.connection import apply_statement_timeout
+
+pytestmark = pytest.mark.asyncio(loop_scope="module")
+
+HTTP_SCOPE = {"type": "http", "method": "GET", "path": "/sleep", "headers": []}
+
+
+def disconnecting_receive(after: float) -> Receive:
+    messages: list[Message] = [
+        {"type": "http.request", "body": b"", "more_body": False},
+    ]
+
+    async def receive() -> Message:
+        if messages:
+            return messages.pop()
+        await asyncio.sleep(after)
+        return {"type": "http.disconnect"}
+
+    return receive
+
+
+async def discard(_message: Message) -> None:
+    pass
+
+
+async def count_sleeping_queries(pg_engine: AsyncEngine) -> int:
+    async with pg_engine.connect() as conn:
+        return (
+            await conn.execute(
+                text(
+                    "SELECT count(*) FROM pg_stat_activity "
+                    "WHERE state = 'active' AND query LIKE 'SELECT pg_sleep%'",
+                ),
+            )
+        ).scalar_one()
+
+
+class TestCancelOnDisconnect:
+    """Tests for cancelling requests of clients that went away."""
+
+    async def test_app_cancelled_on_disconnect(self):
+        cancelled = asyncio.Event()
+
+        async def app(_scope: Scope, _receive: Receive, _send: Send) -> None:
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        middleware = CancelOnDisconnectMiddleware(app)
+        await asyncio.wait_for(
+            middleware(HTTP_SCOPE, disconnecting_receive(0.05), discard),
+            timeout=1,
+        )
+        assert cancelled.is_set()
+
+    async def test_query_cancelled_on_disconnect(
+        self,
+        sessions: async_sessionmaker,
+        pg_engine: AsyncEngine,
+    ):
+        async def app(_scope: Scope, _receive: Receive, _send: Send) -> None:
+            async with sessions() as session:
+                await session.execute(text("SELECT pg_sleep(30)"))
+
+        middleware = CancelOnDisconnectMiddleware(app)
+        begin = time.perf_counter()
+        await middleware(HTTP_SCOPE, disconnecting_receive(0.5), discard)
+        assert time.perf_counter() - begin < 5  # noqa: PLR2004
+        # the server side query is gone as well, not just our side of it
+        for _ in range(20):
+            if await count_sleeping_queries(pg_engine) == 0:
+                break
+            await asyncio.sleep(0.1)
+        assert await count_sleeping_queries(pg_engine) == 0
+
+
+class TestStatementTimeout:
+    """Tests for per route statement timeouts."""
+
+    async def test_statement_timeout(self, sessions: async_sessionmaker):
+        async with sessions() as session:
+            await apply_statement_timeout(session, 100)
+            begin = time.perf_counter()
+            with pytest.raises(DBAPIError) as error:
+                await session.execute(text("SELECT pg_sleep(5)"))
+            assert time.perf_counter() - begin < 2  # noqa: PLR2004
+            assert error.value.orig.sqlstate == QUERY_CANCELED_SQLSTATE
+            await session.rollback()
+            # applies again to the next transaction of the same session
+            with pytest.raises(DBAPIError):
+                await session.execute(text("SELECT pg_sleep(5)"))
+
+    async def test_statement_timeout_during_transaction(
+        self,
+        sessions: async_sessionmaker,
+    ):
+        async with sessions() as session:
+            await session.execute(text("SELECT 1"))
+            await apply_statement_timeout(session, 100)
+            with pytest.raises(DBAPIError) as error:
+                await session.execute(text("SELECT pg_sleep(5)"))
+            assert error.value.orig.sqlstate == QUERY_CANCELED_SQLSTATE
+            await session.rollback()
+
+    async def test_timeout_returns_504(
+        self,
+        test_client_lifespan: TestClient,
+        monkeypatch: pytest.MonkeyPatch,
+    ):
+        monkeypatch.setitem(timeouts.STATEMENT_TIMEOUTS, "GET /shows", 1)
+        monkeypatch.setattr(
+            "anime_rest_api.api.routers.shows_routes.list_shows",
+            slow_list_shows,
+        )
+        response = test_client_lifespan.get("/shows")
+        assert response.status_code == status.HTTP_504_GATEWAY_TIMEOUT
+        assert response.json() == {"detail": "Database query timed out"}
+
+
+async def slow_list_shows(
+    session: AsyncSession,
+    _offset: int,
+    _limit: int,
+    **_filters: object,
+) -> list:
+    await session.execute(text("SELECT pg_sleep(1)"))
+    return []
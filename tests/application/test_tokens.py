@@ -0,0 +1,92 @@
+import time
+
+from jose.exceptions import ExpiredSignatureError
+from jose.exceptions import JWTError
+import pytest
+
+from anime_rest_api.api.tokens import HmacTokenCodec
+from anime_rest_api.api.tokens import JoseTokenCodec
+from anime_rest_api.api.tokens import TokenCodec
+from anime_rest_api.api.tokens import build_codec
+
+SECRET = "test-secret"  # noqa: S105
+ACCESS_TOKEN = "header.claims.signature"  # noqa: S105
+REQUIRED = frozenset({"aud", "iat", "exp", "sub", "iss"})
+CODECS = [
+    build_codec(backend, SECRET, audience="anime_api", issuer="anime_api")
+    for backend in ("hmac", "jose")
+]
+
+
+def claims(**overrides: int | str) -> dict:
+    now = int(time.time())
+    return {
+        "sub": "1",
+        "iat": now,
+        "exp": now + 60,
+        "aud": "anime_api",
+        "iss": "anime_api",
+        "scope": "refresh",
+    } | overrides
+
+
+@pytest.mark.parametrize("encoder", CODECS)
+@pytest.mark.parametrize("decoder", CODECS)
+def test_backends_read_each_other(encoder: TokenCodec, decoder: TokenCodec):
+    token = encoder.encode(claims(), access_token=ACCESS_TOKEN)
+    decoded = decoder.decode(
+        token,
+        required=REQUIRED | {"at_hash"},
+        access_token=ACCESS_TOKEN,
+    )
+    assert decoded["sub"] == "1"
+    # the refresh route only has the refresh token, at_hash is just required then
+    assert decoder.decode(token, required=REQUIRED | {"at_hash"})["sub"] == "1"
+
+
+@pytest.mark.parametrize("codec", CODECS)
+class TestRejectedTokens:
+    """Collection of tests for tokens every backend must reject."""
+
+    def test_tampered_signature(self, codec: TokenCodec):
+        token = codec.encode(claims())
+        with pytest.raises(JWTError):
+            codec.decode(token[:-2] + "AA", required=REQUIRED)
+
+    def test_other_secret(self, codec: TokenCodec):
+        other = HmacTokenCodec("other", audience="anime_api", issuer="anime_api")
+        with pytest.raises(JWTError):
+            codec.decode(other.encode(claims()), required=REQUIRED)
+
+    def test_expired(self, codec: TokenCodec):
+        token = codec.encode(claims(exp=int(time.time()) - 10))
+        with pytest.raises(ExpiredSignatureError):
+            codec.decode(token, required=REQUIRED)
+
+    def test_wrong_audience(self, codec: TokenCodec):
+        with pytest.raises(JWTError):
+            codec.decode(codec.encode(claims(aud="other")), required=REQUIRED)
+
+    def test_missing_required_claim(self, codec: TokenCodec):
+        with pytest.raises(JWTError):
+            codec.decode(codec.encode(claims()), required=REQUIRED | {"at_hash"})
+
+    def test_other_access_token(self, codec: TokenCodec):
+        token = codec.encode(claims(), access_token=ACCESS_TOKEN)
+        with pytest.raises(JWTError):
+            codec.decode(token, required=REQUIRED, access_token=ACCESS_TOKEN[::-1])
+
+    def test_none_algorithm(self, codec: TokenCodec):
+        header = "eyJhbGciOiJub25lIiwidHlwIjoiSldUIn0"  # {"alg":"none","typ":"JWT"}
+        _, payload, _ = codec.encode(claims()).split(".")
+        with pytest.raises(JWTError):
+            codec.decode(f"{header}.{payload}.", required=REQUIRED)
+
+
+def test_unknown_backend():
+    with pytest.raises(ValueError, match="Unknown token backend"):
+        build_codec("rsa", SECRET, audience="anime_api", issuer="anime_api")
+
+
+def test_jose_codec_type():
+    assert isinstance(CODECS[1], JoseTokenCodec)
@@ -0,0 +1,48 @@
+from collections.abc import AsyncIterator
+from collections.abc import Coroutine
+import contextlib
+
+import pytest
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from anime_rest_api.db.crud import count_operations
+from anime_rest_api.db.crud import user_operations
+from tests.db.crud.test_user_ops import example_password
+from tests.db.crud.test_user_ops import setup_test_db
+from tests.db.crud.test_user_ops import user_with_example_password
+
+pytestmark = pytest.mark.asyncio(loop_scope="module")
+
+
+class TestCountOps:
+    """Collection of tests for total counts of listings."""
+
+    async def test_exact_count_is_cached(
+        self,
+        sessions: async_sessionmaker,
+        user_with_example_password: AsyncIterator[Coroutine[int, None, None]],
+    ) -> None:
+        count_operations.EXACT_COUNTS.clear()
+        async with contextlib.aclosing(user_with_example_password) as setup:
+            await anext(setup)
+            async with sessions() as session:
+                total = await user_operations.count_users(session, "exact")
+            assert total == 1
+            assert len(count_operations.EXACT_COUNTS) == 1
+            # cleanup to resume generator
+            with contextlib.suppress(StopAsyncIteration):
+                await setup.asend(None)
+
+    async def test_estimate_count(
+        self,
+        sessions: async_sessionmaker,
+        user_with_example_password: AsyncIterator[Coroutine[int, None, None]],
+    ) -> None:
+        async with contextlib.aclosing(user_with_example_password) as setup:
+            await anext(setup)
+            async with sessions() as session:
+                total = await user_operations.count_users(session, "estimate")
+            assert total >= 0
+            # cleanup to resume generator
+            with contextlib.suppress(StopAsyncIteration):
+                await setup.asend(None)
@@ -0,0 +1,163 @@
+import datetime as dt
+
+import pytest
+from sqlalchemy import delete
+from sqlalchemy import insert
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from anime_rest_api.db import setup_db
+from anime_rest_api.db.crud import episode_operations
+from anime_rest_api.db.crud.errors import EntryNotFoundError
+from anime_rest_api.db.models.content import EPISODE_PARTITIONS
+from anime_rest_api.db.models.content import Episode
+from anime_rest_api.db.models.content import EpisodeWrite
+from anime_rest_api.db.models.content import Show
+
+pytestmark = pytest.mark.asyncio(loop_scope="module")
+
+EPISODES = 12
+PAGE = 5
+MISSING_SHOW_ID = 999_999
+
+
+async def insert_shows(pg_engine: AsyncEngine, shows: int) -> list[int]:
+    async with pg_engine.begin() as conn:
+        await setup_db(conn)
+        result = await conn.execute(
+            insert(Show)
+            .values(
+                [
+                    {
+                        "name": f"Episodic Show {i}",
+                        "release_date": dt.date(2020, 1, 1),
+                        "show_type": "TV",
+                        "status": "Airing",
+                        "content_rating": "PG13",
+                    }
+                    for i in range(shows)
+                ],
+            )
+            .returning(Show.show_id),
+        )
+        return list(result.scalars().all())
+
+
+def episode(number: int, title: str | None = None) -> EpisodeWrite:
+    return EpisodeWrite(
+        number=number,
+        title=title or f"Episode {number}",
+        air_date=dt.date(2020, 1, 1) + dt.timedelta(weeks=number),
+        duration=24,
+    )
+
+
+class TestEpisodeOps:
+    """Collection of tests for episodes of shows."""
+
+    async def test_table_is_partitioned(self, pg_engine: AsyncEngine) -> None:
+        async with pg_engine.begin() as conn:
+            await setup_db(conn)
+            partitions = (
+                await conn.execute(
+                    text(
+                        "SELECT count(*) FROM pg_inherits "
+                        "WHERE inhparent = 'content.episodes'::regclass",
+                    ),
+                )
+            ).scalar_one()
+        assert partitions == EPISODE_PARTITIONS
+
+    async def test_ingest_and_list_pages(
+        self,
+        pg_engine: AsyncEngine,
+        sessions: async_sessionmaker,
+    ) -> None:
+        (show_id,) = await insert_shows(pg_engine, 1)
+        try:
+            # given out of order, and with a repeated number whose last one wins
+            episodes = [episode(n) for n in reversed(range(1, EPISODES + 1))]
+            episodes.append(episode(1, "Pilot"))
+            async with sessions() as session:
+                written = await episode_operations.ingest_episodes(
+                    session,
+                    show_id,
+                    episodes,
+                )
+                assert written == EPISODES
+                # unchanged episodes aren't written again
+                rewritten = await episode_operations.ingest_episodes(
+                    session,
+                    show_id,
+                    episodes,
+                )
+                assert rewritten == 0
+
+                numbers: list[int] = []
+                after = None
+                while True:
+                    page = await episode_operations.list_episodes(
+                        session,
+                        show_id,
+                        PAGE,
+                        after,
+                    )
+                    if not page:
+                        break
+                    numbers.extend(ep.number for ep in page)
+                    after = page[-1].number
+                assert numbers == list(range(1, EPISODES + 1))
+                first = await episode_operations.list_episodes(session, show_id, 1)
+                assert first[0].title == "Pilot"
+        finally:
+            async with pg_engine.begin() as conn:
+                await conn.execute(delete(Show))
+
+    async def test_missing_show(self, sessions: async_sessionmaker) -> None:
+        async with sessions() as session:
+            with pytest.raises(EntryNotFoundError):
+                await episode_operations.list_episodes(session, MISSING_SHOW_ID, PAGE)
+            with pytest.raises(EntryNotFoundError):
+                await episode_operations.ingest_episodes(
+                    session,
+                    MISSING_SHOW_ID,
+                    [episode(1)],
+                )
+
+    async def test_import_episodes(
+        self,
+        pg_engine: AsyncEngine,
+        sessions: async_sessionmaker,
+    ) -> None:
+        show_ids = await insert_shows(pg_engine, 2)
+        try:
+            rows = [
+                (show_id, number, f"Episode {number}", None, None)
+                for show_id in [*show_ids, MISSING_SHOW_ID]
+                for number in range(1, EPISODES + 1)
+            ]
+            async with pg_engine.begin() as conn:
+                written = await episode_operations.import_episodes(conn, rows)
+                # a second import in the same transaction only writes changes
+                changed = await episode_operations.import_episodes(
+                    conn,
+                    [(show_ids[0], 1, "Pilot", None, None)],
+                )
+            assert written == len(show_ids) * EPISODES
+            assert changed == 1
+            async with sessions() as session:
+                first = await episode_operations.list_episodes(session, show_ids[0], 1)
+            assert first[0].title == "Pilot"
+
+            # episodes go with their show
+            async with pg_engine.begin() as conn:
+                await conn.execute(delete(Show).where(Show.show_id == show_ids[0]))
+                remaining = (
+                    await conn.execute(text("SELECT count(*) FROM content.episodes"))
+                ).scalar_one()
+            assert remaining == EPISODES
+        finally:
+            async with pg_engine.begin() as conn:
+                await conn.execute(delete(Episode))
+                await conn.execute(delete(Show))
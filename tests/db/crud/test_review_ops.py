@@ -0,0 +1,169 @@
+import datetime as dt
+
+import pytest
+from sqlalchemy import delete
+from sqlalchemy import func
+from sqlalchemy import insert
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from anime_rest_api.db import setup_db
+from anime_rest_api.db.crud import review_operations
+from anime_rest_api.db.crud.count_operations import EXACT_COUNTS
+from anime_rest_api.db.crud.errors import EntryExistsError
+from anime_rest_api.db.crud.errors import InvalidPermissionsError
+from anime_rest_api.db.crud.show_operations import get_show
+from anime_rest_api.db.models.auth import User
+from anime_rest_api.db.models.content import Review
+from anime_rest_api.db.models.content import ReviewCreate
+from anime_rest_api.db.models.content import ReviewUpdate
+from anime_rest_api.db.models.content import Show
+from anime_rest_api.db.models.content import ShowRead
+
+pytestmark = pytest.mark.asyncio(loop_scope="module")
+
+SCORES = (4, 8, 9)
+UPDATED_SCORE = 10
+SHOW_TOTAL = 1
+
+
+async def insert_show_and_users(
+    pg_engine: AsyncEngine,
+    users: int,
+) -> tuple[int, list[int]]:
+    async with pg_engine.begin() as conn:
+        await setup_db(conn)
+        show_id = (
+            await conn.execute(
+                insert(Show)
+                .values(
+                    name="Reviewed Show",
+                    release_date=dt.date(2020, 1, 1),
+                    show_type="TV",
+                    status="Finished",
+                    content_rating="PG13",
+                )
+                .returning(Show.show_id),
+            )
+        ).scalar_one()
+        user_ids = (
+            (
+                await conn.execute(
+                    insert(User)
+                    .values(
+                        [
+                            {
+                                "username": f"reviewer{i}",
+                                "email": f"reviewer{i}@example.com",
+                                "first_name": "Review",
+                                "last_name": "Er",
+                                "password_hash": "-",
+                            }
+                            for i in range(users)
+                        ],
+                    )
+                    .returning(User.user_id),
+                )
+            )
+            .scalars()
+            .all()
+        )
+    return show_id, list(user_ids)
+
+
+class TestReviewOps:
+    """Collection of tests for reviews and the ratings aggregated from them."""
+
+    async def test_aggregates_match_reviews(
+        self,
+        pg_engine: AsyncEngine,
+        sessions: async_sessionmaker,
+    ) -> None:
+        show_id, user_ids = await insert_show_and_users(pg_engine, len(SCORES))
+        try:
+            review_ids = []
+            for user_id, score in zip(user_ids, SCORES, strict=True):
+                async with sessions() as session:
+                    review = await review_operations.create_review(
+                        session,
+                        show_id,
+                        user_id,
+                        ReviewCreate(score=score, body=None),
+                    )
+                review_ids.append(review.review_id)
+            async with sessions() as session:
+                with pytest.raises(EntryExistsError):
+                    await review_operations.create_review(
+                        session,
+                        show_id,
+                        user_ids[0],
+                        ReviewCreate(score=1, body=None),
+                    )
+            async with sessions() as session:
+                with pytest.raises(InvalidPermissionsError):
+                    await review_operations.update_review(
+                        session,
+                        review_ids[0],
+                        ReviewUpdate(score=1, body=None),
+                        user_ids[1],
+                    )
+            async with sessions() as session:
+                await review_operations.update_review(
+                    session,
+                    review_ids[0],
+                    ReviewUpdate(score=UPDATED_SCORE, body=None),
+                    user_ids[0],
+                )
+            async with sessions() as session:
+                await review_operations.delete_review(
+                    session,
+                    review_ids[1],
+                    user_ids[1],
+                )
+
+            async with sessions() as session:
+                rating = await review_operations.get_show_rating(session, show_id)
+                count, average = (
+                    await session.execute(
+                        select(func.count(), func.avg(Review.score)).where(
+                            Review.show_id == show_id,
+                        ),
+                    )
+                ).one()
+                show = ShowRead.model_validate(await get_show(session, show_id))
+            assert rating.review_count == count == len(SCORES) - 1
+            assert rating.average_rating == pytest.approx(float(average))
+            assert sum(rating.histogram) == count
+            assert rating.histogram[UPDATED_SCORE - 1] == 1
+            assert rating.histogram[SCORES[2] - 1] == 1
+            assert show.average_rating == rating.average_rating
+            assert show.review_count == count
+        finally:
+            async with pg_engine.begin() as conn:
+                await conn.execute(delete(Show).where(Show.show_id == show_id))
+                await conn.execute(delete(User).where(User.user_id.in_(user_ids)))  # type: ignore[union-attr]
+
+    async def test_reviews_keep_exact_show_counts(
+        self,
+        pg_engine: AsyncEngine,
+        sessions: async_sessionmaker,
+    ) -> None:
+        show_id, user_ids = await insert_show_and_users(pg_engine, 1)
+        try:
+            EXACT_COUNTS.clear()
+            EXACT_COUNTS.set("shows", SHOW_TOTAL)
+            async with sessions() as session:
+                await review_operations.create_review(
+                    session,
+                    show_id,
+                    user_ids[0],
+                    ReviewCreate(score=SCORES[0], body=None),
+                )
+            # a review changes the rating of a show, not how many shows there are
+            assert EXACT_COUNTS.get("shows") == SHOW_TOTAL
+        finally:
+            EXACT_COUNTS.clear()
+            async with pg_engine.begin() as conn:
+                await conn.execute(delete(Show).where(Show.show_id == show_id))
+                await conn.execute(delete(User).where(User.user_id.in_(user_ids)))  # type: ignore[union-attr]
@@ -0,0 +1,127 @@
+import datetime as dt
+
+import pytest
+from sqlalchemy import delete
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from anime_rest_api.db import setup_db
+from anime_rest_api.db.crud import show_operations
+from anime_rest_api.db.models.content import Genre
+from anime_rest_api.db.models.content import Show
+from anime_rest_api.db.models.content import ShowCreate
+from anime_rest_api.db.models.content import ShowRead
+from anime_rest_api.db.models.content import ShowUpdate
+from anime_rest_api.db.models.content import Studio
+from anime_rest_api.db.models.content import Tag
+
+pytestmark = pytest.mark.asyncio(loop_scope="module")
+
+SHOWS = 20
+SMALL_PAGE = 2
+# shows with their ratings, then one `IN` query per genres, studios and tags
+STATEMENTS_PER_PAGE = 4
+
+
+def show_create(i: int) -> ShowCreate:
+    return ShowCreate(
+        name=f"Labelled Show {i}",
+        release_date=dt.date(2020, 1, 1),
+        show_type="TV",
+        status="Finished",
+        content_rating="PG13",
+        genres=["Action", "Comedy"] if i % 2 else ["Drama"],
+        studios=[f"Studio {i % 3}"],
+        tags=["Isekai"],
+    )
+
+
+class TestShowLabels:
+    """Collection of tests for genres, studios and tags of shows."""
+
+    async def test_labels_page_statements(
+        self,
+        pg_engine: AsyncEngine,
+        sessions: async_sessionmaker,
+    ) -> None:
+        async with pg_engine.begin() as conn:
+            await setup_db(conn)
+        async with sessions() as session:
+            for i in range(SHOWS):
+                await show_operations.create_show(session, show_create(i))
+
+        statements: list[str] = []
+
+        def count_statement(*args: object) -> None:
+            statements.append(str(args[2]))
+
+        event.listen(pg_engine.sync_engine, "before_cursor_execute", count_statement)
+        try:
+            per_page = []
+            for limit in (SMALL_PAGE, SHOWS):
+                statements.clear()
+                async with sessions() as session:
+                    shows = await show_operations.list_shows(session, 0, limit)
+                    reads = [ShowRead.model_validate(show) for show in shows]
+                assert len(reads) == limit
+                per_page.append(len(statements))
+            assert per_page == [STATEMENTS_PER_PAGE, STATEMENTS_PER_PAGE]
+
+            async with sessions() as session:
+                dramas = await show_operations.list_shows(
+                    session,
+                    0,
+                    SHOWS,
+                    genre="Drama",
+                )
+                total = await show_operations.count_shows(
+                    session,
+                    "exact",
+                    genre="Drama",
+                )
+            assert {show.genres[0] for show in dramas} == {"Drama"}
+            assert len(dramas) == total == SHOWS // 2
+        finally:
+            event.remove(
+                pg_engine.sync_engine,
+                "before_cursor_execute",
+                count_statement,
+            )
+            async with pg_engine.begin() as conn:
+                for table in (Show, Genre, Studio, Tag):
+                    await conn.execute(delete(table))
+
+    async def test_update_replaces_labels(
+        self,
+        pg_engine: AsyncEngine,
+        sessions: async_sessionmaker,
+    ) -> None:
+        async with pg_engine.begin() as conn:
+            await setup_db(conn)
+        try:
+            async with sessions() as session:
+                show = await show_operations.create_show(session, show_create(1))
+                assert show.genres == ["Action", "Comedy"]
+                updated = await show_operations.update_show(
+                    session,
+                    show.show_id,
+                    ShowUpdate(genres=["Romance", "Action"]),
+                )
+                read = ShowRead.model_validate(updated)
+            assert read.genres == ["Action", "Romance"]
+            # labels left out of the update are kept
+            assert read.studios == ["Studio 1"]
+
+            async with sessions() as session:
+                row = await show_operations.get_show_fields(
+                    session,
+                    read.show_id,
+                    ["genres", "tags"],
+                )
+            assert row is not None
+            assert dict(row) == {"genres": ["Action", "Romance"], "tags": ["Isekai"]}
+        finally:
+            async with pg_engine.begin() as conn:
+                for table in (Show, Genre, Studio, Tag):
+                    await conn.execute(delete(table))
@@ -0,0 +1,186 @@
+import datetime as dt
+
+import pytest
+from sqlalchemy import delete
+from sqlalchemy import func
+from sqlalchemy import insert
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from anime_rest_api.api.routers.watchlist_routes import decode_cursor
+from anime_rest_api.api.routers.watchlist_routes import encode_cursor
+from anime_rest_api.db import setup_db
+from anime_rest_api.db.crud import watchlist_operations
+from anime_rest_api.db.crud.show_operations import delete_show
+from anime_rest_api.db.models.auth import User
+from anime_rest_api.db.models.content import Show
+from anime_rest_api.db.models.content import WatchStatus
+from anime_rest_api.db.models.content import WatchlistEntry
+from anime_rest_api.db.models.content import WatchlistEntryWrite
+
+SHOWS = 5
+MISSING_SHOW_ID = -1
+PAGE = 2
+
+
+async def insert_shows_and_user(pg_engine: AsyncEngine) -> tuple[list[int], int]:
+    async with pg_engine.begin() as conn:
+        await setup_db(conn)
+        show_ids = (
+            (
+                await conn.execute(
+                    insert(Show)
+                    .values(
+                        [
+                            {
+                                "name": f"Watched Show {i}",
+                                "release_date": dt.date(2020, 1, 1),
+                                "show_type": "TV",
+                                "status": "Finished",
+                                "content_rating": "PG13",
+                            }
+                            for i in range(SHOWS)
+                        ],
+                    )
+                    .returning(Show.show_id),
+                )
+            )
+            .scalars()
+            .all()
+        )
+        user_id = (
+            await conn.execute(
+                insert(User)
+                .values(
+                    {
+                        "username": "watcher",
+                        "email": "watcher@example.com",
+                        "first_name": "Watch",
+                        "last_name": "Er",
+                        "password_hash": "-",
+                    },
+                )
+                .returning(User.user_id),
+            )
+        ).scalar_one()
+    return list(show_ids), user_id
+
+
+def test_cursor_round_trip() -> None:
+    updated_at = dt.datetime(2024, 5, 1, 12, 30, tzinfo=dt.UTC)
+    assert decode_cursor(encode_cursor(updated_at, SHOWS)) == (updated_at, SHOWS)
+    with pytest.raises(ValueError, match="cursor"):
+        decode_cursor("not base64!")
+
+
+@pytest.mark.asyncio(loop_scope="module")
+async def test_batch_limit() -> None:
+    entries = [
+        WatchlistEntryWrite(show_id=i, status=WatchStatus.planned)
+        for i in range(watchlist_operations.MAX_BATCH + 1)
+    ]
+    # the limit is checked before the session is used
+    with pytest.raises(ValueError, match="At most"):
+        await watchlist_operations.upsert_watchlist_entries(None, 1, entries)  # type: ignore[arg-type]
+    with pytest.raises(ValueError, match="At most"):
+        await watchlist_operations.delete_watchlist_entries(
+            None,  # type: ignore[arg-type]
+            1,
+            list(range(watchlist_operations.MAX_BATCH + 1)),
+        )
+
+
+class TestWatchlistOps:
+    """Collection of tests for bulk watchlist writes and the kept counts."""
+
+    @pytest.mark.asyncio(loop_scope="module")
+    async def test_counts_match_entries(
+        self,
+        pg_engine: AsyncEngine,
+        sessions: async_sessionmaker,
+    ) -> None:
+        show_ids, user_id = await insert_shows_and_user(pg_engine)
+        try:
+            async with sessions() as session:
+                written = await watchlist_operations.upsert_watchlist_entries(
+                    session,
+                    user_id,
+                    [
+                        WatchlistEntryWrite(
+                            show_id=show_id,
+                            status=WatchStatus.watching,
+                            progress=1,
+                        )
+                        for show_id in [*show_ids, MISSING_SHOW_ID]
+                    ],
+                )
+            assert written == SHOWS
+            async with sessions() as session:
+                # moves two shows to completed, the last of a repeated show wins
+                await watchlist_operations.upsert_watchlist_entries(
+                    session,
+                    user_id,
+                    [
+                        WatchlistEntryWrite(
+                            show_id=show_ids[0],
+                            status=WatchStatus.dropped,
+                        ),
+                        WatchlistEntryWrite(
+                            show_id=show_ids[0],
+                            status=WatchStatus.completed,
+                        ),
+                        WatchlistEntryWrite(
+                            show_id=show_ids[1],
+                            status=WatchStatus.completed,
+                        ),
+                    ],
+                )
+            async with sessions() as session:
+                removed = await watchlist_operations.delete_watchlist_entries(
+                    session,
+                    user_id,
+                    [show_ids[2], MISSING_SHOW_ID],
+                )
+            assert removed == 1
+            async with sessions() as session:
+                await delete_show(session, show_ids[3])
+
+            async with sessions() as session:
+                counts = await watchlist_operations.count_watchlist_entries(
+                    session,
+                    user_id,
+                )
+                scanned = dict(
+                    (
+                        await session.execute(
+                            select(WatchlistEntry.status, func.count())
+                            .where(WatchlistEntry.user_id == user_id)
+                            .group_by(WatchlistEntry.status),
+                        )
+                    ).all(),
+                )
+            assert counts.completed == scanned[WatchStatus.completed] == PAGE
+            assert counts.watching == scanned[WatchStatus.watching] == 1
+            assert counts.dropped == counts.planned == 0
+            assert counts.total == sum(scanned.values())
+
+            listed = []
+            after = None
+            while True:
+                async with sessions() as session:
+                    page = await watchlist_operations.list_watchlist_entries(
+                        session,
+                        user_id,
+                        PAGE,
+                        after=after,
+                    )
+                listed.extend(entry.show_id for entry in page)
+                if len(page) < PAGE:
+                    break
+                after = (page[-1].updated_at, page[-1].show_id)
+            assert sorted(listed) == sorted({show_ids[0], show_ids[1], show_ids[4]})
+        finally:
+            async with pg_engine.begin() as conn:
+                await conn.execute(delete(Show).where(Show.show_id.in_(show_ids)))  # type: ignore[attr-defined]
+                await conn.execute(delete(User).where(User.user_id == user_id))
@@ -0,0 +1,32 @@
+from anime_rest_api.db.cache import TtlCache
+
+
+class TestTtlCache:
+    """Collection of tests for the TTL cache."""
+
+    def test_entry_expires(self):
+        now = [0.0]
+        cache = TtlCache[str, int](ttl=5, clock=lambda: now[0])
+        cache.set("shows", 1)
+        now[0] = 4.9
+        assert cache.get("shows") == 1
+        now[0] = 5
+        assert cache.get("shows") is None
+        assert len(cache) == 0
+
+    def test_oldest_entry_evicted_when_full(self):
+        cache = TtlCache[str, str](ttl=60, max_size=2)
+        for key in "abc":
+            cache.set(key, key)
+        assert cache.get("a") is None
+        assert cache.get("b") == "b"
+        assert cache.get("c") == "c"
+
+    def test_invalidate_and_clear(self):
+        cache = TtlCache[str, int](ttl=60)
+        cache.set("a", 1)
+        cache.set("b", 1)
+        cache.invalidate("a")
+        assert cache.get("a") is None
+        cache.clear()
+        assert len(cache) == 0
@@ -0,0 +1,82 @@
+import pytest
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.util import greenlet_spawn
+
+from anime_rest_api.db.instrumentation import SlowQueryLog
+from anime_rest_api.db.instrumentation import SlowQueryStat
+from anime_rest_api.db.instrumentation import fingerprint
+
+
+def test_fingerprint_groups_values():
+    first = fingerprint("SELECT * FROM content.shows WHERE show_id = $1::INTEGER")
+    second = fingerprint("SELECT *\n  FROM content.shows WHERE show_id = 42")
+    assert first == second
+
+
+def test_top_orders_by_total_time():
+    log = SlowQueryLog(0)
+    log.record("SELECT 1", (), 5.0)
+    log.record("SELECT * FROM a WHERE x = $1", (1,), 3.0)
+    log.record("SELECT * FROM a WHERE x = $1", (2,), 4.0)
+    top = log.top()
+    assert [stat.fingerprint for stat in top] == [
+        "SELECT * FROM a WHERE x = ?",
+        "SELECT ?",
+    ]
+    assert top[0].calls == len(top)
+    assert top[0].parameters_shape == "(int)"
+
+
+def test_drops_least_total_time_when_full():
+    log = SlowQueryLog(0, max_entries=2)
+    log.record("SELECT 1 FROM a", (), 1.0)
+    log.record("SELECT 1 FROM b", (), 2.0)
+    log.record("SELECT 1 FROM c", (), 3.0)
+    assert [stat.fingerprint for stat in log.top()] == [
+        "SELECT ? FROM c",
+        "SELECT ? FROM b",
+    ]
+
+
+async def crud_like():
+    return SlowQueryLog(0).record("SELECT 1", (), 1.0)
+
+
+async def crud_like_in_greenlet():
+    # like the statements SQLAlchemy runs for an AsyncSession
+    return await greenlet_spawn(SlowQueryLog(0).record, "SELECT 1", (), 1.0)
+
+
+@pytest.mark.asyncio(loop_scope="module")
+async def test_records_calling_crud_function(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(
+        "anime_rest_api.db.instrumentation._CRUD_PACKAGE",
+        __name__,
+    )
+    stat = await crud_like()
+    assert stat.operations[-1] == "crud_like"
+
+
+@pytest.mark.asyncio(loop_scope="module")
+async def test_records_crud_function_across_greenlet(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(
+        "anime_rest_api.db.instrumentation._CRUD_PACKAGE",
+        __name__,
+    )
+    stat = await crud_like_in_greenlet()
+    assert stat.operations[-1] == "crud_like_in_greenlet"
+
+
+@pytest.mark.asyncio(loop_scope="module")
+async def test_explain_never_keeps_parameter_values(pg_engine: AsyncEngine):
+    log = SlowQueryLog(0, explain_rate=1.0)
+    log.install(pg_engine)
+    statement = (
+        "SELECT n FROM generate_series(1, 10) AS n WHERE n::text <> $1 AND n <> $2"
+    )
+    stat = SlowQueryStat(fingerprint=fingerprint(statement))
+    await log._explain(stat, statement, ("hunter2", 424242))  # noqa: SLF001
+    assert stat.explain is not None
+    assert "Filter" in stat.explain
+    assert "hunter2" not in stat.explain
+    assert "424242" not in stat.explain
@@ -0,0 +1,186 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+
+import pytest
+from sqlalchemy import delete
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from anime_rest_api.db import setup_db
+from anime_rest_api.db.crud.job_operations import enqueue_job
+from anime_rest_api.db.crud.job_operations import get_job
+from anime_rest_api.db.jobs import JobContext
+from anime_rest_api.db.jobs import JobRegistry
+from anime_rest_api.db.jobs import JobWorker
+from anime_rest_api.db.jobs import retry_delay
+from anime_rest_api.db.models.content import Job
+from anime_rest_api.db.models.content import JobCreate
+from anime_rest_api.db.models.content import JobStatus
+from anime_rest_api.db.models.content import JobType
+
+BASE_DELAY = 10.0
+MAX_DELAY = 60.0
+ATTEMPTS = 2
+
+
+async def succeed(context: JobContext) -> dict[str, Any]:
+    await context.report(0.5, "halfway")
+    return {"payload": context.payload}
+
+
+def test_retry_delay_doubles_up_to_cap() -> None:
+    delays = [
+        retry_delay(attempt, base=BASE_DELAY, cap=MAX_DELAY, jitter=lambda: 1.0)
+        for attempt in range(1, 6)
+    ]
+    assert delays == [BASE_DELAY, 2 * BASE_DELAY, 4 * BASE_DELAY, MAX_DELAY, MAX_DELAY]
+    # jitter only ever shortens the delay, by at most half
+    shortest = retry_delay(1, base=BASE_DELAY, jitter=lambda: 0.0)
+    assert shortest == BASE_DELAY / 2
+
+
+def test_registry_caps_each_type() -> None:
+    registry = JobRegistry()
+    registry.register(JobType.refresh_show_stats)(succeed)
+    registry.register(JobType.import_episodes, concurrency=2)(succeed)
+    assert registry.free_types({}) == [
+        JobType.refresh_show_stats,
+        JobType.import_episodes,
+    ]
+    assert registry.free_types(
+        {JobType.refresh_show_stats: 1, JobType.import_episodes: 1},
+    ) == [JobType.import_episodes]
+    assert registry.free_types({JobType.import_episodes: 2}) == [
+        JobType.refresh_show_stats,
+    ]
+
+
+class TestJobWorker:
+    """Collection of tests for claiming and running queued jobs."""
+
+    @pytest.mark.asyncio(loop_scope="module")
+    async def test_workers_claim_distinct_jobs(
+        self,
+        pg_engine: AsyncEngine,
+        sessions: async_sessionmaker,
+    ) -> None:
+        async with pg_engine.begin() as conn:
+            await setup_db(conn)
+        registry = JobRegistry()
+        registry.register(JobType.import_episodes)(succeed)
+        try:
+            async with sessions() as session:
+                for i in range(3):
+                    await enqueue_job(
+                        session,
+                        JobCreate(job_type=JobType.import_episodes, payload={"i": i}),
+                    )
+            workers = [
+                JobWorker(pg_engine, registry, name=f"worker-{i}") for i in range(2)
+            ]
+            claimed = await asyncio.gather(*(worker.claim() for worker in workers))
+            assert all(job is not None for job in claimed)
+            assert len({job.job_id for job in claimed if job is not None}) == len(
+                workers,
+            )
+
+            # a worker at its cap for the type doesn't claim another job of it
+            workers[0].running[asyncio.create_task(asyncio.sleep(0))] = claimed[0]  # type: ignore[assignment]
+            assert await workers[0].claim() is None
+        finally:
+            async with pg_engine.begin() as conn:
+                await conn.execute(delete(Job))
+
+    @pytest.mark.asyncio(loop_scope="module")
+    async def test_failed_attempt_retries_then_succeeds(
+        self,
+        pg_engine: AsyncEngine,
+        sessions: async_sessionmaker,
+    ) -> None:
+        async with pg_engine.begin() as conn:
+            await setup_db(conn)
+        calls = []
+
+        async def flaky(context: JobContext) -> dict[str, Any]:
+            calls.append(context.job.attempts)
+            if len(calls) == 1:
+                msg = "first attempt fails"
+                raise RuntimeError(msg)
+            return await succeed(context)
+
+        registry = JobRegistry()
+        registry.register(JobType.refresh_show_stats)(flaky)
+        worker = JobWorker(pg_engine, registry, name="flaky-worker")
+        try:
+            async with sessions() as session:
+                queued = await enqueue_job(
+                    session,
+                    JobCreate(
+                        job_type=JobType.refresh_show_stats,
+                        payload={"full": True},
+                        max_attempts=ATTEMPTS,
+                    ),
+                )
+            with ThreadPoolExecutor(1) as executor:
+                job = await worker.claim()
+                assert job is not None
+                await worker.run_job(job, executor)
+                async with sessions() as session:
+                    failed = await get_job(session, queued.job_id)  # type: ignore[arg-type]
+                assert failed.status == JobStatus.queued
+                assert failed.error == "RuntimeError: first attempt fails"
+                # backed off, so it isn't due yet
+                assert failed.run_after > failed.started_at  # type: ignore[operator]
+                assert await worker.claim() is None
+
+                async with pg_engine.begin() as conn:
+                    await conn.execute(
+                        update(Job).values(run_after=Job.created_at),  # type: ignore[arg-type]
+                    )
+                job = await worker.claim()
+                assert job is not None
+                await worker.run_job(job, executor)
+            async with sessions() as session:
+                done = await get_job(session, queued.job_id)  # type: ignore[arg-type]
+            assert calls == [1, 2]
+            assert done.status == JobStatus.succeeded
+            assert done.progress == 1
+            assert done.result == {"payload": {"full": True}}
+        finally:
+            async with pg_engine.begin() as conn:
+                await conn.execute(delete(Job))
+
+    @pytest.mark.asyncio(loop_scope="module")
+    async def test_stale_jobs_are_requeued(
+        self,
+        pg_engine: AsyncEngine,
+        sessions: async_sessionmaker,
+    ) -> None:
+        async with pg_engine.begin() as conn:
+            await setup_db(conn)
+        registry = JobRegistry()
+        registry.register(JobType.refresh_similarity)(succeed)
+        worker = JobWorker(pg_engine, registry, name="gone-worker", stale_after=1.0)
+        try:
+            async with sessions() as session:
+                queued = await enqueue_job(
+                    session,
+                    JobCreate(job_type=JobType.refresh_similarity),
+                )
+            assert await worker.claim() is not None
+            assert await worker.requeue_stale() == 0
+            async with pg_engine.begin() as conn:
+                await conn.execute(
+                    update(Job).values(heartbeat_at=Job.created_at),  # type: ignore[arg-type]
+                )
+            await asyncio.sleep(worker.stale_after)
+            assert await worker.requeue_stale() == 1
+            async with sessions() as session:
+                requeued = await get_job(session, queued.job_id)  # type: ignore[arg-type]
+            assert requeued.status == JobStatus.queued
+            assert requeued.attempts == 1
+        finally:
+            async with pg_engine.begin() as conn:
+                await conn.execute(delete(Job))
@@ -0,0 +1,176 @@
+import datetime as dt
+
+import numpy as np
+import pytest
+from sqlalchemy import delete
+from sqlalchemy import insert
+from sqlalchemy import select
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from anime_rest_api.db import setup_db
+from anime_rest_api.db import similarity
+from anime_rest_api.db.crud.similarity_operations import list_similar_shows
+from anime_rest_api.db.models.content import Show
+from anime_rest_api.db.models.content import ShowSimilarity
+
+SHOWS = 300
+FEATURES = 16
+K = 5
+BLOCK_ROWS = 64
+SEEDED_SHOWS = 40
+CHANGED = 2
+
+
+def random_features(rows: int) -> np.ndarray:
+    features = np.random.default_rng(0).random((rows, FEATURES), dtype=np.float32)
+    return features / np.linalg.norm(features, axis=1, keepdims=True)
+
+
+def test_blocked_top_k_matches_brute_force() -> None:
+    features = random_features(SHOWS)
+    indices, scores = similarity.top_k_neighbours(
+        features,
+        np.arange(SHOWS),
+        K,
+        BLOCK_ROWS,
+    )
+    full = features @ features.T
+    np.fill_diagonal(full, -np.inf)
+    expected = np.argsort(-full, axis=1)[:, :K]
+    np.testing.assert_array_equal(indices, expected)
+    np.testing.assert_allclose(scores, np.take_along_axis(full, expected, 1))
+
+
+def test_beaten_lists() -> None:
+    features = random_features(SHOWS)
+    indices, scores = similarity.top_k_neighbours(features, np.arange(SHOWS), K)
+    last = scores[:, -1].copy()
+    # only the show itself, and lists it is in ahead of the last neighbour
+    changed = np.array([0])
+    holding = {0, *np.flatnonzero((indices[:, :-1] == 0).any(axis=1)).tolist()}
+    beaten = similarity.beaten_lists(features, changed, last, BLOCK_ROWS)
+    assert set(np.flatnonzero(beaten).tolist()) == holding
+    short = next(i for i in range(SHOWS) if i not in holding)
+    last[short] = -np.inf
+    beaten = similarity.beaten_lists(features, changed, last, BLOCK_ROWS)
+    assert set(np.flatnonzero(beaten).tolist()) == holding | {short}
+    # a show already in a list doesn't enter it again
+    members = np.flatnonzero((indices == 0).any(axis=1))
+    beaten = similarity.beaten_lists(
+        features,
+        changed,
+        last,
+        BLOCK_ROWS,
+        (members, np.zeros_like(members)),
+    )
+    assert set(np.flatnonzero(beaten).tolist()) == {0, short}
+
+
+def test_digests_follow_features() -> None:
+    rows = [
+        (1, "TV", "Finished", "PG13", 2010, 8.0, 100, [1, 2]),
+        (2, "TV", "Finished", "PG13", 2010, 8.0, 100, [2, 1]),
+        (3, "TV", "Finished", "PG13", 2010, 8.01, 100, [1, 2]),
+        (4, "OVA", "Finished", "PG13", 2010, 8.0, 100, [1, 2]),
+        (5, "TV", "Finished", "PG13", 2010, 8.0, 100, [1]),
+        (6, "TV", "Finished", "PG13", 2010, 8.0, 100, []),
+    ]
+    digests = similarity.feature_digests(
+        similarity.encode_features(similarity.FeatureColumns.from_rows(rows)),
+    )
+    # a barely moved average, or genres in another order, is not a change
+    assert digests[0] == digests[1] == digests[2]
+    assert len({digests[0], digests[3], digests[4], digests[5]}) == len(rows) - 2
+
+
+async def insert_shows(pg_engine: AsyncEngine) -> list[int]:
+    async with pg_engine.begin() as conn:
+        await setup_db(conn)
+        show_ids = (
+            await conn.execute(
+                insert(Show)
+                .values(
+                    [
+                        {
+                            "name": f"Similar Show {i}",
+                            "release_date": dt.date(1990 + i, 1, 1),
+                            "show_type": "TV" if i % 2 else "Movie",
+                            "status": "Finished",
+                            "content_rating": "PG",
+                        }
+                        for i in range(SEEDED_SHOWS)
+                    ],
+                )
+                .returning(Show.show_id),
+            )
+        ).scalars()
+        return list(show_ids)
+
+
+class TestRefreshSimilarity:
+    """Collection of tests for storing and incrementally refreshing similar shows."""
+
+    @pytest.mark.asyncio(loop_scope="module")
+    async def test_incremental_refresh_matches_full(
+        self,
+        pg_engine: AsyncEngine,
+        sessions: async_sessionmaker,
+    ) -> None:
+        show_ids = await insert_shows(pg_engine)
+        try:
+            refresh = await similarity.refresh_similarity(pg_engine, k=K, full=True)
+            assert refresh.recomputed == refresh.shows
+            unchanged = await similarity.refresh_similarity(pg_engine, k=K)
+            assert unchanged.changed == unchanged.recomputed == 0
+
+            async with pg_engine.begin() as conn:
+                # stays in the lists it was in, only scoring a little higher
+                await conn.execute(
+                    update(Show)
+                    .where(Show.show_id == show_ids[0])
+                    .values(release_date=dt.date(1993, 1, 1)),
+                )
+                # leaves the lists it was in for others
+                await conn.execute(
+                    update(Show)
+                    .where(Show.show_id == show_ids[-2])
+                    .values(show_type="TV", release_date=dt.date(2011, 1, 1)),
+                )
+                await conn.execute(delete(Show).where(Show.show_id == show_ids[1]))
+            incremental = await similarity.refresh_similarity(pg_engine, k=K)
+            assert incremental.changed == CHANGED
+            assert incremental.deleted == 1
+            assert 0 < incremental.recomputed < incremental.shows
+            assert incremental.rescored > 0
+
+            statement = select(
+                ShowSimilarity.show_id,
+                ShowSimilarity.rank,
+                ShowSimilarity.score,
+            ).order_by(ShowSimilarity.show_id, ShowSimilarity.rank)
+            async with pg_engine.connect() as conn:
+                after_incremental = (await conn.execute(statement)).all()
+            await similarity.refresh_similarity(pg_engine, k=K, full=True)
+            async with pg_engine.connect() as conn:
+                after_full = (await conn.execute(statement)).all()
+            # ties may order differently, the scores of each rank may not
+            assert [row[:2] for row in after_incremental] == [
+                row[:2] for row in after_full
+            ]
+            assert [row.score for row in after_incremental] == pytest.approx(
+                [row.score for row in after_full],
+            )
+
+            async with sessions() as session:
+                similar = await list_similar_shows(session, show_ids[0], K)
+            assert len(similar) == K
+            assert show_ids[1] not in {show.show_id for show in similar}
+            assert [show.score for show in similar] == sorted(
+                (show.score for show in similar),
+                reverse=True,
+            )
+        finally:
+            async with pg_engine.begin() as conn:
+                await conn.execute(delete(Show).where(Show.show_id.in_(show_ids)))  # type: ignore[attr-defined]
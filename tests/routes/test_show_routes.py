@@ -0,0 +1,133 @@
+from collections.abc import AsyncIterator
+from collections.abc import Coroutine
+import contextlib
+import datetime as dt
+
+from fastapi import status
+from fastapi.testclient import TestClient
+import pytest
+from sqlalchemy import delete
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from anime_rest_api.db.models.content import Show
+from tests.db.crud.test_user_ops import setup_test_db
+
+
+@pytest.fixture
+async def example_show(
+    pg_engine: AsyncEngine,
+    setup_test_db: Coroutine,
+) -> AsyncIterator[int]:
+    await setup_test_db
+    async with pg_engine.begin() as conn:
+        show_id = (
+            await conn.execute(
+                insert(Show)
+                .values(
+                    name="Example Show",
+                    release_date=dt.date(2020, 1, 1),
+                    show_type="TV",
+                    status="Finished",
+                    content_rating="PG13",
+                )
+                .returning(Show.show_id),
+            )
+        ).scalar_one()
+    yield show_id
+    async with pg_engine.begin() as conn:
+        await conn.execute(delete(Show).where(Show.show_id == show_id))
+
+
+class TestShowFields:
+    """Tests for narrowing show responses with `fields`."""
+
+    def test_unknown_field(self, test_client_lifespan: TestClient):
+        response = test_client_lifespan.get("/shows?fields=show_id,nope")
+        assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+    @pytest.mark.asyncio(loop_scope="class")
+    class TestAsync:
+        """Async tests for `fields`."""
+
+        async def test_list_only_requested_fields(
+            self,
+            test_client_lifespan: TestClient,
+            example_show: AsyncIterator[int],
+        ):
+            async with contextlib.aclosing(example_show) as setup:
+                show_id = await anext(setup)
+                response = test_client_lifespan.get("/shows?fields=show_id,name")
+                assert response.status_code == status.HTTP_200_OK
+                data = response.json()
+                assert data["shows"] == [{"show_id": show_id, "name": "Example Show"}]
+                assert data["count"] == 1
+                assert data["hasMore"] is False
+
+                # cleanup
+                with contextlib.suppress(StopAsyncIteration):
+                    await setup.asend(None)
+
+        async def test_get_only_requested_fields(
+            self,
+            test_client_lifespan: TestClient,
+            example_show: AsyncIterator[int],
+        ):
+            async with contextlib.aclosing(example_show) as setup:
+                show_id = await anext(setup)
+                response = test_client_lifespan.get(
+                    f"/shows/{show_id}?fields=release_date",
+                )
+                assert response.status_code == status.HTTP_200_OK
+                assert response.json() == {"release_date": "2020-01-01"}
+
+                # cleanup
+                with contextlib.suppress(StopAsyncIteration):
+                    await setup.asend(None)
+
+
+@pytest.mark.asyncio(loop_scope="class")
+class TestListingPaths:
+    """Tests for the alternative listing paths matching the default one."""
+
+    async def test_lean_matches_full(
+        self,
+        test_client_lifespan: TestClient,
+        example_show: AsyncIterator[int],
+        monkeypatch: pytest.MonkeyPatch,
+    ):
+        async with contextlib.aclosing(example_show) as setup:
+            await anext(setup)
+            full = test_client_lifespan.get("/shows")
+            monkeypatch.setattr(
+                "anime_rest_api.api.routers.shows_routes.LEAN_LISTINGS",
+                True,
+            )
+            lean = test_client_lifespan.get("/shows")
+            assert lean.status_code == status.HTTP_200_OK
+            assert lean.json() == full.json()
+
+            # cleanup
+            with contextlib.suppress(StopAsyncIteration):
+                await setup.asend(None)
+
+    async def test_pg_json_matches_full(
+        self,
+        test_client_lifespan: TestClient,
+        example_show: AsyncIterator[int],
+        monkeypatch: pytest.MonkeyPatch,
+    ):
+        async with contextlib.aclosing(example_show) as setup:
+            await anext(setup)
+            full = test_client_lifespan.get("/shows?include_total=exact")
+            monkeypatch.setattr(
+                "anime_rest_api.api.routers.shows_routes.PG_JSON_LISTINGS",
+                True,
+            )
+            rendered = test_client_lifespan.get("/shows?include_total=exact")
+            assert rendered.status_code == status.HTTP_200_OK
+            assert rendered.json() == full.json()
+
+            # cleanup
+            with contextlib.suppress(StopAsyncIteration):
+                await setup.asend(None)
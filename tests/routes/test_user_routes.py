@@ -0,0 +1,43 @@
+from collections.abc import Sequence
+import json
+
+import pytest
+
+from anime_rest_api.api.models.sessions import JwtUser
+from anime_rest_api.api.routers import user_routes
+
+LIMIT = 10
+
+
+class TestListUsers:
+    """Collection of tests for listing users."""
+
+    @pytest.mark.asyncio(loop_scope="module")
+    async def test_lean_listing_has_no_password_hash(
+        self,
+        monkeypatch: pytest.MonkeyPatch,
+    ):
+        selected: list[Sequence[str]] = []
+
+        async def list_user_fields(
+            _session: object,
+            fields: Sequence[str],
+            _offset: int,
+            _limit: int,
+        ) -> list[dict]:
+            selected.append(fields)
+            return [dict.fromkeys(fields, "value")]
+
+        monkeypatch.setattr(user_routes, "LEAN_LISTINGS", True)
+        monkeypatch.setattr(user_routes, "list_user_fields", list_user_fields)
+        response = await user_routes.list_users_route(
+            limit_and_offset=(LIMIT, 0),
+            include_total=None,
+            fields=None,
+            session=None,  # type: ignore[arg-type]
+            requesting_user=JwtUser.model_construct(username="lean"),
+        )
+        [user] = json.loads(response.body)["users"]
+        assert "password_hash" not in selected[0]
+        assert "password_hash" not in user
+        assert "username" in user
@@ -0,0 +1,105 @@
+import asyncio
+import json
+from pathlib import Path
+
+from fastapi import status
+import httpx
+import pytest
+from starlette.types import Receive
+from starlette.types import Scope
+from starlette.types import Send
+
+from anime_rest_api import tracing
+from anime_rest_api.tracing import SpanExporter
+from anime_rest_api.tracing import TracingMiddleware
+from anime_rest_api.tracing import span
+
+TRACE_ID = "4bf92f3577b34da6a3ce929d0e0e4736"
+PARENT_ID = "00f067aa0ba902b7"
+
+
+@pytest.fixture
+def exporter(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> SpanExporter:
+    exporter = SpanExporter(str(tmp_path / "traces.jsonl"))
+    monkeypatch.setattr(tracing, "EXPORTER", exporter)
+    return exporter
+
+
+async def traced_app(_scope: Scope, _receive: Receive, send: Send) -> None:
+    with span("serialize_response"), span("jwt.decode"):
+        await asyncio.sleep(0)
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"ok"})
+
+
+def traced_client(sample_rate: float) -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        transport=httpx.ASGITransport(
+            app=TracingMiddleware(traced_app, sample_rate=sample_rate),
+        ),
+        base_url="http://test",
+    )
+
+
+def exported_spans(exporter: SpanExporter) -> list[dict]:
+    lines = Path(exporter.path).read_text().splitlines()
+    return [
+        exported
+        for line in lines
+        for resource in json.loads(line)["resourceSpans"]
+        for scope in resource["scopeSpans"]
+        for exported in scope["spans"]
+    ]
+
+
+@pytest.mark.asyncio(loop_scope="module")
+class TestTracingMiddleware:
+    """Collection of tests for request traces."""
+
+    async def test_continues_incoming_trace(self, exporter: SpanExporter):
+        async with traced_client(sample_rate=0) as client:
+            response = await client.get(
+                "/shows",
+                headers={"traceparent": f"00-{TRACE_ID}-{PARENT_ID}-01"},
+            )
+        assert response.status_code == status.HTTP_200_OK
+        assert response.headers["traceparent"].startswith(f"00-{TRACE_ID}-")
+        await exporter.flush()
+
+        spans = {exported["name"]: exported for exported in exported_spans(exporter)}
+        root = spans["GET /shows"]
+        assert root["traceId"] == TRACE_ID
+        assert root["parentSpanId"] == PARENT_ID
+        assert spans["serialize_response"]["parentSpanId"] == root["spanId"]
+        assert (
+            spans["jwt.decode"]["parentSpanId"] == spans["serialize_response"]["spanId"]
+        )
+
+    async def test_unsampled_request_exports_nothing(self, exporter: SpanExporter):
+        async with traced_client(sample_rate=0) as client:
+            response = await client.get(
+                "/shows",
+                headers={"traceparent": f"00-{TRACE_ID}-{PARENT_ID}-00"},
+            )
+        assert "traceparent" not in response.headers
+        await exporter.flush()
+        assert not Path(exporter.path).exists()
+
+    async def test_samples_new_traces(self, exporter: SpanExporter):
+        async with traced_client(sample_rate=1) as client:
+            response = await client.get("/shows")
+        assert "traceparent" in response.headers
+        await exporter.flush()
+        [root] = [
+            exported
+            for exported in exported_spans(exporter)
+            if exported["name"] == "GET /shows"
+        ]
+        assert "parentSpanId" not in root
+
+
+def test_exporter_drops_when_full(tmp_path: Path):
+    exporter = SpanExporter(str(tmp_path / "traces.jsonl"), max_queue=1)
+    exporter.submit(tracing.Span("first", TRACE_ID, None))
+    exporter.submit(tracing.Span("second", TRACE_ID, None))
+    assert exporter.dropped == 1